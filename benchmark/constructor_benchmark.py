@@ -0,0 +1,161 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+from src.model.file import File
+from src.model.folder import Folder
+from src.model.structable import Structable
+from src.constructor.constructor import GeneralConstructor
+from src.constructor.parallel_constructor import ParallelConstructor
+from src.constructor.scan_index import ScanIndex, create_scan_index_fingerprint
+from src.env_configs import EnvConfigs
+
+# Run from the project root : python -m benchmark.constructor_benchmark
+
+EPISODE_EXTENSIONS = ["mkv", "srt", "nfo", "log"]
+
+
+def create_synthetic_tree(root: str, entries: int, seasons: int, episodes: int) -> int:
+    """Create show/season/episode folders until the number of created entries reaches `entries`."""
+    created = 0
+    show_index = 0
+
+    while created < entries:
+        show_path = os.path.join(root, f"Show {show_index}")
+        os.mkdir(show_path)
+        created += 1
+        show_index += 1
+
+        for season_index in range(1, seasons + 1):
+            season_path = os.path.join(show_path, f"Season {season_index}")
+            os.mkdir(season_path)
+            created += 1
+
+            for episode_index in range(1, episodes + 1):
+                extension = EPISODE_EXTENSIONS[episode_index % len(EPISODE_EXTENSIONS)]
+                episode_path = os.path.join(
+                    season_path, f"Show {show_index} - {episode_index}.{extension}"
+                )
+                with open(episode_path, "wb"):
+                    pass
+                created += 1
+
+                if created >= entries:
+                    return created
+
+    return created
+
+
+def is_same_tree(left: Structable, right: Structable) -> bool:
+    if type(left) != type(right):
+        return False
+
+    if left.get_absolute_path() != right.get_absolute_path():
+        return False
+
+    if left.get_title() != right.get_title():
+        return False
+
+    if isinstance(left, File):
+        return left.get_file_type() == right.get_file_type()
+
+    if isinstance(left, Folder):
+        left_structs = left.get_structs()
+        right_structs = right.get_structs()
+
+        if len(left_structs) != len(right_structs):
+            return False
+
+        return all(is_same_tree(l, r) for l, r in zip(left_structs, right_structs))
+
+    return False
+
+
+def measure(constructor: GeneralConstructor, source_path: str, repeat: int):
+    best = None
+    root = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        root = constructor.struct(source_path=source_path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, root
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--seasons", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--path",
+        type=str,
+        default=None,
+        help="directory to create the synthetic tree in (e.g. a network mount)",
+    )
+    args = parser.parse_args()
+
+    env_configs = EnvConfigs()
+    work_path = tempfile.mkdtemp(dir=args.path)
+    index_path = tempfile.mkdtemp()
+
+    try:
+        created = create_synthetic_tree(
+            root=work_path,
+            entries=args.entries,
+            seasons=args.seasons,
+            episodes=args.episodes,
+        )
+        print(f"synthetic tree : {created} entries in {work_path}")
+
+        general_elapsed, general_root = measure(
+            constructor=GeneralConstructor(env_configs=env_configs),
+            source_path=work_path,
+            repeat=args.repeat,
+        )
+        print(f"GeneralConstructor  : {general_elapsed:.3f} s")
+
+        parallel_elapsed, parallel_root = measure(
+            constructor=ParallelConstructor(
+                env_configs=env_configs, max_workers=args.workers
+            ),
+            source_path=work_path,
+            repeat=args.repeat,
+        )
+        print(
+            f"ParallelConstructor : {parallel_elapsed:.3f} s (workers={args.workers})"
+        )
+
+        print(f"speedup             : {general_elapsed / parallel_elapsed:.2f}x")
+        print(f"identical tree      : {is_same_tree(general_root, parallel_root)}")
+
+        scan_index = ScanIndex(
+            index_path=os.path.join(index_path, "scan_index.sqlite3"),
+            fingerprint=create_scan_index_fingerprint(env_configs=env_configs),
+        )
+        indexed_constructor = ParallelConstructor(
+            env_configs=env_configs, max_workers=args.workers, scan_index=scan_index
+        )
+        cold_elapsed, _ = measure(
+            constructor=indexed_constructor, source_path=work_path, repeat=1
+        )
+        warm_elapsed, indexed_root = measure(
+            constructor=indexed_constructor, source_path=work_path, repeat=args.repeat
+        )
+        scan_index.close()
+        print(f"ScanIndex (cold)    : {cold_elapsed:.3f} s")
+        print(f"ScanIndex (warm)    : {warm_elapsed:.3f} s")
+        print(f"identical tree      : {is_same_tree(general_root, indexed_root)}")
+    finally:
+        shutil.rmtree(work_path, ignore_errors=True)
+        shutil.rmtree(index_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
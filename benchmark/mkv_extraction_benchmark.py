@@ -0,0 +1,366 @@
+import os
+import time
+import shutil
+import struct
+import zlib
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from src.mkv.mkv_track import read_tracks
+from src.mkv.mkv_extractor import MkvextractExtractor, NativeMkvExtractor
+
+# Run from the project root : python -m benchmark.mkv_extraction_benchmark
+# Disk reads are the blocks read from storage after the file is evicted from the page cache (Linux only).
+
+CLUSTER_DURATION_MS = 5000
+VIDEO_FPS = 25
+SUBTITLE_INTERVAL_MS = 4000
+SUBTITLE_DURATION_MS = 2500
+ASS_HEADER = b"[Script Info]\nScriptType: v4.00+\n\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize\nStyle: Default,Arial,20\n\n[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+
+
+def _encode_size(size: int, length: int = 0) -> bytes:
+    if not length:
+        length = 1
+        while size >= (1 << (7 * length)) - 1:
+            length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, "big")
+
+
+def _element(element_id: int, data: bytes, size_length: int = 0) -> bytes:
+    return (
+        element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+        + _encode_size(len(data), size_length)
+        + data
+    )
+
+
+def _uint(element_id: int, value: int, length: int = 0) -> bytes:
+    return _element(
+        element_id,
+        value.to_bytes(length or max(1, (value.bit_length() + 7) // 8), "big"),
+    )
+
+
+def _string(element_id: int, value: str) -> bytes:
+    return _element(element_id, value.encode("utf-8"))
+
+
+def _track_entry(
+    number: int, track_type: int, codec_id: str, language: str, extra: bytes = b""
+) -> bytes:
+    return _element(
+        0xAE,
+        _uint(0xD7, number)
+        + _uint(0x73C5, number)
+        + _uint(0x83, track_type)
+        + _string(0x86, codec_id)
+        + _string(0x22B59C, language)
+        + extra,
+    )
+
+
+def _block(
+    track_number: int, relative_timestamp: int, payload: bytes, keyframe: bool
+) -> bytes:
+    return (
+        _encode_size(track_number)
+        + struct.pack(">hB", relative_timestamp, 0x80 if keyframe else 0)
+        + payload
+    )
+
+
+def create_synthetic_mkv(
+    path: str,
+    minutes: int,
+    video_kbps: int,
+    statistics_tags: bool = True,
+    cued_subtitle_ms: int = 0,
+) -> int:
+    """Write a muxed-like mkv: video and audio in SimpleBlocks, an SRT and a zlib compressed ASS track in BlockGroups,
+    Cues indexing the video keyframes and every subtitle block, and the statistics tags, as mkvmerge does.
+    cued_subtitle_ms > 0 leaves the later subtitle blocks out of the Cues, like a partly indexing muxer. Returns the file size.
+    """
+    duration_ms = minutes * 60 * 1000
+    video_payload = os.urandom(video_kbps * 1000 // 8 // VIDEO_FPS)
+    audio_payload = os.urandom(192 * 1000 // 8 // 50)
+
+    info = _element(0x1549A966, _uint(0x2AD7B1, 1000000) + _string(0x4D80, "benchmark"))
+    zlib_encoding = _element(
+        0x6D80, _element(0x6240, _uint(0x5032, 1) + _element(0x5034, _uint(0x4254, 0)))
+    )
+    tracks = _element(
+        0x1654AE6B,
+        _track_entry(1, 1, "V_MPEG4/ISO/AVC", "und")
+        + _track_entry(2, 2, "A_AAC", "jpn")
+        + _track_entry(3, 0x11, "S_TEXT/UTF8", "kor")
+        + _track_entry(
+            4, 0x11, "S_TEXT/ASS", "eng", _element(0x63A2, ASS_HEADER) + zlib_encoding
+        ),
+    )
+
+    def seek_head(cues_position: int, tags_position: int) -> bytes:
+        # fixed size positions, the SeekHead is rewritten once the Cues and Tags positions are known
+        seeks = b""
+        positions = [
+            (0x1549A966, info_position),
+            (0x1654AE6B, tracks_position),
+            (0x1C53BB6B, cues_position),
+        ]
+        if statistics_tags:
+            positions.append((0x1254C367, tags_position))
+        for element_id, position in positions:
+            seeks += _element(
+                0x4DBB,
+                _element(0x53AB, element_id.to_bytes(4, "big"))
+                + _uint(0x53AC, position, length=8),
+            )
+        return _element(0x114D9B74, seeks)
+
+    info_position = tracks_position = 0
+    info_position = len(seek_head(cues_position=0, tags_position=0))
+    tracks_position = info_position + len(info)
+    cue_points = []
+    frame_counts = {3: 0, 4: 0}
+
+    with open(path, "wb") as file:
+        file.write(
+            _element(
+                0x1A45DFA3,
+                _string(0x4282, "matroska") + _uint(0x4287, 4) + _uint(0x4285, 2),
+            )
+        )
+        file.write(b"\x18\x53\x80\x67" + b"\x01" + b"\x00" * 7)
+        segment_data_offset = file.tell()
+        file.write(seek_head(0, 0) + info + tracks)
+
+        for cluster_timestamp in range(0, duration_ms, CLUSTER_DURATION_MS):
+            cluster_position = file.tell() - segment_data_offset
+            body = _uint(0xE7, cluster_timestamp)
+            cue_points.append((cluster_timestamp, 1, cluster_position, len(body)))
+
+            frames = []
+            for index in range(CLUSTER_DURATION_MS * VIDEO_FPS // 1000):
+                frames.append((index * 1000 // VIDEO_FPS, 1, video_payload))
+            for index in range(CLUSTER_DURATION_MS // 20):
+                frames.append((index * 20, 2, audio_payload))
+            first_line = -(-cluster_timestamp // SUBTITLE_INTERVAL_MS)
+            for line in range(
+                first_line,
+                (cluster_timestamp + CLUSTER_DURATION_MS - 1) // SUBTITLE_INTERVAL_MS
+                + 1,
+            ):
+                relative = line * SUBTITLE_INTERVAL_MS - cluster_timestamp
+                frames.append((relative + 1, 3, f"Line {line}\nSecond row".encode()))
+                frames.append(
+                    (
+                        relative + 2,
+                        4,
+                        zlib.compress(
+                            f"{line},0,Default,,0,0,0,,ASS line {line}".encode()
+                        ),
+                    )
+                )
+
+            for relative, track_number, payload in sorted(
+                frames, key=lambda frame: frame[:2]
+            ):
+                block = _block(track_number, relative, payload, keyframe=relative == 0)
+                if track_number < 3:
+                    body += _element(0xA3, block)
+                    continue
+
+                frame_counts[track_number] += 1
+                if (
+                    not cued_subtitle_ms
+                    or cluster_timestamp + relative < cued_subtitle_ms
+                ):
+                    cue_points.append(
+                        (
+                            cluster_timestamp + relative,
+                            track_number,
+                            cluster_position,
+                            len(body),
+                        )
+                    )
+                body += _element(
+                    0xA0, _element(0xA1, block) + _uint(0x9B, SUBTITLE_DURATION_MS)
+                )
+
+            file.write(_element(0x1F43B675, body, size_length=8))
+
+        cues_position = file.tell() - segment_data_offset
+        file.write(
+            _element(
+                0x1C53BB6B,
+                b"".join(
+                    _element(
+                        0xBB,
+                        _uint(0xB3, timestamp)
+                        + _element(
+                            0xB7,
+                            _uint(0xF7, track_number)
+                            + _uint(0xF1, position)
+                            + _uint(0xF0, relative_position),
+                        ),
+                    )
+                    for timestamp, track_number, position, relative_position in cue_points
+                ),
+            )
+        )
+
+        tags_position = 0
+        if statistics_tags:
+            tags_position = file.tell() - segment_data_offset
+            file.write(
+                _element(
+                    0x1254C367,
+                    b"".join(
+                        _element(
+                            0x7373,
+                            _element(
+                                0x63C0, _uint(0x68CA, 50) + _uint(0x63C5, track_number)
+                            )
+                            + _element(
+                                0x67C8,
+                                _string(0x45A3, "NUMBER_OF_FRAMES")
+                                + _string(0x4487, str(frame_count)),
+                            ),
+                        )
+                        for track_number, frame_count in frame_counts.items()
+                    ),
+                )
+            )
+
+        segment_size = file.tell() - segment_data_offset
+        file.seek(segment_data_offset - 8)
+        file.write(_encode_size(segment_size, 8))
+        file.write(seek_head(cues_position, tags_position))
+
+        return file.seek(0, os.SEEK_END)
+
+
+def evict_from_page_cache(path: str) -> None:
+    file_descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+        os.posix_fadvise(file_descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(file_descriptor)
+
+
+def measure_native(path: str, outputs) -> tuple:
+    evict_from_page_cache(path)
+    read_blocks = resource.getrusage(resource.RUSAGE_SELF).ru_inblock
+    started = time.perf_counter()
+
+    NativeMkvExtractor(fallback_extractor=MkvextractExtractor()).extract_tracks(
+        absolute_path=path, outputs=outputs
+    )
+
+    elapsed = time.perf_counter() - started
+    return (
+        elapsed,
+        (resource.getrusage(resource.RUSAGE_SELF).ru_inblock - read_blocks) * 512,
+    )
+
+
+def measure_command(path: str, args) -> tuple:
+    evict_from_page_cache(path)
+    started = time.perf_counter()
+
+    process = subprocess.Popen(
+        args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+
+    elapsed = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) > 1:
+        raise RuntimeError(f"{args[0]} failed")
+    return elapsed, usage.ru_inblock * 512
+
+
+def read_text(path: str) -> str:
+    with open(path, encoding="utf-8-sig") as file:
+        return file.read().replace("\r\n", "\n").strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=24)
+    parser.add_argument("--video_kbps", type=int, default=3000)
+    parser.add_argument(
+        "--path",
+        type=str,
+        default=None,
+        help="directory to create the synthetic mkv in (e.g. a network mount)",
+    )
+    args = parser.parse_args()
+
+    work_path = tempfile.mkdtemp(dir=args.path)
+
+    try:
+        mkv_path = os.path.join(work_path, "synthetic.mkv")
+        size = create_synthetic_mkv(
+            path=mkv_path, minutes=args.minutes, video_kbps=args.video_kbps
+        )
+        print(f"synthetic mkv       : {size / 1024 / 1024:.1f} MiB in {mkv_path}")
+
+        subtitle_tracks = [
+            track for track in read_tracks(mkv_path) if track.track_type == "subtitles"
+        ]
+        native_outputs = [
+            (
+                track,
+                os.path.join(
+                    work_path,
+                    f"native.{track.track_id}.{'srt' if track.codec_id == 'S_TEXT/UTF8' else 'ass'}",
+                ),
+            )
+            for track in subtitle_tracks
+        ]
+
+        elapsed, read_bytes = measure_native(path=mkv_path, outputs=native_outputs)
+        print(
+            f"native extractor    : {elapsed:.3f} s, {read_bytes / 1024 / 1024:.2f} MiB read from disk"
+        )
+
+        elapsed, read_bytes = measure_command(path=mkv_path, args=["cat", mkv_path])
+        print(
+            f"full sequential read: {elapsed:.3f} s, {read_bytes / 1024 / 1024:.2f} MiB read from disk (lower bound of mkvextract)"
+        )
+
+        if not shutil.which("mkvextract"):
+            print("mkvextract          : not found, skipped")
+            return
+
+        mkvextract_outputs = [
+            (track, output_path.replace("native.", "mkvextract."))
+            for track, output_path in native_outputs
+        ]
+        elapsed, read_bytes = measure_command(
+            path=mkv_path,
+            args=["mkvextract", mkv_path, "tracks"]
+            + [
+                f"{track.track_id}:{output_path}"
+                for track, output_path in mkvextract_outputs
+            ],
+        )
+        print(
+            f"mkvextract          : {elapsed:.3f} s, {read_bytes / 1024 / 1024:.2f} MiB read from disk"
+        )
+
+        for (_, native_path), (_, mkvextract_path) in zip(
+            native_outputs, mkvextract_outputs
+        ):
+            print(
+                f"identical output    : {os.path.basename(native_path)} {read_text(native_path) == read_text(mkvextract_path)}"
+            )
+    finally:
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
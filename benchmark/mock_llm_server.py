@@ -0,0 +1,202 @@
+import re
+import json
+import time
+import random
+import threading
+from typing import Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in for a local OpenAI compatible server (ollama, llama.cpp, vLLM) answering /v1/chat/completions.
+# Replies translate each "#N / Original> / Translation>" line of the llm-subtrans prompt into "[KO] <original>".
+# Generation speed, failed requests and a context limit (replies cut with finish_reason "length") can be simulated.
+
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+PROMPT_LINE = re.compile(r"#(\d+)\s*\nOriginal>\s*\n(.*?)\n+Translation>", re.DOTALL)
+
+
+class MockLlmServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        failure_rate: float = 0.0,
+        context_tokens: int = 0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        """Seconds spent on each request before answering."""
+        self.tokens_per_second = tokens_per_second
+        """Reply tokens generated per second on top of latency, 0 for instant replies."""
+        self.failure_rate = failure_rate
+        """Share of requests answered with an HTTP 500."""
+        self.context_tokens = context_tokens
+        """Replies beyond prompt + reply tokens are cut, 0 for no limit."""
+        self.requests = 0
+        self.failures = 0
+        self.truncations = 0
+        self.connections = 0
+        self.latencies = []
+        """Seconds spent on each request."""
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _create_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLlmServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.truncations = 0
+            self.connections = 0
+            self.latencies = []
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def complete(self, request: dict) -> Tuple[int, dict]:
+        """Returns (HTTP status, body)."""
+        started = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.failure_rate
+
+        if failed:
+            time.sleep(self.latency)
+            with self._lock:
+                self.failures += 1
+                self.latencies.append(time.perf_counter() - started)
+            return 500, {
+                "error": {"message": "injected failure", "type": "server_error"}
+            }
+
+        prompt = "\n".join(
+            message.get("content") or ""
+            for message in request.get("messages", [])
+            if message.get("role") == "user"
+        ) or request.get("prompt", "")
+        prompt_tokens = len(prompt) // 4
+        content = translate_prompt(prompt=prompt)
+        finish_reason = "stop"
+
+        if (
+            self.context_tokens
+            and prompt_tokens + len(content) // 4 > self.context_tokens
+        ):
+            content = content[: max(0, self.context_tokens - prompt_tokens) * 4]
+            finish_reason = "length"
+
+        generation = (
+            len(content) // 4 / self.tokens_per_second
+            if self.tokens_per_second
+            else 0.0
+        )
+        time.sleep(self.latency + generation)
+
+        with self._lock:
+            if finish_reason == "length":
+                self.truncations += 1
+            self.latencies.append(time.perf_counter() - started)
+
+        return 200, _create_completion(
+            model=request.get("model", "mock"),
+            content=content,
+            prompt_tokens=prompt_tokens,
+            finish_reason=finish_reason,
+        )
+
+
+def translate_prompt(prompt: str) -> str:
+    return (
+        "\n\n".join(
+            f"#{number}\nOriginal>\n{original.strip()}\nTranslation>\n[KO] {original.strip()}"
+            for number, original in PROMPT_LINE.findall(prompt)
+        )
+        + "\n"
+    )
+
+
+def _create_completion(
+    model: str, content: str, prompt_tokens: int, finish_reason: str = "stop"
+) -> dict:
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+def _create_handler(mock_server: MockLlmServer):
+    class Handler(BaseHTTPRequestHandler):
+        # keep-alive, a client reusing its connection is counted once
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            mock_server.count_connection()
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._reply(status=400, body={"error": {"message": "invalid json"}})
+                return
+
+            if not self.path.rstrip("/").endswith(
+                ("/chat/completions", "/completions")
+            ):
+                self._reply(
+                    status=404, body={"error": {"message": f"unknown path {self.path}"}}
+                )
+                return
+
+            status, body = mock_server.complete(request=request)
+            self._reply(status=status, body=body)
+
+        def do_GET(self) -> None:
+            # model listing, which some clients query first
+            self._reply(
+                status=200,
+                body={"object": "list", "data": [{"id": "mock", "object": "model"}]},
+            )
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,107 @@
+import os
+import time
+import argparse
+import tracemalloc
+
+from src.model.file import File
+from src.model.folder import Folder
+from src.constants import FileType
+
+# Run from the project root : python -m benchmark.model_benchmark
+
+FILE_TYPES = [
+    ("mkv", FileType.MEDIA),
+    ("srt", FileType.SUBTITLE),
+    ("nfo", FileType.NFO),
+    ("jpg", FileType.EXTRA),
+]
+
+
+def build_tree(files: int, seasons: int, episodes: int) -> Folder:
+    """Build an in-memory library of show/season/episode folders without touching the disk."""
+    root = Folder(absolute_path=os.path.join(os.sep, "library", "root"))
+    created = 0
+    show_index = 0
+
+    while created < files:
+        show = Folder(
+            absolute_path=os.path.join(root.get_absolute_path(), f"Show {show_index}")
+        )
+        show_index += 1
+
+        for season_index in range(1, seasons + 1):
+            season = Folder(
+                absolute_path=os.path.join(
+                    show.get_absolute_path(), f"Season {season_index}"
+                )
+            )
+
+            for episode_index in range(1, episodes + 1):
+                extension, file_type = FILE_TYPES[episode_index % len(FILE_TYPES)]
+                season.append_struct(
+                    File(
+                        absolute_path=os.path.join(
+                            season.get_absolute_path(),
+                            f"Show {show_index} - {episode_index}.{extension}",
+                        ),
+                        file_type=file_type,
+                    )
+                )
+                created += 1
+
+            show.append_struct(season)
+
+            if created >= files:
+                break
+
+        root.append_struct(show)
+
+    return root
+
+
+def traverse(folder: Folder) -> int:
+    """Walk the tree the way analyzers and the executor do, through get_folders/get_files."""
+    count = 0
+
+    for file in folder.get_files():
+        if file.get_file_type() == FileType.MEDIA:
+            count += 1
+
+    for child in folder.get_folders():
+        count += traverse(child)
+
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1000000)
+    parser.add_argument("--seasons", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=25)
+    parser.add_argument("--traversals", type=int, default=10)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    root = build_tree(files=args.files, seasons=args.seasons, episodes=args.episodes)
+    build_elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"files               : {args.files}")
+    print(f"build               : {build_elapsed:.3f} s")
+    print(f"tree memory         : {current / 1024 / 1024:.1f} MiB")
+    print(f"peak memory         : {peak / 1024 / 1024:.1f} MiB")
+    print(f"bytes per file      : {current / args.files:.0f}")
+
+    started = time.perf_counter()
+    for _ in range(args.traversals):
+        media_files = traverse(root)
+    traverse_elapsed = (time.perf_counter() - started) / args.traversals
+
+    print(f"traversal           : {traverse_elapsed:.3f} s ({media_files} media files)")
+    print(f"traversal rate      : {args.files / traverse_elapsed / 1e6:.2f} M files/s")
+
+
+if __name__ == "__main__":
+    main()
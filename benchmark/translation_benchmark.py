@@ -0,0 +1,305 @@
+import os
+import sys
+import math
+import time
+import shutil
+import argparse
+import tempfile
+from typing import List, NamedTuple, Optional
+from loguru import logger
+
+from src.constants import FileType
+from src.env_configs import EnvConfigs
+from src.model.file import File
+from src.translator.subtitle_translator import SubtitleTranslator
+from src.translator.translation_executor import TranslationExecutor
+from src.translator.translation_memory import TranslationMemory
+from src.translator.translator_service import TranslatorService
+from benchmark.mock_llm_server import MockLlmServer
+from benchmark.translator_service_benchmark import create_env_configs
+
+# Run from the project root : python -m benchmark.translation_benchmark
+# Translates a synthetic season of SRT episodes against the mock server, file by file with translate_subtitle
+# as before, then through the TranslationExecutor, to compare batching, concurrency and caching changes offline.
+
+
+class Result(NamedTuple):
+    elapsed: float
+    files: int
+    untranslated_files: int
+    requests: int
+    failed_requests: int
+    truncated_replies: int
+    file_latencies: List[float]
+    request_latencies: List[float]
+
+
+def create_season_corpus(
+    path: str, episodes: int, lines: int, repeated_lines: int
+) -> List[File]:
+    """Episodes sharing repeated_lines lines (OP / ED lyrics), the other lines are distinct."""
+    opening_lines = [f"Opening lyric {index}" for index in range(repeated_lines // 2)]
+    ending_lines = [
+        f"Ending lyric {index}" for index in range(repeated_lines - len(opening_lines))
+    ]
+
+    files = []
+    for episode in range(1, episodes + 1):
+        dialogue_lines = [
+            f"Episode {episode} says line {index} to the others"
+            for index in range(max(0, lines - repeated_lines))
+        ]
+        file_path = os.path.join(path, f"Show - {episode:02}.srt")
+        with open(file_path, "w", encoding="utf-8") as file:
+            for index, text in enumerate(opening_lines + dialogue_lines + ending_lines):
+                start = index * 3
+                file.write(
+                    f"{index + 1}\n{start // 3600:02}:{start // 60 % 60:02}:{start % 60:02},000 --> "
+                    f"{start // 3600:02}:{start // 60 % 60:02}:{start % 60:02},900\n{text}\n\n"
+                )
+        files.append(File(absolute_path=file_path, file_type=FileType.SUBTITLE))
+    return files
+
+
+def run_translate_subtitle(
+    server: MockLlmServer, env_configs: EnvConfigs, files: List[File]
+) -> Result:
+    """One file after the other, each sent as a whole."""
+    subtitle_translator = SubtitleTranslator(
+        env_configs=env_configs,
+        translator_service=TranslatorService(env_configs=env_configs),
+    )
+    server.reset()
+    started = time.perf_counter()
+
+    file_latencies = []
+    translated_paths = []
+    for file in files:
+        file_started = time.perf_counter()
+        translated_paths.append(
+            subtitle_translator.translate_subtitle(subtitle_file=file)
+        )
+        file_latencies.append(time.perf_counter() - file_started)
+
+    return _create_result(
+        server=server,
+        started=started,
+        files=files,
+        translated_paths=translated_paths,
+        file_latencies=file_latencies,
+    )
+
+
+def run_executor(
+    server: MockLlmServer,
+    env_configs: EnvConfigs,
+    files: List[File],
+    season: bool,
+    memory_path: Optional[str] = None,
+) -> Result:
+    """TRANSLATION_MAX_IN_FLIGHT files at once, a season sends its repeated lines once."""
+    translation_memory = (
+        TranslationMemory(memory_path=memory_path) if memory_path else None
+    )
+    translation_executor = TranslationExecutor(
+        env_configs=env_configs,
+        subtitle_translator=SubtitleTranslator(
+            env_configs=env_configs,
+            translator_service=TranslatorService(env_configs=env_configs),
+            translation_memory=translation_memory,
+        ),
+    )
+    server.reset()
+    started = time.perf_counter()
+
+    # latency of a file : from the submission of the season to its translation
+    file_latencies = []
+    if season:
+        translations = translation_executor.submit_season(subtitle_files=files)
+    else:
+        translations = [
+            translation_executor.submit(subtitle_file=file) for file in files
+        ]
+    for translation in translations:
+        translation.add_done_callback(
+            lambda _: file_latencies.append(time.perf_counter() - started)
+        )
+
+    try:
+        translated_paths = [translation.result() for translation in translations]
+    finally:
+        translation_executor.close()
+        if translation_memory:
+            translation_memory.close()
+
+    return _create_result(
+        server=server,
+        started=started,
+        files=files,
+        translated_paths=translated_paths,
+        file_latencies=file_latencies,
+    )
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def _create_result(
+    server: MockLlmServer,
+    started: float,
+    files: List[File],
+    translated_paths: List[str],
+    file_latencies: List[float],
+) -> Result:
+    return Result(
+        elapsed=time.perf_counter() - started,
+        files=len(files),
+        untranslated_files=sum(
+            1
+            for file, path in zip(files, translated_paths)
+            if path == file.get_absolute_path()
+        ),
+        requests=server.requests,
+        failed_requests=server.failures,
+        truncated_replies=server.truncations,
+        file_latencies=file_latencies,
+        request_latencies=list(server.latencies),
+    )
+
+
+def _print_result(name: str, result: Result) -> None:
+    print(
+        f"{name:<24}: {result.files / result.elapsed * 60:7.1f} files/min, "
+        f"{result.requests:4} requests ({result.failed_requests} failed, {result.truncated_replies} truncated), "
+        f"file p50/p95 {percentile(result.file_latencies, 0.5):.2f}/{percentile(result.file_latencies, 0.95):.2f} s, "
+        f"request p50/p95 {percentile(result.request_latencies, 0.5):.2f}/{percentile(result.request_latencies, 0.95):.2f} s, "
+        f"{result.untranslated_files} untranslated"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=12)
+    parser.add_argument("--lines", type=int, default=200, help="cues per episode")
+    parser.add_argument(
+        "--repeated_lines",
+        type=int,
+        default=40,
+        help="cues shared by every episode (OP / ED)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.1,
+        help="seconds per request of the mock server",
+    )
+    parser.add_argument(
+        "--tokens_per_second",
+        type=float,
+        default=2000,
+        help="reply tokens per second, 0 for instant",
+    )
+    parser.add_argument(
+        "--failure_rate",
+        type=float,
+        default=0.0,
+        help="share of requests failed with HTTP 500",
+    )
+    parser.add_argument(
+        "--context_tokens",
+        type=int,
+        default=0,
+        help="context limit of the mock server, 0 for none",
+    )
+    parser.add_argument(
+        "--in_flight", type=int, default=2, help="TRANSLATION_MAX_IN_FLIGHT"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import scripts.subtrans_common  # noqa: F401
+        import PySubtrans  # noqa: F401
+    except ImportError as e:
+        print(f"llm-subtrans is not installed ({e}), skipped")
+        return
+
+    # failed files are counted in the results, their errors would bury them
+    logger.remove()
+    logger.add(sys.stderr, level="CRITICAL")
+
+    work_path = tempfile.mkdtemp()
+    server = MockLlmServer(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        failure_rate=args.failure_rate,
+        context_tokens=args.context_tokens,
+        seed=args.seed,
+    ).start()
+
+    env_configs = create_env_configs(server_address=server.address)
+    env_configs._TRANSLATION_MAX_IN_FLIGHT = args.in_flight
+    if args.context_tokens:
+        env_configs._TRANSLATION_CONTEXT_TOKENS = args.context_tokens
+
+    try:
+        files = create_season_corpus(
+            path=work_path,
+            episodes=args.episodes,
+            lines=args.lines,
+            repeated_lines=args.repeated_lines,
+        )
+        memory_path = os.path.join(work_path, "translation_memory.sqlite")
+        print(
+            f"corpus                  : {args.episodes} episodes x {args.lines} lines ({args.repeated_lines} repeated), "
+            f"mock {args.latency * 1000:.0f} ms + {args.tokens_per_second:.0f} tokens/s, "
+            f"{args.failure_rate:.0%} failures, {args.in_flight} in flight"
+        )
+
+        _print_result(
+            "translate_subtitle",
+            run_translate_subtitle(server=server, env_configs=env_configs, files=files),
+        )
+        _print_result(
+            "executor, per file",
+            run_executor(
+                server=server, env_configs=env_configs, files=files, season=False
+            ),
+        )
+        _print_result(
+            "executor, season",
+            run_executor(
+                server=server, env_configs=env_configs, files=files, season=True
+            ),
+        )
+        _print_result(
+            "season, cold memory",
+            run_executor(
+                server=server,
+                env_configs=env_configs,
+                files=files,
+                season=True,
+                memory_path=memory_path,
+            ),
+        )
+        _print_result(
+            "season, warm memory",
+            run_executor(
+                server=server,
+                env_configs=env_configs,
+                files=files,
+                season=True,
+                memory_path=memory_path,
+            ),
+        )
+    finally:
+        server.stop()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from loguru import logger
+
+from src.env_configs import EnvConfigs
+from src.translator.translator_service import TranslatorService
+from benchmark.mock_llm_server import MockLlmServer, CHAT_COMPLETIONS_PATH
+
+# Run from the project root : python -m benchmark.translator_service_benchmark
+# Compares a translator set up for every file, as before, with one TranslatorService kept for the run.
+
+
+def create_srt_corpus(path: str, files: int, lines: int) -> list:
+    paths = []
+    for episode in range(1, files + 1):
+        file_path = os.path.join(path, f"Episode {episode:02}.srt")
+        with open(file_path, "w", encoding="utf-8") as file:
+            for index in range(lines):
+                start = index * 3
+                file.write(
+                    f"{index + 1}\n00:{start // 60:02}:{start % 60:02},000 --> 00:{start // 60:02}:{start % 60:02},900\n"
+                    f"Episode {episode} line {index}\n\n"
+                )
+        paths.append(file_path)
+    return paths
+
+
+def create_env_configs(server_address: str) -> EnvConfigs:
+    env_configs = EnvConfigs()
+    env_configs.ENABLE_SUBTITLE_TRANSLATION = True
+    env_configs.TRANSLATION_TARGET_LANGUAGE = "Korean"
+    env_configs.TRANSLATION_SERVER_ADDRESS = server_address
+    env_configs.TRANSLATION_ENDPOINT = CHAT_COMPLETIONS_PATH
+    env_configs.TRANSLATION_API_KEY = ""
+    env_configs.TRANSLATION_MODEL = "mock"
+    return env_configs
+
+
+def run(server: MockLlmServer, paths: list, service_per_file: bool) -> tuple:
+    env_configs = create_env_configs(server_address=server.address)
+    server.reset()
+    started = time.perf_counter()
+
+    service = TranslatorService(env_configs=env_configs)
+    for path in paths:
+        if service_per_file:
+            service = TranslatorService(env_configs=env_configs)
+        service.translate_file(
+            input_path=path, output_path=path.replace(".srt", ".ko.srt")
+        )
+
+    return time.perf_counter() - started, server.requests, server.connections
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--lines", type=int, default=80)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="seconds per request of the mock server",
+    )
+    args = parser.parse_args()
+
+    try:
+        import scripts.subtrans_common  # noqa: F401
+        import PySubtrans  # noqa: F401
+    except ImportError as e:
+        print(f"llm-subtrans is not installed ({e}), skipped")
+        return
+
+    # one line per translated file would bury the results
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    work_path = tempfile.mkdtemp()
+    server = MockLlmServer(latency=args.latency).start()
+
+    try:
+        paths = create_srt_corpus(path=work_path, files=args.files, lines=args.lines)
+        print(
+            f"corpus              : {args.files} files x {args.lines} lines, mock latency {args.latency * 1000:.0f} ms"
+        )
+
+        for name, service_per_file in (
+            ("setup per file", True),
+            ("shared service", False),
+        ):
+            elapsed, requests, connections = run(
+                server=server, paths=paths, service_per_file=service_per_file
+            )
+            print(
+                f"{name:<20}: {elapsed:.2f} s, {elapsed / len(paths) * 1000:.0f} ms per file, "
+                f"{requests} requests, {connections} TCP connections"
+            )
+    finally:
+        server.stop()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,16 @@
 from loguru import logger
 
-from src.handler import Handler
-from src.constructor.constructor import GeneralConstructor
-from src.analyzer.media_type_analyzer import GeneralMediaTypeAnalyzer
-from src.analyzer.media_analyzer_factory import MediaAnalyzerFactory
-from src.analyzer.metadata_reader import GenearlMetadataReader
-from src.restructor.restructor_factory import RestructorFactory
-from src.restructor.subtitle_extractor import GeneralSubtitleExtractor
-from src.log_exporter import LogExporter
+from src.handler_factory import HandlerFactory
+from src.media_worker_pool import MediaWorkerPool
+from src.plan.plan_executor import PlanApplier
 from src.executor.executor import GeneralExecutor
+from src.log_exporter import LogExporter
 from src.env_configs import EnvConfigs
 from src.constants import Log
 from src.arguments import ArgumentParser
+from src.watcher.watcher import create_watcher
+from src.process_runner import log_summary
+from src.translator import translation_statistics
 
 
 if __name__ == "__main__":
@@ -24,28 +23,42 @@ if __name__ == "__main__":
     if env_configs._EXPORT_DEBUG_LOG_FILE:
         logger.add(Log.LOG_FILE_NAME, rotation=Log.LOG_FILE_ROTATION)
 
-    constructor = GeneralConstructor(env_configs=env_configs)
-    log_exporter = LogExporter()
-    post_log_exporter = LogExporter()
-
-    handler = Handler(
-        constructor=constructor,
-        media_type_analyzer=GeneralMediaTypeAnalyzer(
-            env_configs=env_configs, metadata_reader=GenearlMetadataReader()
-        ),
-        media_analyzer_factory=MediaAnalyzerFactory(
-            env_configs=env_configs, log_exporter=log_exporter
-        ),
-        restructor_factory=RestructorFactory(
-            env_configs=env_configs,
-            subtitle_extractor=GeneralSubtitleExtractor(constrcutor=constructor),
-            arguments=arguments,
+    if arguments.apply:
+        log_exporter = LogExporter()
+        PlanApplier(
             log_exporter=log_exporter,
-        ),
-        executor=GeneralExecutor(log_exporter=post_log_exporter),
-        log_exporter=post_log_exporter,
-    )
-
-    handler.process(
-        arguments=arguments,
-    )
+            executor=GeneralExecutor(log_exporter=log_exporter),
+        ).apply(plan_path=arguments.plan_path)
+    elif arguments.multiple and arguments.jobs > 1:
+        MediaWorkerPool(
+            env_configs=env_configs,
+            jobs=arguments.jobs,
+            max_tasks_per_child=env_configs._WORKER_MAX_TASKS,
+        ).process(arguments=arguments)
+
+        if env_configs._TRANSLATION_QUEUE_PATH:
+            # runs the translations queued by the workers until the queue is empty
+            HandlerFactory(env_configs=env_configs).close()
+    else:
+        handler_factory = HandlerFactory(env_configs=env_configs)
+        handler = handler_factory.create(arguments=arguments)
+
+        if arguments.watch:
+            handler.watch(
+                arguments=arguments,
+                watcher=create_watcher(
+                    source_path=arguments.source_path,
+                    poll_interval=env_configs._WATCH_POLL_INTERVAL,
+                    use_inotify=env_configs._WATCH_USE_INOTIFY,
+                ),
+                settle_seconds=env_configs._WATCH_SETTLE_SECONDS,
+            )
+        else:
+            handler.process(
+                arguments=arguments,
+            )
+
+        handler_factory.close()
+
+    log_summary()
+    translation_statistics.log_summary()
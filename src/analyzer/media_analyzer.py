@@ -102,7 +102,8 @@ class GeneralMediaAnalyzer(MediaAnalyzer):
 
         if not media_files:
             for child in root.get_folders():
-                media_files.extend(self._get_media_files(child))
+                if child.get_total_number_of_files_by_type(file_type=FileType.MEDIA):
+                    media_files.extend(self._get_media_files(child))
 
         return media_files
 
@@ -128,8 +129,8 @@ class GeneralMediaAnalyzer(MediaAnalyzer):
         if root.contains_subtitle_file():
             return self._get_subtitle_file(folder=root)
 
-        for elem in root.get_structs():
-            if isinstance(elem, Folder):
+        if root.contains_subtitle_file_recursively():
+            for elem in root.get_folders():
                 if elem.contains_subtitle_file():
                     return self._get_subtitle_file(folder=elem)
 
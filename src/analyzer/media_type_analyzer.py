@@ -49,7 +49,9 @@ class GeneralMediaTypeAnalyzer(MediaTypeAnalyzer):
         return self._analyze_media_type(root=root)
 
     def _analyze_media_type(self, root: Folder) -> MediaType:
-        total_count_of_media_file = self._count_media_files_recursively(root=root)
+        total_count_of_media_file = root.get_total_number_of_files_by_type(
+            file_type=FileType.MEDIA
+        )
 
         if total_count_of_media_file <= 0:
             logger.warning(f"No media file found in {root.get_absolute_path()}")
@@ -58,11 +60,3 @@ class GeneralMediaTypeAnalyzer(MediaTypeAnalyzer):
             return MediaType.MOVIE
 
         return MediaType.TV
-
-    def _count_media_files_recursively(self, root: Folder) -> int:
-        media_file_count = root.get_number_of_files_by_type(file_type=FileType.MEDIA)
-
-        for folder in root.get_folders():
-            media_file_count += self._count_media_files_recursively(folder)
-
-        return media_file_count
@@ -1,133 +1,317 @@
 import os
-
-from typing import List, Iterable, Optional
+import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
-from pymkv import MKVFile, MKVTrack
 
 from src.model.file import File
 from src.model.structable import Structable
 from src.constants import Extensions, FileType
 from src.env_configs import EnvConfigs
 from src.log_exporter import LogExporter
+from src.mkv.mkv_probe import MkvProbe
+from src.mkv.mkv_track import MkvTrack
+from src.mkv.mkv_extractor import MkvExtractor
+from src.mkv.device_limiter import DeviceLimiter
+from src.mp4 import mp4_reader
+from src.mp4.errors import Mp4ReadException
+from src.translator.translation_executor import TranslationExecutor
+from src.translator.translation_queue import TranslationQueue
 
 
 class MkvSubtitleExtractor:
-    def __init__(self, env_configs: EnvConfigs, log_exporter: LogExporter) -> None:
+    def __init__(
+        self,
+        env_configs: EnvConfigs,
+        log_exporter: LogExporter,
+        mkv_probe: MkvProbe,
+        mkv_extractor: MkvExtractor,
+        translation_executor: Optional[TranslationExecutor],
+        translation_queue: Optional[TranslationQueue] = None,
+        output_path: Optional[str] = None,
+    ) -> None:
+        """With output_path, subtitles are extracted into that directory instead of next to the media files,
+        e.g. while planning."""
         self._env_configs = env_configs
         self._log_exporter = log_exporter
+        self._mkv_probe = mkv_probe
+        self._mkv_extractor = mkv_extractor
+        self._translation_executor = translation_executor
+        self._translation_queue = translation_queue
+        self._output_path = output_path
+        self._device_limiter = DeviceLimiter(
+            limit_per_device=env_configs._MKV_EXTRACTION_PER_DEVICE
+        )
 
     def extract_subtitle_file_from_mkv(
         self, media_files: List[File], subtitles: List[Structable]
     ) -> List[Structable]:
-        """Try to extract subtitle from mkv file when subtitle file not found for a specific media file."""
+        """Try to extract subtitle from mkv (or mp4) file when subtitle file not found for a specific media file."""
         extracted_subtitles = []
-        mkv_file_cnt = 0
+        mkv_files = [
+            media_file
+            for media_file in media_files
+            if media_file.get_extension() in (Extensions.MKV, Extensions.MP4)
+        ]
+        mkv_file_cnt = len(mkv_files)
 
-        for media_file in media_files:
-            if media_file.get_extension() != Extensions.MKV:
-                continue
+        for media_file in mkv_files:
             logger.info(
-                f"Extracting subtitle file from mkv media file {media_file.get_absolute_path()}",
+                f"Extracting subtitle file from {media_file.get_extension()} media file {media_file.get_absolute_path()}",
             )
 
-            mkv_file_cnt += 1
+        extraction_results = list(
+            zip(mkv_files, self._extract_from_mkv_files(mkv_files=mkv_files))
+        )
+        translations = self._submit_fallback_translations(
+            extraction_results=extraction_results
+        )
+
+        # translation and logs follow the order of media_files whatever order the extractions finish in
+        for media_file, extracted_files in extraction_results:
+            for extracted_file, is_fallback in extracted_files:
+                if is_fallback:
+                    extracted_file = self._translate_fallback_subtitle(
+                        extracted_file=extracted_file,
+                        translation=translations.get(
+                            extracted_file.get_absolute_path()
+                        ),
+                    )
+
+                extracted_subtitles.append(extracted_file)
+
+                self._log_exporter.append_log(
+                    f"[EXTRACTED] New Subtitle extracted from {media_file.get_absolute_path()}, subtitle {extracted_file.get_absolute_path()} created.",
+                    silent=False,
+                )
 
-            mkv_file = MKVFile(
-                media_file.get_absolute_path(),
+        if len(extracted_subtitles) == 0:
+            self._log_exporter.append_log(
+                f"[EXTRACTED] No subtitle extracted from mkv files(mkv_file_cnt={mkv_file_cnt})",
+                silent=False,
             )
-            tracks = mkv_file.get_track()
-            if not isinstance(tracks, Iterable):
-                raise Exception("MKV File's tracks are not iterable")
+            return subtitles + extracted_subtitles
 
-            # First pass: try to find primary language track
-            target_track = None
-            is_fallback = False
+        logger.info(
+            f"Total {len(extracted_subtitles)} subtitle files extracted from mkv files",
+        )
 
-            for track in tracks:
-                if self._validate_subtitle_track(track=track, lang=self._env_configs.MKV_SUBTITLE_EXTRACTION_LANGUAGE):
-                    target_track = track
-                    break
-            
-            # Second pass: try to find fallback language track if primary not found
-            fallback_langs = getattr(self._env_configs, "MKV_SUBTITLE_FALLBACK_LANGUAGE", [])
-            if not isinstance(fallback_langs, list):
-                fallback_langs = [fallback_langs]
-
-            if not target_track and fallback_langs:
-                for fallback_lang in fallback_langs:
-                    for track in tracks:
-                        if self._validate_subtitle_track(track=track, lang=fallback_lang):
-                            target_track = track
-                            is_fallback = True
-                            break
-                    if target_track:
-                        break
-            
-            if not target_track:
-                continue
+        return subtitles + extracted_subtitles
 
-            subtitle_type = self._get_subtitle_type(track_codec=target_track.track_codec)
-            if not subtitle_type:
-                logger.info(
-                    f"""Valid subtitle found, but cannot determine subtitle type (track_codec={target_track.track_codec}).
-                    Skiping extraction for ({media_file.get_absolute_path()})""",
-                )
-                continue
+    def _extract_from_mkv_files(
+        self, mkv_files: List[File]
+    ) -> List[List[Tuple[File, bool]]]:
+        workers = self._env_configs._MKV_EXTRACTION_WORKERS
+        if workers <= 1 or len(mkv_files) <= 1:
+            return [
+                self._extract_from_mkv(media_file=media_file)
+                for media_file in mkv_files
+            ]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._extract_from_mkv, mkv_files))
 
-            new_subtitle_file_path = (
-                f"{media_file.get_absolute_path()}.extractedsub.{subtitle_type}"
+    def _extract_from_mkv(self, media_file: File) -> List[Tuple[File, bool]]:
+        """Returns the extracted files with whether each one is a fallback language subtitle to translate."""
+        tracks = self._get_tracks(media_file=media_file)
+
+        target_track, is_fallback = self._select_subtitle_track(tracks=tracks)
+        if not target_track:
+            return []
+
+        subtitle_type = self._get_subtitle_type(track_codec=target_track.track_codec)
+        if not subtitle_type:
+            logger.info(
+                f"""Valid subtitle found, but cannot determine subtitle type (track_codec={target_track.track_codec}).
+                Skiping extraction for ({media_file.get_absolute_path()})""",
             )
+            return []
 
-            extracted_subtitle_path = target_track.extract()
-            os.rename(extracted_subtitle_path, new_subtitle_file_path)
-            
-            extracted_file = File(
-                absolute_path=new_subtitle_file_path,
-                file_type=FileType.SUBTITLE,
+        extract_all_languages = self._env_configs._MKV_SUBTITLE_EXTRACT_ALL_LANGUAGES
+        wanted_tracks = [(target_track, subtitle_type)]
+        if extract_all_languages:
+            wanted_tracks.extend(
+                self._find_other_wanted_tracks(tracks=tracks, target_track=target_track)
             )
 
-            if is_fallback and getattr(self._env_configs, "ENABLE_SUBTITLE_TRANSLATION", False):
-                from src.translator.subtitle_translator import SubtitleTranslator
-                translator = SubtitleTranslator(env_configs=self._env_configs)
+        output_prefix = self._get_output_prefix(media_file=media_file)
+        outputs = []
+        for track, track_subtitle_type in wanted_tracks:
+            if extract_all_languages:
+                # keep the language in the name, restructors use it as suffix when an episode has several subtitles
+                output_path = f"{output_prefix}.extractedsub.{track.language}.{track_subtitle_type}"
+            else:
+                output_path = f"{output_prefix}.extractedsub.{track_subtitle_type}"
+            outputs.append((track, output_path))
+
+        # every wanted track in a single read of the container
+        with self._device_limiter.limit(absolute_path=media_file.get_absolute_path()):
+            if media_file.get_extension() == Extensions.MP4:
                 try:
-                    translated_path = translator.translate_subtitle(extracted_file)
-                    # Use the translated file for restructuring
-                    extracted_file = File(
-                        absolute_path=translated_path,
-                        file_type=FileType.SUBTITLE,
+                    mp4_reader.write_srt_tracks(
+                        absolute_path=media_file.get_absolute_path(), outputs=outputs
                     )
-                    self._log_exporter.append_log(
-                        f"[TRANSLATED] Fallback subtitle translated and saved to {translated_path}.",
-                        silent=False,
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to translate subtitle {new_subtitle_file_path}: {e}")
-                    self._log_exporter.append_log(
-                        f"[TRANSLATION_FAILED] Failed to translate {new_subtitle_file_path}: {e}",
-                        silent=False,
+                except Mp4ReadException as e:
+                    logger.warning(
+                        f"Failed to read mp4 subtitles of {media_file.get_absolute_path()} ({e}), skipping extraction"
                     )
+                    return []
+            else:
+                self._mkv_extractor.extract_tracks(
+                    absolute_path=media_file.get_absolute_path(), outputs=outputs
+                )
 
-            extracted_subtitles.append(extracted_file)
+        return [
+            (
+                File(absolute_path=output_path, file_type=FileType.SUBTITLE),
+                track is target_track and is_fallback,
+            )
+            for track, output_path in outputs
+        ]
 
-            self._log_exporter.append_log(
-                f"[EXTRACTED] New Subtitle extracted from {media_file.get_absolute_path()}, subtitle {extracted_file.get_absolute_path()} created.",
-                silent=False,
+    def _get_output_prefix(self, media_file: File) -> str:
+        if not self._output_path:
+            return media_file.get_absolute_path()
+
+        # one directory per media folder, episodes of different folders may share a name
+        media_directory_path, media_file_name = os.path.split(
+            media_file.get_absolute_path()
+        )
+        output_directory_path = os.path.join(
+            self._output_path,
+            hashlib.sha1(media_directory_path.encode("utf-8")).hexdigest()[:16],
+        )
+        os.makedirs(output_directory_path, exist_ok=True)
+        return os.path.join(output_directory_path, media_file_name)
+
+    def _get_tracks(self, media_file: File) -> List[MkvTrack]:
+        if media_file.get_extension() != Extensions.MP4:
+            return self._mkv_probe.get_tracks(
+                absolute_path=media_file.get_absolute_path()
             )
 
-        if len(extracted_subtitles) == 0:
-            self._log_exporter.append_log(
-                f"[EXTRACTED] No subtitle extracted from mkv files(mkv_file_cnt={mkv_file_cnt})",
-                silent=False,
+        try:
+            return mp4_reader.read_tracks(absolute_path=media_file.get_absolute_path())
+        except Mp4ReadException as e:
+            logger.warning(
+                f"Failed to read mp4 tracks of {media_file.get_absolute_path()} ({e}), skipping extraction"
             )
-            return subtitles + extracted_subtitles
+            return []
 
-        logger.info(
-            f"Total {len(extracted_subtitles)} subtitle files extracted from mkv files",
+    def _select_subtitle_track(
+        self, tracks: List[MkvTrack]
+    ) -> Tuple[Optional[MkvTrack], bool]:
+        """Returns (track, is_fallback)."""
+        # First pass: try to find primary language track
+        for track in tracks:
+            if self._validate_subtitle_track(
+                track=track, lang=self._env_configs.MKV_SUBTITLE_EXTRACTION_LANGUAGE
+            ):
+                return track, False
+
+        # Second pass: try to find fallback language track if primary not found
+        for fallback_lang in self._get_fallback_languages():
+            for track in tracks:
+                if self._validate_subtitle_track(track=track, lang=fallback_lang):
+                    return track, True
+
+        return None, False
+
+    def _find_other_wanted_tracks(
+        self, tracks: List[MkvTrack], target_track: MkvTrack
+    ) -> List[Tuple[MkvTrack, str]]:
+        """First track of every other wanted language, skipping formats which can not be extracted as text."""
+        wanted_tracks = []
+        languages = [target_track.language]
+
+        for lang in [
+            self._env_configs.MKV_SUBTITLE_EXTRACTION_LANGUAGE
+        ] + self._get_fallback_languages():
+            if lang in languages:
+                continue
+
+            for track in tracks:
+                if not self._validate_subtitle_track(track=track, lang=lang):
+                    continue
+
+                subtitle_type = self._get_subtitle_type(track_codec=track.track_codec)
+                if subtitle_type:
+                    wanted_tracks.append((track, subtitle_type))
+                    languages.append(lang)
+                break
+
+        return wanted_tracks
+
+    def _get_fallback_languages(self) -> List[str]:
+        fallback_langs = getattr(
+            self._env_configs, "MKV_SUBTITLE_FALLBACK_LANGUAGE", []
         )
+        if not isinstance(fallback_langs, list):
+            fallback_langs = [fallback_langs]
+        return fallback_langs
 
-        return subtitles + extracted_subtitles
+    def _submit_fallback_translations(
+        self, extraction_results: List[Tuple[File, List[Tuple[File, bool]]]]
+    ) -> Dict[str, "Future[str]"]:
+        """Queue every fallback subtitle of the folder (a season) at once, lines repeated across episodes are translated once."""
+        if not getattr(self._env_configs, "ENABLE_SUBTITLE_TRANSLATION", False):
+            return {}
 
-    def _validate_subtitle_track(self, track: MKVTrack, lang: str) -> bool:
+        fallback_files = [
+            extracted_file
+            for _, extracted_files in extraction_results
+            for extracted_file, is_fallback in extracted_files
+            if is_fallback
+        ]
+
+        if self._translation_queue:
+            # moved untranslated with the media, the translation replaces them later
+            for fallback_file in fallback_files:
+                self._translation_queue.defer(
+                    subtitle_path=fallback_file.get_absolute_path()
+                )
+                self._log_exporter.append_log(
+                    f"[TRANSLATION_QUEUED] Fallback subtitle {fallback_file.get_absolute_path()} is translated after it is moved.",
+                    silent=False,
+                )
+            return {}
+
+        return {
+            fallback_file.get_absolute_path(): translation
+            for fallback_file, translation in zip(
+                fallback_files,
+                self._translation_executor.submit_season(subtitle_files=fallback_files),
+            )
+        }
+
+    def _translate_fallback_subtitle(
+        self, extracted_file: File, translation: Optional["Future[str]"]
+    ) -> File:
+        if not translation:
+            return extracted_file
+
+        try:
+            translated_path = translation.result()
+            self._log_exporter.append_log(
+                f"[TRANSLATED] Fallback subtitle translated and saved to {translated_path}.",
+                silent=False,
+            )
+            # Use the translated file for restructuring
+            return File(
+                absolute_path=translated_path,
+                file_type=FileType.SUBTITLE,
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to translate subtitle {extracted_file.get_absolute_path()}: {e}"
+            )
+            self._log_exporter.append_log(
+                f"[TRANSLATION_FAILED] Failed to translate {extracted_file.get_absolute_path()}: {e}",
+                silent=False,
+            )
+            return extracted_file
+
+    def _validate_subtitle_track(self, track: MkvTrack, lang: str) -> bool:
         if not self._is_subtitle_track(track=track):
             return False
 
@@ -136,7 +320,7 @@ class MkvSubtitleExtractor:
 
         return True
 
-    def _is_subtitle_track(self, track: MKVTrack) -> bool:
+    def _is_subtitle_track(self, track: MkvTrack) -> bool:
         if not track.track_type:
             return False
         return track.track_type.lower().__contains__("subtitle")
@@ -153,6 +337,9 @@ class MkvSubtitleExtractor:
             subtitle_type = Extensions.ASS
         if track_codec_lower == "subrip/srt" or track_codec_lower.__contains__("srt"):
             subtitle_type = Extensions.SRT
+        # mp4 timed text is converted to srt
+        if track_codec_lower == mp4_reader.TX3G_CODEC_NAME.lower():
+            subtitle_type = Extensions.SRT
 
         if subtitle_type in self._env_configs._SUBTITLE_EXTENSIONS:
             return subtitle_type
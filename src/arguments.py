@@ -11,6 +11,10 @@ class Arguments:
     target_path: str
     multiple: bool
     mkv_audio_language: Optional[str]
+    watch: bool
+    jobs: int
+    plan_path: str
+    apply: bool
 
     def print(self):
         logger.info(f"arguments: {self.__dict__}")
@@ -20,23 +24,42 @@ class ArgumentParser:
     def __init__(self):
         self._parser = argparse.ArgumentParser()
 
-        self._parser.add_argument("source_path", type=str)
-        self._parser.add_argument("--target_path", type=str, default="", required=True)
+        self._parser.add_argument("source_path", type=str, nargs="?", default="")
+        self._parser.add_argument("--target_path", type=str, default="", required=False)
         self._parser.add_argument(
             "--multiple", type=bool, default=False, required=False
         )
         self._parser.add_argument(
             "--mkv_audio_language", type=str, default=None, required=False
         )
+        self._parser.add_argument("--watch", type=bool, default=False, required=False)
+        self._parser.add_argument("--jobs", type=int, default=1, required=False)
+        self._parser.add_argument("--plan_path", type=str, default="", required=False)
+        self._parser.add_argument("--apply", type=bool, default=False, required=False)
 
     def get_arguments(self) -> Arguments:
         raw_args = self._parser.parse_args()
 
+        # applying saved plans needs neither a source nor a target, both are in the plans
+        if raw_args.apply:
+            if not raw_args.plan_path:
+                self._parser.error("--plan_path is required with --apply")
+        elif not (raw_args.source_path and raw_args.target_path):
+            self._parser.error("source_path and --target_path are required")
+
+        # a watch handles one settled folder at a time in this process
+        if raw_args.watch and raw_args.jobs > 1:
+            self._parser.error("--jobs can not be used with --watch")
+
         arguments = Arguments(
             source_path=raw_args.source_path,
             target_path=raw_args.target_path,
             multiple=raw_args.multiple,
             mkv_audio_language=raw_args.mkv_audio_language,
+            watch=raw_args.watch,
+            jobs=raw_args.jobs,
+            plan_path=raw_args.plan_path,
+            apply=raw_args.apply,
         )
 
         arguments.print()
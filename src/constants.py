@@ -9,6 +9,14 @@ class Constants:
     ERROR_LOG_FILENAME = "MAF_Error"
     SUBTITLE_BACKUP_DIRECTORY_NAME = "MAF_SubtitleBackup"
     DEFAULT_PERMISSION_FOR_LOG_FILE = 0o775
+    SCAN_INDEX_RETENTION_SECONDS = 60 * 60 * 24 * 30  # 30 days
+    MKV_CACHE_RETENTION_SECONDS = 60 * 60 * 24 * 30  # 30 days
+    MKV_CACHE_BLOB_GRACE_SECONDS = 60 * 60  # 1 hour
+    AUDIO_TRACK_CHANGE_WORKERS = 8
+    TRANSLATION_QUEUE_MAX_ATTEMPTS = 3
+    TRANSLATION_QUEUE_POLL_SECONDS = 10
+    TRANSLATION_QUEUE_LEASE_SECONDS = 60 * 2  # renewed every poll while translating
+    TRANSLATION_QUEUE_RETENTION_SECONDS = 60 * 60 * 24 * 30  # 30 days
 
 
 class Log:
@@ -16,6 +24,38 @@ class Log:
     LOG_FILE_ROTATION = "50 MB"
 
 
+class ProcessTimeout:
+    """Timeout of an external tool : base seconds + input size / bytes per second (slowest expected storage)."""
+
+    DEFAULT = (60, 1024 * 1024)
+    TOOLS = {
+        # header only tools, the size term covers a slow seek on a network mount
+        "mkvmerge": (60, 100 * 1024 * 1024),
+        "mkvpropedit": (60, 100 * 1024 * 1024),
+        # reads the whole container
+        "mkvextract": (120, 5 * 1024 * 1024),
+        # archives are at most Constants.MAXIMUM_ARCHIVE_SIZE
+        "patool": (60, 1024 * 1024),
+    }
+    KILL_WAIT_SECONDS = 5
+
+
+class TranslationBatch:
+    """Subtitle lines per llm-subtrans request, adapted per translation server and model by AdaptiveBatchSizer."""
+
+    INITIAL = 40
+    MINIMUM = 5
+    MAXIMUM = 200
+    # grown while the tokens per second hold up, halved on an error or a truncated reply
+    GROWTH = 1.25
+    SHRINK = 0.5
+    THROUGHPUT_TOLERANCE = 0.9
+    # prompt and reply of a batch within this share of the context, the rest is left to instructions and summaries
+    CONTEXT_SHARE = 0.5
+    # weight of the newest batch in the moving averages
+    SMOOTHING = 0.3
+
+
 class Extensions:
     TXT = "txt"
     NFO = "nfo"
@@ -24,6 +64,7 @@ class Extensions:
     SRT = "srt"
     ASS = "ass"
     MKV = "mkv"
+    MP4 = "mp4"
 
 
 class MediaType(Enum):
@@ -48,16 +89,32 @@ class DefaultEnvConifgs:
     SUBTITLE_SUFFIX = "ko"
     MKV_SUBTITLE_EXTRACTION_LANGUAGE = "kor"
     MKV_SUBTITLE_FALLBACK_LANGUAGE = '["jpn", "eng"]'
+    MKV_SUBTITLE_EXTRACT_ALL_LANGUAGES = "False"
+    MKV_EXTRACTION_WORKERS = 1
+    MKV_EXTRACTION_PER_DEVICE = 2
+    MKV_CACHE_PATH = ""
     ENABLE_SUBTITLE_TRANSLATION = "True"
     TRANSLATION_TARGET_LANGUAGE = "Korean"
     TRANSLATION_SERVER_ADDRESS = ""
     TRANSLATION_ENDPOINT = ""
     TRANSLATION_API_KEY = ""
     TRANSLATION_MODEL = ""
+    TRANSLATION_MAX_IN_FLIGHT = 2
+    TRANSLATION_MEMORY_PATH = ""
+    TRANSLATION_QUEUE_PATH = ""
+    TRANSLATION_CONTEXT_TOKENS = 8192
+    TRANSLATION_BATCH_PROFILE_PATH = ""
     CONVERT_SMI = "True"
     CONVERT_SMI_EXTENSION = "ass"
     SUBTITLE_EXTENSIONS = '["smi", "ass", "srt"]'
     EXPORT_DEBUG_LOG_FILE = "False"
+    PARALLEL_SCAN_WORKERS = 0
+    SCAN_INDEX_PATH = ""
+    STREAM_PREFETCH = 1
+    WATCH_SETTLE_SECONDS = 60
+    WATCH_POLL_INTERVAL = 10
+    WATCH_USE_INOTIFY = "True"
+    WORKER_MAX_TASKS = 10
 
 
 class SeasonAlias:
@@ -0,0 +1,144 @@
+import os
+import tarfile
+import zipfile
+import threading
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from src.model.file import extract_extension
+from src.constructor.seven_zip_reader import SIGNATURE as SEVEN_ZIP_SIGNATURE
+from src.constructor.seven_zip_reader import list_7z_names
+from src.constants import Constants
+from src.process_runner import run_patool
+
+
+class ArchiveFormat:
+    ZIP = "zip"
+    TAR = "tar"
+    SEVEN_ZIP = "7z"
+    GZIP = "gz"
+    BZIP2 = "bz2"
+    XZ = "xz"
+    OTHER = "other"
+
+
+MAGIC_BYTES: List[Tuple[bytes, str]] = [
+    (b"PK\x03\x04", ArchiveFormat.ZIP),
+    (b"PK\x05\x06", ArchiveFormat.ZIP),
+    (b"PK\x07\x08", ArchiveFormat.ZIP),
+    (SEVEN_ZIP_SIGNATURE, ArchiveFormat.SEVEN_ZIP),
+    (b"\x1f\x8b", ArchiveFormat.GZIP),
+    (b"BZh", ArchiveFormat.BZIP2),
+    (b"\xfd7zXZ\x00", ArchiveFormat.XZ),
+    # formats below can not be listed in-process, patool decides
+    (b"Rar!\x1a\x07", ArchiveFormat.OTHER),
+    (b"MSCF", ArchiveFormat.OTHER),
+    (b"\x60\xea", ArchiveFormat.OTHER),
+]
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b"ustar"
+SNIFF_SIZE = 512
+
+
+def sniff_archive_format(header: bytes) -> Optional[str]:
+    for magic, archive_format in MAGIC_BYTES:
+        if header.startswith(magic):
+            return archive_format
+
+    if header[TAR_MAGIC_OFFSET : TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+        return ArchiveFormat.TAR
+
+    return None
+
+
+class ArchiveSniffer:
+    """Decide whether a file is a subtitle archive from its magic bytes and member names.
+    Only formats which can not be listed in-process (rar, cab, ...) fall back to patool.
+    """
+
+    def __init__(self, subtitle_extensions: List[str]) -> None:
+        self._subtitle_extensions = [
+            extension.lower() for extension in subtitle_extensions
+        ]
+        self._verdicts: Dict[Tuple[str, int, int], bool] = {}
+        self._lock = threading.Lock()
+
+    def is_archived_subtitle(self, absolute_path: str) -> bool:
+        try:
+            stat = os.stat(absolute_path)
+        except FileNotFoundError:
+            logger.warning(f"Archived subtitle not found : {absolute_path}")
+            return False
+
+        cache_key = (absolute_path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            verdict = self._verdicts.get(cache_key)
+        if verdict is not None:
+            return verdict
+
+        verdict = self._is_archived_subtitle(
+            absolute_path=absolute_path, archive_size=stat.st_size
+        )
+
+        with self._lock:
+            self._verdicts[cache_key] = verdict
+        return verdict
+
+    def _is_archived_subtitle(self, absolute_path: str, archive_size: int) -> bool:
+        try:
+            with open(absolute_path, "rb") as file:
+                header = file.read(SNIFF_SIZE)
+
+            archive_format = sniff_archive_format(header=header)
+            if not archive_format:
+                return False
+
+            if archive_size > Constants.MAXIMUM_ARCHIVE_SIZE:
+                logger.warning(f"Too big to extract archive : {archive_size} (byte)")
+                return False
+
+            if archive_format == ArchiveFormat.OTHER:
+                return (
+                    run_patool(
+                        command="test_archive", archive_path=absolute_path
+                    ).returncode
+                    == 0
+                )
+
+            return any(
+                self._is_subtitle_name(name=name)
+                for name in self._list_names(
+                    absolute_path=absolute_path, archive_format=archive_format
+                )
+            )
+        except Exception as e:
+            logger.warning(e)
+            return False
+
+    def _list_names(self, absolute_path: str, archive_format: str) -> List[str]:
+        if archive_format == ArchiveFormat.ZIP:
+            with zipfile.ZipFile(absolute_path) as archive:
+                return archive.namelist()
+
+        if archive_format == ArchiveFormat.SEVEN_ZIP:
+            return list_7z_names(absolute_path=absolute_path)
+
+        try:
+            with tarfile.open(absolute_path) as archive:
+                return archive.getnames()
+        except tarfile.ReadError:
+            if archive_format == ArchiveFormat.TAR:
+                raise
+
+        # single compressed file (e.g. "episode 1.srt.gz"), the member is the file name without the suffix
+        file_name = os.path.basename(absolute_path)
+        return [file_name.rsplit(sep=".", maxsplit=1)[0]]
+
+    def _is_subtitle_name(self, name: str) -> bool:
+        file_name = name.replace("\\", "/").rsplit(sep="/", maxsplit=1)[-1]
+        if "." not in file_name:
+            return False
+
+        return extract_extension(absolute_path=file_name).lower() in (
+            self._subtitle_extensions
+        )
@@ -1,31 +1,16 @@
 import os
+import stat
 from abc import ABCMeta
-from patoolib import test_archive
-from loguru import logger
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
 from src.model.file import File, extract_extension
 from src.model.folder import Folder
+from src.constructor.scan_index import ScanEntry, ScanIndex
+from src.constructor.archive_sniffer import ArchiveSniffer
 from src.env_configs import EnvConfigs
-from src.constants import FileType, Extensions, Constants
-
-
-# TODO : check if specific extension exists in archive
-def _is_archived_subtitle(absolute_path: str):
-    try:
-        if not os.path.exists(absolute_path):
-            raise FileNotFoundError(f"Archived subtitle not found : {absolute_path}")
-
-        archive_size = os.path.getsize(filename=absolute_path)
-        if archive_size > Constants.MAXIMUM_ARCHIVE_SIZE:
-            logger.warning(f"Too big to extract archive : {archive_size} (byte)")
-            return False
-
-        test_archive(absolute_path, verbosity=-1)
-
-        return True
-    except Exception as e:
-        logger.warning(e)
-        return False
+from src.constants import FileType, Extensions
 
 
 class Constructor(metaclass=ABCMeta):
@@ -35,18 +20,64 @@ class Constructor(metaclass=ABCMeta):
     def struct(self, source_path: str) -> Folder:
         raise NotImplementedError
 
+    def stream(
+        self, source_path: str, prefetch: int
+    ) -> Iterator[Tuple[str, "Future[Folder]"]]:
+        raise NotImplementedError
+
 
 class GeneralConstructor(Constructor):
-    def __init__(self, env_configs: EnvConfigs) -> None:
+    def __init__(
+        self, env_configs: EnvConfigs, scan_index: Optional[ScanIndex] = None
+    ) -> None:
         self._env_confg = env_configs
+        self._scan_index = scan_index
+        self._archive_sniffer = ArchiveSniffer(
+            subtitle_extensions=env_configs._SUBTITLE_EXTENSIONS
+        )
 
     def struct(self, source_path: str) -> Folder:
         try:
             return self._search_and_struct(path=source_path)
         except FileNotFoundError as e:
             raise e
+        finally:
+            if self._scan_index:
+                self._scan_index.commit()
+
+    def stream(
+        self, source_path: str, prefetch: int
+    ) -> Iterator[Tuple[str, "Future[Folder]"]]:
+        """Yield (child path, future tree) for each child directory of source_path in listing order.
+        Up to `prefetch` later children are scanned in the background while the caller handles the current one.
+        """
+        with os.scandir(source_path) as it:
+            child_paths = [entry.path for entry in it if entry.is_dir()]
+
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            for child_path in child_paths:
+                pending.append((child_path, pool.submit(self.struct, child_path)))
+
+                if len(pending) > prefetch:
+                    yield pending.popleft()
+
+            while pending:
+                yield pending.popleft()
 
     def _get_file_type(self, absolute_path: str) -> FileType:
+        file_type = self._get_file_type_by_extension(absolute_path=absolute_path)
+        if file_type:
+            return file_type
+
+        if self._archive_sniffer.is_archived_subtitle(absolute_path=absolute_path):
+            return FileType.ARCHIVED_SUBTITLE
+
+        return FileType.EXTRA
+
+    def _get_file_type_by_extension(self, absolute_path: str) -> Optional[FileType]:
+        """None when the extension does not decide, the content is sniffed for an archive."""
         extension = extract_extension(absolute_path=absolute_path).lower()
 
         if extension in (self._env_confg._MEDIA_EXTENSIONS):
@@ -61,24 +92,115 @@ class GeneralConstructor(Constructor):
         if extension == Extensions.LOG:
             return FileType.EXTRA
 
-        if _is_archived_subtitle(absolute_path=absolute_path):
-            return FileType.ARCHIVED_SUBTITLE
+        return None
 
-        return FileType.EXTRA
+    def _read_directory(self, path: str) -> List[ScanEntry]:
+        if not self._scan_index:
+            return self._list_directory(path=path)
+
+        # stat before listing, so a change while listing is caught on the next run
+        directory_stat = os.stat(path)
+
+        entries = self._scan_index.lookup(path=path, stat=directory_stat)
+        if entries is not None:
+            entries = self._revalidate_files(
+                path=path, directory_stat=directory_stat, entries=entries
+            )
+
+        if entries is None:
+            entries = self._list_directory(path=path)
+            self._scan_index.store(path=path, stat=directory_stat, entries=entries)
+
+        return entries
+
+    def _revalidate_files(
+        self, path: str, directory_stat: os.stat_result, entries: List[ScanEntry]
+    ) -> Optional[List[ScanEntry]]:
+        """The cached entries, archive candidates rewritten in place since sniffed again. None if one is gone.
+        Other files keep the type their extension gave them and the size of the last listing.
+        """
+        revalidated_entries = []
+        changed = False
+
+        for entry in entries:
+            if entry.is_dir or self._get_file_type_by_extension(
+                absolute_path=entry.name
+            ):
+                revalidated_entries.append(entry)
+                continue
+
+            try:
+                file_stat = os.stat(os.path.join(path, entry.name))
+            except OSError:
+                return None
+
+            if (file_stat.st_size, file_stat.st_mtime_ns) != (
+                entry.size,
+                entry.mtime_ns,
+            ):
+                changed = True
+                entry = entry._replace(
+                    file_type=self._get_file_type(
+                        absolute_path=os.path.join(path, entry.name)
+                    ),
+                    size=file_stat.st_size,
+                    mtime_ns=file_stat.st_mtime_ns,
+                )
+            revalidated_entries.append(entry)
+
+        if changed:
+            self._scan_index.store(
+                path=path, stat=directory_stat, entries=revalidated_entries
+            )
+        return revalidated_entries
+
+    def _list_directory(self, path: str) -> List[ScanEntry]:
+        entries = []
+
+        for elem_name in os.listdir(path=path):
+            elem_absolute_path = os.path.join(path, elem_name)
+
+            # a single stat answers both "is it a directory" and "how big is it"
+            try:
+                elem_stat = os.stat(elem_absolute_path)
+            except OSError:
+                elem_stat = None
+
+            if elem_stat and stat.S_ISDIR(elem_stat.st_mode):
+                entries.append(
+                    ScanEntry(name=elem_name, is_dir=True, file_type=None, size=0)
+                )
+                continue
+
+            file_type = self._get_file_type(absolute_path=elem_absolute_path)
+            entries.append(
+                ScanEntry(
+                    name=elem_name,
+                    is_dir=False,
+                    file_type=file_type,
+                    size=elem_stat.st_size if elem_stat else 0,
+                    mtime_ns=elem_stat.st_mtime_ns if elem_stat else 0,
+                )
+            )
+
+        return entries
 
     def _search_and_struct(self, path: str) -> Folder:
         folder = Folder(absolute_path=path)
 
-        for elem_name in os.listdir(path=path):
-            elem_absolute_path = os.path.join(folder.get_absolute_path(), elem_name)
+        for entry in self._read_directory(path=path):
+            elem_absolute_path = os.path.join(folder.get_absolute_path(), entry.name)
 
-            if os.path.isdir(elem_absolute_path):
+            if entry.is_dir:
                 folder.append_struct(self._search_and_struct(path=elem_absolute_path))
                 continue
 
-            file_type = self._get_file_type(absolute_path=elem_absolute_path)
             folder.append_struct(
-                File(absolute_path=elem_absolute_path, file_type=file_type)
+                File(
+                    absolute_path=elem_absolute_path,
+                    file_type=entry.file_type,
+                    size=entry.size,
+                )
             )
 
         return folder
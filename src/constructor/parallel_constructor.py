@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+
+from src.model.file import File
+from src.model.folder import Folder
+from src.constructor.constructor import GeneralConstructor
+from src.constructor.scan_index import ScanEntry, ScanIndex
+from src.env_configs import EnvConfigs
+
+
+class ParallelConstructor(GeneralConstructor):
+    """Build the same tree as GeneralConstructor, but list directories with os.scandir on a bounded thread pool."""
+
+    def __init__(
+        self,
+        env_configs: EnvConfigs,
+        max_workers: int,
+        scan_index: Optional[ScanIndex] = None,
+    ) -> None:
+        super().__init__(env_configs=env_configs, scan_index=scan_index)
+        self._max_workers = max_workers
+
+    def struct(self, source_path: str) -> Folder:
+        try:
+            listings = self._scan_tree(path=source_path)
+            return self._assemble(path=source_path, listings=listings)
+        except FileNotFoundError as e:
+            raise e
+        finally:
+            if self._scan_index:
+                self._scan_index.commit()
+
+    def _scan_tree(self, path: str) -> Dict[str, List[ScanEntry]]:
+        listings = {}
+
+        pool = ThreadPoolExecutor(max_workers=self._max_workers)
+        try:
+            pending = {pool.submit(self._scan_directory, path)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    directory_path, entries = future.result()
+                    listings[directory_path] = entries
+
+                    for entry in entries:
+                        if entry.is_dir:
+                            pending.add(
+                                pool.submit(
+                                    self._scan_directory,
+                                    os.path.join(directory_path, entry.name),
+                                )
+                            )
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        return listings
+
+    def _scan_directory(self, path: str) -> tuple[str, List[ScanEntry]]:
+        return path, self._read_directory(path=path)
+
+    def _list_directory(self, path: str) -> List[ScanEntry]:
+        entries = []
+
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    entries.append(
+                        ScanEntry(name=entry.name, is_dir=True, file_type=None, size=0)
+                    )
+                    continue
+
+                # one stat per file is what scandir saves on network storage, sizes are left unknown (0)
+                # except for archive candidates, whose (size, mtime) revalidates their sniffed type
+                size, mtime_ns = 0, 0
+                file_type = self._get_file_type_by_extension(absolute_path=entry.path)
+
+                if not file_type:
+                    try:
+                        entry_stat = entry.stat()
+                        size, mtime_ns = entry_stat.st_size, entry_stat.st_mtime_ns
+                    except OSError:
+                        pass
+                    file_type = self._get_file_type(absolute_path=entry.path)
+
+                entries.append(
+                    ScanEntry(
+                        name=entry.name,
+                        is_dir=False,
+                        file_type=file_type,
+                        size=size,
+                        mtime_ns=mtime_ns,
+                    )
+                )
+
+        return entries
+
+    def _assemble(self, path: str, listings: Dict[str, List[ScanEntry]]) -> Folder:
+        folder = Folder(absolute_path=path)
+
+        for entry in listings[path]:
+            elem_absolute_path = os.path.join(path, entry.name)
+
+            if entry.is_dir:
+                folder.append_struct(
+                    self._assemble(path=elem_absolute_path, listings=listings)
+                )
+                continue
+
+            folder.append_struct(
+                File(
+                    absolute_path=elem_absolute_path,
+                    file_type=entry.file_type,
+                    size=entry.size,
+                )
+            )
+
+        return folder
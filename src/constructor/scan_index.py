@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, NamedTuple, Optional
+
+from loguru import logger
+
+from src.constants import Constants, FileType
+from src.env_configs import EnvConfigs
+
+# bump when the stored entry layout changes
+SCAN_INDEX_VERSION = 3
+
+
+class ScanEntry(NamedTuple):
+    name: str
+    is_dir: bool
+    file_type: Optional[FileType]
+    size: int
+    mtime_ns: int = 0
+
+
+def create_scan_index_fingerprint(env_configs: EnvConfigs) -> str:
+    """Cached FileTypes are only valid for the settings they were classified with."""
+    return json.dumps(
+        {
+            "version": SCAN_INDEX_VERSION,
+            "media_extensions": env_configs._MEDIA_EXTENSIONS,
+            "subtitle_extensions": env_configs._SUBTITLE_EXTENSIONS,
+            "maximum_archive_size": Constants.MAXIMUM_ARCHIVE_SIZE,
+        },
+        sort_keys=True,
+    )
+
+
+class ScanIndex:
+    """On-disk index of directory listings, reused while a directory's (inode, mtime, size) is unchanged.
+    Only the listing, the classification and the size of the files are saved : every directory is still stat'ed,
+    and only files whose type depends on their content (archive candidates) are stat'ed again and, when their
+    (size, mtime) changed, sniffed again. Sizes of the other files may be out of date until their directory changes.
+    """
+
+    def __init__(self, index_path: str, fingerprint: str) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            index_path, timeout=30, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                entries TEXT NOT NULL,
+                last_seen REAL NOT NULL
+            )""")
+        self._hits = 0
+        self._misses = 0
+
+        self._invalidate_if_fingerprint_changed(fingerprint=fingerprint)
+        self._delete_stale_directories()
+        self._connection.commit()
+
+    def _invalidate_if_fingerprint_changed(self, fingerprint: str) -> None:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'fingerprint'"
+        ).fetchone()
+
+        if row and row[0] == fingerprint:
+            return
+
+        if row:
+            logger.info("Scan index settings changed, dropping cached directories")
+
+        self._connection.execute("DELETE FROM directories")
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+            (fingerprint,),
+        )
+
+    def _delete_stale_directories(self) -> None:
+        expired_before = time.time() - Constants.SCAN_INDEX_RETENTION_SECONDS
+        self._connection.execute(
+            "DELETE FROM directories WHERE last_seen < ?", (expired_before,)
+        )
+
+    def lookup(self, path: str, stat: os.stat_result) -> Optional[List[ScanEntry]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT inode, mtime_ns, size, entries FROM directories WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+            if not row or row[:3] != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._connection.execute(
+                "UPDATE directories SET last_seen = ? WHERE path = ?",
+                (time.time(), path),
+            )
+
+        return [
+            ScanEntry(
+                name=name,
+                is_dir=is_dir,
+                file_type=FileType(file_type) if file_type is not None else None,
+                size=size,
+                mtime_ns=mtime_ns,
+            )
+            for name, is_dir, file_type, size, mtime_ns in json.loads(row[3])
+        ]
+
+    def store(self, path: str, stat: os.stat_result, entries: List[ScanEntry]) -> None:
+        serialized_entries = json.dumps(
+            [
+                [
+                    entry.name,
+                    entry.is_dir,
+                    entry.file_type.value if entry.file_type else None,
+                    entry.size,
+                    entry.mtime_ns,
+                ]
+                for entry in entries
+            ],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+        with self._lock:
+            self._connection.execute(
+                """INSERT OR REPLACE INTO directories
+                (path, inode, mtime_ns, size, entries, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    path,
+                    stat.st_ino,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    serialized_entries,
+                    time.time(),
+                ),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._connection.commit()
+
+        logger.info(
+            f"Scan index : {self._hits} directories reused, {self._misses} directories listed"
+        )
+        self._hits = 0
+        self._misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
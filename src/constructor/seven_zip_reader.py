@@ -0,0 +1,366 @@
+import lzma
+import struct
+from typing import List, Tuple
+
+# Minimal 7z header reader, only enough to list member names without an external archiver.
+# Format reference : 7-Zip DOC/7zFormat.txt
+
+SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+SIGNATURE_HEADER_SIZE = 32
+
+K_END = 0x00
+K_HEADER = 0x01
+K_ARCHIVE_PROPERTIES = 0x02
+K_ADDITIONAL_STREAMS_INFO = 0x03
+K_MAIN_STREAMS_INFO = 0x04
+K_FILES_INFO = 0x05
+K_PACK_INFO = 0x06
+K_UNPACK_INFO = 0x07
+K_SUBSTREAMS_INFO = 0x08
+K_SIZE = 0x09
+K_CRC = 0x0A
+K_FOLDER = 0x0B
+K_CODERS_UNPACK_SIZE = 0x0C
+K_NUM_UNPACK_STREAM = 0x0D
+K_NAME = 0x11
+K_ENCODED_HEADER = 0x17
+
+CODER_COPY = b"\x00"
+CODER_LZMA = b"\x03\x01\x01"
+CODER_LZMA2 = b"\x21"
+
+
+class SevenZipReadException(Exception):
+    pass
+
+
+class _Folder:
+    def __init__(self, coders: List[Tuple[bytes, bytes]], num_out_streams: int):
+        self.coders = coders
+        self.num_out_streams = num_out_streams
+        self.unpack_sizes: List[int] = []
+        self.crc_defined = False
+
+
+class _Buffer:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._pos = 0
+
+    def read_byte(self) -> int:
+        if self._pos >= len(self._data):
+            raise SevenZipReadException("Unexpected end of 7z header")
+        value = self._data[self._pos]
+        self._pos += 1
+        return value
+
+    def read_bytes(self, size: int) -> bytes:
+        if self._pos + size > len(self._data):
+            raise SevenZipReadException("Unexpected end of 7z header")
+        value = self._data[self._pos : self._pos + size]
+        self._pos += size
+        return value
+
+    def read_number(self) -> int:
+        first = self.read_byte()
+        mask = 0x80
+        value = 0
+
+        for i in range(8):
+            if first & mask == 0:
+                return value | ((first & (mask - 1)) << (8 * i))
+            value |= self.read_byte() << (8 * i)
+            mask >>= 1
+
+        return value
+
+    def read_bit_vector(self, count: int) -> List[bool]:
+        bits = []
+        mask = 0
+        current = 0
+
+        for _ in range(count):
+            if mask == 0:
+                current = self.read_byte()
+                mask = 0x80
+            bits.append(bool(current & mask))
+            mask >>= 1
+
+        return bits
+
+    def skip_digests(self, count: int) -> List[bool]:
+        all_defined = self.read_byte()
+        defined = [True] * count if all_defined else self.read_bit_vector(count)
+        self.read_bytes(4 * sum(defined))
+        return defined
+
+
+def _read_pack_info(buffer: _Buffer) -> Tuple[int, List[int]]:
+    pack_pos = buffer.read_number()
+    num_pack_streams = buffer.read_number()
+    pack_sizes = []
+
+    while True:
+        property_id = buffer.read_number()
+        if property_id == K_END:
+            return pack_pos, pack_sizes
+        if property_id == K_SIZE:
+            pack_sizes = [buffer.read_number() for _ in range(num_pack_streams)]
+        elif property_id == K_CRC:
+            buffer.skip_digests(num_pack_streams)
+        else:
+            raise SevenZipReadException(f"Unexpected pack info property {property_id}")
+
+
+def _read_folder(buffer: _Buffer) -> _Folder:
+    coders = []
+    total_in_streams = 0
+    total_out_streams = 0
+
+    for _ in range(buffer.read_number()):
+        flag = buffer.read_byte()
+        coder_id = buffer.read_bytes(flag & 0x0F)
+
+        num_in_streams = 1
+        num_out_streams = 1
+        if flag & 0x10:
+            num_in_streams = buffer.read_number()
+            num_out_streams = buffer.read_number()
+
+        properties = b""
+        if flag & 0x20:
+            properties = buffer.read_bytes(buffer.read_number())
+
+        if flag & 0x80:
+            raise SevenZipReadException("Alternative coder methods are not supported")
+
+        coders.append((coder_id, properties))
+        total_in_streams += num_in_streams
+        total_out_streams += num_out_streams
+
+    num_bind_pairs = total_out_streams - 1
+    for _ in range(num_bind_pairs):
+        buffer.read_number()
+        buffer.read_number()
+
+    num_packed_streams = total_in_streams - num_bind_pairs
+    if num_packed_streams > 1:
+        for _ in range(num_packed_streams):
+            buffer.read_number()
+
+    return _Folder(coders=coders, num_out_streams=total_out_streams)
+
+
+def _read_unpack_info(buffer: _Buffer) -> List[_Folder]:
+    if buffer.read_number() != K_FOLDER:
+        raise SevenZipReadException("Folder information not found")
+
+    num_folders = buffer.read_number()
+    if buffer.read_byte() != 0:
+        raise SevenZipReadException("External folder information is not supported")
+
+    folders = [_read_folder(buffer) for _ in range(num_folders)]
+
+    if buffer.read_number() != K_CODERS_UNPACK_SIZE:
+        raise SevenZipReadException("Coder unpack sizes not found")
+
+    for folder in folders:
+        folder.unpack_sizes = [
+            buffer.read_number() for _ in range(folder.num_out_streams)
+        ]
+
+    while True:
+        property_id = buffer.read_number()
+        if property_id == K_END:
+            return folders
+        if property_id == K_CRC:
+            for folder, defined in zip(folders, buffer.skip_digests(num_folders)):
+                folder.crc_defined = defined
+        else:
+            raise SevenZipReadException(
+                f"Unexpected unpack info property {property_id}"
+            )
+
+
+def _read_substreams_info(buffer: _Buffer, folders: List[_Folder]) -> None:
+    num_unpack_streams = [1] * len(folders)
+    property_id = buffer.read_number()
+
+    if property_id == K_NUM_UNPACK_STREAM:
+        num_unpack_streams = [buffer.read_number() for _ in folders]
+        property_id = buffer.read_number()
+
+    if property_id == K_SIZE:
+        for count in num_unpack_streams:
+            for _ in range(max(count - 1, 0)):
+                buffer.read_number()
+        property_id = buffer.read_number()
+
+    if property_id == K_CRC:
+        unknown_digests = 0
+        for folder, count in zip(folders, num_unpack_streams):
+            if count != 1 or not folder.crc_defined:
+                unknown_digests += count
+        buffer.skip_digests(unknown_digests)
+        property_id = buffer.read_number()
+
+    if property_id != K_END:
+        raise SevenZipReadException(f"Unexpected substreams property {property_id}")
+
+
+def _read_streams_info(buffer: _Buffer) -> Tuple[int, List[int], List[_Folder]]:
+    pack_pos = 0
+    pack_sizes = []
+    folders = []
+
+    while True:
+        property_id = buffer.read_number()
+        if property_id == K_END:
+            return pack_pos, pack_sizes, folders
+        if property_id == K_PACK_INFO:
+            pack_pos, pack_sizes = _read_pack_info(buffer)
+        elif property_id == K_UNPACK_INFO:
+            folders = _read_unpack_info(buffer)
+        elif property_id == K_SUBSTREAMS_INFO:
+            _read_substreams_info(buffer, folders)
+        else:
+            raise SevenZipReadException(
+                f"Unexpected streams info property {property_id}"
+            )
+
+
+def _lzma1_filter(properties: bytes) -> dict:
+    if len(properties) < 5:
+        raise SevenZipReadException("Invalid LZMA properties")
+
+    lclppb = properties[0]
+    pb, remainder = divmod(lclppb, 45)
+    lp, lc = divmod(remainder, 9)
+
+    return {
+        "id": lzma.FILTER_LZMA1,
+        "lc": lc,
+        "lp": lp,
+        "pb": pb,
+        "dict_size": struct.unpack("<I", properties[1:5])[0],
+    }
+
+
+def _lzma2_filter(properties: bytes) -> dict:
+    if len(properties) < 1 or properties[0] > 40:
+        raise SevenZipReadException("Invalid LZMA2 properties")
+
+    if properties[0] == 40:
+        dict_size = 0xFFFFFFFF
+    else:
+        dict_size = (2 | (properties[0] & 1)) << (properties[0] // 2 + 11)
+
+    return {"id": lzma.FILTER_LZMA2, "dict_size": dict_size}
+
+
+def _decode_folder(packed: bytes, folder: _Folder) -> bytes:
+    if len(folder.coders) != 1:
+        raise SevenZipReadException("Chained coders are not supported for headers")
+
+    coder_id, properties = folder.coders[0]
+    unpack_size = folder.unpack_sizes[-1]
+
+    if coder_id == CODER_COPY:
+        return packed[:unpack_size]
+
+    if coder_id == CODER_LZMA:
+        filters = [_lzma1_filter(properties)]
+    elif coder_id == CODER_LZMA2:
+        filters = [_lzma2_filter(properties)]
+    else:
+        raise SevenZipReadException(f"Unsupported header coder {coder_id.hex()}")
+
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+    return decompressor.decompress(packed, max_length=unpack_size)
+
+
+def _skip_archive_properties(buffer: _Buffer) -> None:
+    while True:
+        property_type = buffer.read_byte()
+        if property_type == K_END:
+            return
+        buffer.read_bytes(buffer.read_number())
+
+
+def _read_file_names(buffer: _Buffer) -> List[str]:
+    num_files = buffer.read_number()
+    names = []
+
+    while True:
+        property_type = buffer.read_number()
+        if property_type == K_END:
+            break
+
+        size = buffer.read_number()
+        if property_type != K_NAME:
+            buffer.read_bytes(size)
+            continue
+
+        if buffer.read_byte() != 0:
+            raise SevenZipReadException("External file names are not supported")
+
+        raw_names = buffer.read_bytes(size - 1).decode("utf-16-le")
+        names = [name for name in raw_names.split("\x00") if name]
+
+    if len(names) != num_files:
+        raise SevenZipReadException("File names not found in 7z header")
+
+    return names
+
+
+def _read_header(buffer: _Buffer) -> List[str]:
+    while True:
+        property_id = buffer.read_number()
+
+        if property_id == K_END:
+            return []
+        if property_id == K_ARCHIVE_PROPERTIES:
+            _skip_archive_properties(buffer)
+        elif property_id in (K_ADDITIONAL_STREAMS_INFO, K_MAIN_STREAMS_INFO):
+            _read_streams_info(buffer)
+        elif property_id == K_FILES_INFO:
+            return _read_file_names(buffer)
+        else:
+            raise SevenZipReadException(f"Unexpected header property {property_id}")
+
+
+def list_7z_names(absolute_path: str) -> List[str]:
+    """List member names of a 7z archive by reading only its headers."""
+    with open(absolute_path, "rb") as file:
+        signature_header = file.read(SIGNATURE_HEADER_SIZE)
+        if (
+            len(signature_header) < SIGNATURE_HEADER_SIZE
+            or signature_header[:6] != SIGNATURE
+        ):
+            raise SevenZipReadException("Not a 7z archive")
+
+        next_header_offset, next_header_size = struct.unpack(
+            "<QQ", signature_header[12:28]
+        )
+        if next_header_size == 0:
+            return []
+
+        file.seek(SIGNATURE_HEADER_SIZE + next_header_offset)
+        header = file.read(next_header_size)
+
+        while True:
+            buffer = _Buffer(header)
+            property_id = buffer.read_number()
+
+            if property_id == K_HEADER:
+                return _read_header(buffer)
+
+            if property_id != K_ENCODED_HEADER:
+                raise SevenZipReadException(f"Unexpected 7z header {property_id}")
+
+            pack_pos, pack_sizes, folders = _read_streams_info(buffer)
+            if not folders or not pack_sizes:
+                raise SevenZipReadException("Encoded header streams not found")
+
+            file.seek(SIGNATURE_HEADER_SIZE + pack_pos)
+            header = _decode_folder(packed=file.read(pack_sizes[0]), folder=folders[0])
@@ -37,6 +37,26 @@ class EnvConfigs:
             self.MKV_SUBTITLE_FALLBACK_LANGUAGE = json.loads(fallback_lang)
         except Exception:
             self.MKV_SUBTITLE_FALLBACK_LANGUAGE = [fallback_lang]
+        self._MKV_SUBTITLE_EXTRACT_ALL_LANGUAGES = (
+            os.getenv(
+                "MKV_SUBTITLE_EXTRACT_ALL_LANGUAGES",
+                DefaultEnvConifgs.MKV_SUBTITLE_EXTRACT_ALL_LANGUAGES,
+            )
+            == "True"
+        )
+        self._MKV_EXTRACTION_WORKERS = int(
+            os.getenv(
+                "MKV_EXTRACTION_WORKERS", DefaultEnvConifgs.MKV_EXTRACTION_WORKERS
+            )
+        )
+        self._MKV_EXTRACTION_PER_DEVICE = int(
+            os.getenv(
+                "MKV_EXTRACTION_PER_DEVICE", DefaultEnvConifgs.MKV_EXTRACTION_PER_DEVICE
+            )
+        )
+        self._MKV_CACHE_PATH = os.getenv(
+            "MKV_CACHE_PATH", DefaultEnvConifgs.MKV_CACHE_PATH
+        )
         self.ENABLE_SUBTITLE_TRANSLATION = (
             os.getenv(
                 "ENABLE_SUBTITLE_TRANSLATION",
@@ -64,6 +84,27 @@ class EnvConfigs:
             "TRANSLATION_MODEL",
             DefaultEnvConifgs.TRANSLATION_MODEL,
         )
+        self._TRANSLATION_MAX_IN_FLIGHT = int(
+            os.getenv(
+                "TRANSLATION_MAX_IN_FLIGHT", DefaultEnvConifgs.TRANSLATION_MAX_IN_FLIGHT
+            )
+        )
+        self._TRANSLATION_MEMORY_PATH = os.getenv(
+            "TRANSLATION_MEMORY_PATH", DefaultEnvConifgs.TRANSLATION_MEMORY_PATH
+        )
+        self._TRANSLATION_QUEUE_PATH = os.getenv(
+            "TRANSLATION_QUEUE_PATH", DefaultEnvConifgs.TRANSLATION_QUEUE_PATH
+        )
+        self._TRANSLATION_CONTEXT_TOKENS = int(
+            os.getenv(
+                "TRANSLATION_CONTEXT_TOKENS",
+                DefaultEnvConifgs.TRANSLATION_CONTEXT_TOKENS,
+            )
+        )
+        self._TRANSLATION_BATCH_PROFILE_PATH = os.getenv(
+            "TRANSLATION_BATCH_PROFILE_PATH",
+            DefaultEnvConifgs.TRANSLATION_BATCH_PROFILE_PATH,
+        )
         self._CONVERT_SMI = (
             os.getenv(
                 "CONVERT_SMI",
@@ -85,6 +126,28 @@ class EnvConfigs:
             )
             == "True"
         )
+        self._PARALLEL_SCAN_WORKERS = int(
+            os.getenv("PARALLEL_SCAN_WORKERS", DefaultEnvConifgs.PARALLEL_SCAN_WORKERS)
+        )
+        self._SCAN_INDEX_PATH = os.getenv(
+            "SCAN_INDEX_PATH", DefaultEnvConifgs.SCAN_INDEX_PATH
+        )
+        self._STREAM_PREFETCH = int(
+            os.getenv("STREAM_PREFETCH", DefaultEnvConifgs.STREAM_PREFETCH)
+        )
+        self._WATCH_SETTLE_SECONDS = float(
+            os.getenv("WATCH_SETTLE_SECONDS", DefaultEnvConifgs.WATCH_SETTLE_SECONDS)
+        )
+        self._WATCH_POLL_INTERVAL = float(
+            os.getenv("WATCH_POLL_INTERVAL", DefaultEnvConifgs.WATCH_POLL_INTERVAL)
+        )
+        self._WATCH_USE_INOTIFY = (
+            os.getenv("WATCH_USE_INOTIFY", DefaultEnvConifgs.WATCH_USE_INOTIFY)
+            == "True"
+        )
+        self._WORKER_MAX_TASKS = int(
+            os.getenv("WORKER_MAX_TASKS", DefaultEnvConifgs.WORKER_MAX_TASKS)
+        )
 
         self._validation()
 
@@ -92,6 +155,30 @@ class EnvConfigs:
         self._validate_filename_format(filename_format=self._FILENAME_FORMAT)
         self._validate_number_digit(number_digit=self._SEASON_NUMBER_DIGIT)
         self._validate_number_digit(number_digit=self._EPISODE_NUMBER_DIGIT)
+        self._validate_worker_count(
+            name="PARALLEL_SCAN_WORKERS", worker_count=self._PARALLEL_SCAN_WORKERS
+        )
+        self._validate_worker_count(
+            name="STREAM_PREFETCH", worker_count=self._STREAM_PREFETCH
+        )
+        self._validate_worker_count(
+            name="MKV_EXTRACTION_WORKERS", worker_count=self._MKV_EXTRACTION_WORKERS
+        )
+        self._validate_worker_count(
+            name="MKV_EXTRACTION_PER_DEVICE",
+            worker_count=self._MKV_EXTRACTION_PER_DEVICE,
+        )
+        self._validate_worker_count(
+            name="WORKER_MAX_TASKS", worker_count=self._WORKER_MAX_TASKS
+        )
+        self._validate_worker_count(
+            name="TRANSLATION_MAX_IN_FLIGHT",
+            worker_count=self._TRANSLATION_MAX_IN_FLIGHT,
+        )
+        self._validate_worker_count(
+            name="TRANSLATION_CONTEXT_TOKENS",
+            worker_count=self._TRANSLATION_CONTEXT_TOKENS,
+        )
 
     def _validate_filename_format(self, filename_format: str):
         essential_args = ["title", "season_number", "episode_number"]
@@ -107,3 +194,9 @@ class EnvConfigs:
             raise InvalidEnvConfig(
                 f"Invalid NUMBER_DIGIT '{number_digit}' in env config, check .env file"
             )
+
+    def _validate_worker_count(self, name: str, worker_count: int):
+        if worker_count < 0:
+            raise InvalidEnvConfig(
+                f"Invalid {name} '{worker_count}' in env config, check .env file"
+            )
@@ -20,3 +20,11 @@ class InvalidEnvConfig(GeneralException):
 
 class AbortException(GeneralException):
     pass
+
+
+class ProcessException(GeneralException):
+    pass
+
+
+class ProcessTimeoutException(ProcessException):
+    pass
@@ -24,25 +24,47 @@ class GeneralExecutor(Executor):
         self._log_exporter = log_exporter
 
     def execute(self, new_root_folder: RestructedFolder, metadata: Metadata) -> None:
-        self._execute(
+        moved_size = self._execute(
             folder=new_root_folder,
             absolute_path=new_root_folder.get_absolute_path(),
+            source_root_path=metadata.get_root().get_absolute_path(),
         )
 
-        self._backup_extra_files(new_root_folder=new_root_folder, metadata=metadata)
+        self._backup_extra_files(
+            new_root_folder=new_root_folder,
+            metadata=metadata,
+            remaining_size=metadata.get_root().get_total_size() - moved_size,
+        )
 
-    def _execute(self, folder: RestructedFolder, absolute_path: str) -> None:
+    def _execute(
+        self, folder: RestructedFolder, absolute_path: str, source_root_path: str
+    ) -> int:
+        """Returns the scanned size of the files moved out of source_root_path."""
         new_directory_path = self._create_directory(
             folder=folder, absolute_path=absolute_path
         )
+        moved_size = 0
 
         for child_folder in folder.get_folders():
-            self._execute(folder=child_folder, absolute_path=new_directory_path)
+            moved_size += self._execute(
+                folder=child_folder,
+                absolute_path=new_directory_path,
+                source_root_path=source_root_path,
+            )
 
         for file in folder.get_files():
             if isinstance(file, RestructedFile):
                 self._move_file(file=file)
 
+                if (
+                    file.get_original_file()
+                    .get_absolute_path()
+                    .startswith(source_root_path + os.sep)
+                ):
+                    moved_size += file.get_original_file().get_size()
+
+        return moved_size
+
     def _create_directory(self, folder: RestructedFolder, absolute_path: str) -> str:
         new_directory_path = os.path.join(absolute_path, folder.get_title())
 
@@ -86,7 +108,7 @@ class GeneralExecutor(Executor):
             raise e
 
     def _backup_extra_files(
-        self, new_root_folder: RestructedFolder, metadata: Metadata
+        self, new_root_folder: RestructedFolder, metadata: Metadata, remaining_size: int
     ) -> None:
         """Backup original extra files(logs, text files, etc...)"""
         backup_root_path = os.path.join(
@@ -104,7 +126,9 @@ class GeneralExecutor(Executor):
         )
 
         # delete if backup directory is empty
-        self._delete_directory_if_empty(path=backup_root_path)
+        self._delete_directory_if_empty(
+            path=backup_root_path, remaining_size=remaining_size
+        )
 
         return
 
@@ -128,7 +152,11 @@ class GeneralExecutor(Executor):
         except Exception as e:
             raise e
 
-    def _delete_directory_if_empty(self, path: str) -> None:
+    def _delete_directory_if_empty(self, path: str, remaining_size: int) -> None:
+        # files left behind according to the scanned tree, no need to walk the backup directory
+        if remaining_size > 0:
+            return
+
         dir_size = self._get_dir_size(path=path)
         if dir_size > 0:
             return
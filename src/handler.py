@@ -1,14 +1,20 @@
 import os
+import time
+from concurrent.futures import Future
 from loguru import logger
+from typing import Dict, List, Optional
 
 from src.errors import DirectoryNotFoundException, AbortException
 from src.constructor.constructor import Constructor
+from src.model.folder import Folder
 from src.analyzer.media_type_analyzer import MediaTypeAnalyzer
 from src.analyzer.media_analyzer_factory import MediaAnalyzerFactory
 from src.restructor.restructor_factory import RestructorFactory
 from src.executor.executor import Executor
 from src.log_exporter import LogExporter
 from src.arguments import Arguments
+from src.watcher.watcher import Watcher
+from src.translator.translation_queue import TranslationQueue
 
 
 class Handler:
@@ -20,6 +26,8 @@ class Handler:
         restructor_factory: RestructorFactory,
         executor: Executor,
         log_exporter: LogExporter,
+        stream_prefetch: int = 0,
+        translation_queue: Optional[TranslationQueue] = None,
     ) -> None:
         self._constructor = constructor
         self._media_type_analyzer = media_type_analyzer
@@ -27,6 +35,8 @@ class Handler:
         self._restructor_factory = restructor_factory
         self._executor = executor
         self._log_exporter = log_exporter
+        self._stream_prefetch = stream_prefetch
+        self._translation_queue = translation_queue
 
     def process(self, arguments: Arguments) -> None:
         try:
@@ -44,12 +54,14 @@ class Handler:
                 self._process_media(source_path=source_path, target_path=target_path)
                 return
 
-            childs = next(os.walk(source_path))
-            child_directories = childs[1]
-
-            for child_name in child_directories:
-                child_path = os.path.join(source_path, child_name)
-                self._process_media(source_path=child_path, target_path=target_path)
+            for child_path, constructed_root in self._constructor.stream(
+                source_path=source_path, prefetch=self._stream_prefetch
+            ):
+                self._process_media(
+                    source_path=child_path,
+                    target_path=target_path,
+                    constructed_root=constructed_root,
+                )
         except AbortException as ae:
             logger.opt(exception=ae).error(ae)
         except Exception as e:
@@ -58,9 +70,96 @@ class Handler:
                 source_path=source_path, target_path=target_path
             )
 
-    def _process_media(self, source_path: str, target_path: str) -> None:
+    def watch(
+        self, arguments: Arguments, watcher: Watcher, settle_seconds: float
+    ) -> None:
+        """Process each child directory of source_path once it stopped changing for settle_seconds."""
+        source_path = arguments.source_path
+        target_path = arguments.target_path
+
+        try:
+            if not os.path.exists(source_path):
+                raise DirectoryNotFoundException(
+                    f"Source directory not found : {source_path}"
+                )
+            if not os.path.exists(target_path):
+                os.makedirs(target_path, exist_ok=True)
+
+            # folders which arrived while the daemon was not running are handled like new ones
+            with os.scandir(source_path) as it:
+                last_changes = {
+                    entry.path: time.monotonic() for entry in it if entry.is_dir()
+                }
+
+            # skipped until they change again, a failed job would fail the same way
+            failed_children = set()
+
+            logger.info(f"Watching {source_path} for new media folders")
+
+            while True:
+                timeout = settle_seconds
+                if last_changes:
+                    timeout = max(
+                        min(last_changes.values()) + settle_seconds - time.monotonic(),
+                        0,
+                    )
+
+                for child_path in watcher.read_changes(timeout=timeout):
+                    last_changes[child_path] = time.monotonic()
+                    failed_children.discard(child_path)
+
+                for child_path in self._pop_settled_children(
+                    last_changes=last_changes, settle_seconds=settle_seconds
+                ):
+                    # moved away by a previous job or deleted before settling
+                    if not os.path.isdir(child_path) or child_path in failed_children:
+                        continue
+
+                    logger.info(f"Media folder settled, processing {child_path}")
+                    if not self._process_media(
+                        source_path=child_path, target_path=target_path
+                    ):
+                        failed_children.add(child_path)
+                        logger.info(f"{child_path} is processed again once it changes")
+
+                    # the job's own writes (extracted subtitles, patched flags, error log) are no new arrival
+                    watcher.discard_changes(child_path=child_path)
+                    last_changes.pop(child_path, None)
+        except KeyboardInterrupt:
+            logger.info("Watch mode stopped")
+        finally:
+            watcher.close()
+
+    def _pop_settled_children(
+        self, last_changes: Dict[str, float], settle_seconds: float
+    ) -> List[str]:
+        settled_before = time.monotonic() - settle_seconds
+        settled_children = sorted(
+            (
+                child_path
+                for child_path, last_change in last_changes.items()
+                if last_change <= settled_before
+            ),
+            key=lambda child_path: last_changes[child_path],
+        )
+
+        for child_path in settled_children:
+            del last_changes[child_path]
+
+        return settled_children
+
+    def _process_media(
+        self,
+        source_path: str,
+        target_path: str,
+        constructed_root: Optional["Future[Folder]"] = None,
+    ) -> bool:
+        """Returns False if the media folder was not processed, the error is logged."""
         try:
-            root_folder = self._constructor.struct(source_path=source_path)
+            if constructed_root:
+                root_folder = constructed_root.result()
+            else:
+                root_folder = self._constructor.struct(source_path=source_path)
 
             media_type = self._media_type_analyzer.analyze(root=root_folder)
 
@@ -73,10 +172,17 @@ class Handler:
             ).restruct(metadata=metadata, target_path=target_path)
 
             self._executor.execute(new_root_folder=restructed_folder, metadata=metadata)
+
+            if self._translation_queue:
+                self._translation_queue.enqueue_moved_files(folder=restructed_folder)
         except AbortException as ae:
             logger.opt(exception=ae).error(ae)
+            return False
         except Exception as e:
             logger.opt(exception=e).error(e)
             self._log_exporter.export_traceback_as_file(
                 source_path=source_path, target_path=target_path
             )
+            return False
+
+        return True
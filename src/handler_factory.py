@@ -0,0 +1,203 @@
+import os
+from typing import Dict, Optional
+
+from src.handler import Handler
+from src.constructor.constructor import GeneralConstructor
+from src.constructor.parallel_constructor import ParallelConstructor
+from src.constructor.scan_index import ScanIndex, create_scan_index_fingerprint
+from src.analyzer.media_type_analyzer import GeneralMediaTypeAnalyzer
+from src.analyzer.media_analyzer_factory import MediaAnalyzerFactory
+from src.analyzer.metadata_reader import GenearlMetadataReader
+from src.analyzer.mkv_subtitle_extractor import MkvSubtitleExtractor
+from src.mkv.mkv_probe import (
+    MkvProbe,
+    CachedMkvProbe,
+    EbmlMkvProbe,
+    MkvmergeProbe,
+    PersistentMkvProbe,
+)
+from src.mkv.mkv_extractor import (
+    MkvExtractor,
+    MkvextractExtractor,
+    NativeMkvExtractor,
+    CachingMkvExtractor,
+)
+from src.mkv.mkv_cache import MkvCache
+from src.translator.subtitle_translator import SubtitleTranslator
+from src.translator.translation_executor import TranslationExecutor
+from src.translator.translation_memory import TranslationMemory
+from src.translator.translator_service import TranslatorService
+from src.translator.translation_queue import TranslationQueue
+from src.translator.translation_worker import TranslationWorker
+from src.restructor.restructor_factory import RestructorFactory
+from src.restructor.subtitle_extractor import GeneralSubtitleExtractor
+from src.log_exporter import LogExporter
+from src.executor.executor import GeneralExecutor
+from src.plan.plan import PLAN_SUBTITLE_DIRECTORY_NAME
+from src.plan.plan_executor import PlanWriter
+from src.env_configs import EnvConfigs
+from src.arguments import Arguments
+
+
+class HandlerFactory:
+    def __init__(
+        self, env_configs: EnvConfigs, run_translation_queue: bool = True
+    ) -> None:
+        """run_translation_queue=False only queues translations, e.g. in the worker processes of --jobs."""
+        self._env_configs = env_configs
+        self._scan_index: Optional[ScanIndex] = None
+        self._mkv_cache: Optional[MkvCache] = None
+        if env_configs._MKV_CACHE_PATH:
+            self._mkv_cache = MkvCache(cache_path=env_configs._MKV_CACHE_PATH)
+
+        mkv_probe: MkvProbe = EbmlMkvProbe(fallback_probe=MkvmergeProbe())
+        self._mkv_extractor: MkvExtractor = NativeMkvExtractor(
+            fallback_extractor=MkvextractExtractor()
+        )
+        if self._mkv_cache:
+            mkv_probe = PersistentMkvProbe(
+                mkv_probe=mkv_probe, mkv_cache=self._mkv_cache
+            )
+            self._mkv_extractor = CachingMkvExtractor(
+                mkv_extractor=self._mkv_extractor, mkv_cache=self._mkv_cache
+            )
+        # shared by every handler of this process, each mkv is identified once per run
+        self._mkv_probe = CachedMkvProbe(mkv_probe=mkv_probe)
+        self._translation_memory: Optional[TranslationMemory] = None
+        self._translator_service: Optional[TranslatorService] = None
+        self._translation_executor: Optional[TranslationExecutor] = None
+        self._translation_queue: Optional[TranslationQueue] = None
+        self._translation_worker: Optional[TranslationWorker] = None
+        if env_configs.ENABLE_SUBTITLE_TRANSLATION:
+            self._create_translation(
+                env_configs=env_configs, run_translation_queue=run_translation_queue
+            )
+
+    def _create_translation(
+        self, env_configs: EnvConfigs, run_translation_queue: bool
+    ) -> None:
+        if env_configs._TRANSLATION_MEMORY_PATH:
+            self._translation_memory = TranslationMemory(
+                memory_path=env_configs._TRANSLATION_MEMORY_PATH
+            )
+        # llm-subtrans translators and their connections live as long as the factory, not one file
+        self._translator_service = TranslatorService(env_configs=env_configs)
+        self._translation_executor = TranslationExecutor(
+            env_configs=env_configs,
+            subtitle_translator=SubtitleTranslator(
+                env_configs=env_configs,
+                translator_service=self._translator_service,
+                translation_memory=self._translation_memory,
+            ),
+        )
+        if env_configs._TRANSLATION_QUEUE_PATH:
+            self._translation_queue = TranslationQueue(
+                queue_path=env_configs._TRANSLATION_QUEUE_PATH
+            )
+            if run_translation_queue:
+                # also resumes the translations left by the previous run
+                self._translation_worker = TranslationWorker(
+                    translation_queue=self._translation_queue,
+                    translation_executor=self._translation_executor,
+                )
+                self._translation_worker.start()
+
+    def create(self, arguments: Arguments) -> Handler:
+        env_configs = self._env_configs
+
+        if env_configs._SCAN_INDEX_PATH and not self._scan_index:
+            self._scan_index = ScanIndex(
+                index_path=env_configs._SCAN_INDEX_PATH,
+                fingerprint=create_scan_index_fingerprint(env_configs=env_configs),
+            )
+
+        if env_configs._PARALLEL_SCAN_WORKERS > 0:
+            constructor = ParallelConstructor(
+                env_configs=env_configs,
+                max_workers=env_configs._PARALLEL_SCAN_WORKERS,
+                scan_index=self._scan_index,
+            )
+        else:
+            constructor = GeneralConstructor(
+                env_configs=env_configs, scan_index=self._scan_index
+            )
+        log_exporter = LogExporter()
+        post_log_exporter = LogExporter()
+
+        # a plan leaves the source untouched : subtitles are extracted into the plan directory,
+        # the audio track flags are recorded and written when the plan is applied
+        planned_track_flags: Optional[Dict[str, Dict[int, bool]]] = None
+        subtitle_output_path: Optional[str] = None
+        if arguments.plan_path:
+            planned_track_flags = {}
+            subtitle_output_path = os.path.join(
+                arguments.plan_path, PLAN_SUBTITLE_DIRECTORY_NAME
+            )
+            executor = PlanWriter(
+                log_exporter=post_log_exporter,
+                plan_path=arguments.plan_path,
+                planned_track_flags=planned_track_flags,
+            )
+        else:
+            executor = GeneralExecutor(log_exporter=post_log_exporter)
+
+        # a plan translates while planning, the queue only follows files moved by this run
+        translation_queue = None if arguments.plan_path else self._translation_queue
+
+        mkv_subtitle_extractor = MkvSubtitleExtractor(
+            env_configs=env_configs,
+            log_exporter=log_exporter,
+            mkv_probe=self._mkv_probe,
+            mkv_extractor=self._mkv_extractor,
+            translation_executor=self._translation_executor,
+            translation_queue=translation_queue,
+            output_path=subtitle_output_path,
+        )
+
+        return Handler(
+            constructor=constructor,
+            media_type_analyzer=GeneralMediaTypeAnalyzer(
+                env_configs=env_configs, metadata_reader=GenearlMetadataReader()
+            ),
+            media_analyzer_factory=MediaAnalyzerFactory(
+                env_configs=env_configs,
+                mkv_subtitle_extractor=mkv_subtitle_extractor,
+            ),
+            restructor_factory=RestructorFactory(
+                env_configs=env_configs,
+                subtitle_extractor=GeneralSubtitleExtractor(constrcutor=constructor),
+                arguments=arguments,
+                log_exporter=log_exporter,
+                mkv_subtitle_extractor=mkv_subtitle_extractor,
+                mkv_probe=self._mkv_probe,
+                mkv_cache=self._mkv_cache,
+                planned_track_flags=planned_track_flags,
+            ),
+            executor=executor,
+            log_exporter=post_log_exporter,
+            stream_prefetch=env_configs._STREAM_PREFETCH,
+            translation_queue=translation_queue,
+        )
+
+    def close(self) -> None:
+        if self._translation_worker:
+            self._translation_worker.close()
+            self._translation_worker = None
+        if self._scan_index:
+            self._scan_index.close()
+            self._scan_index = None
+        if self._mkv_cache:
+            self._mkv_cache.close()
+            self._mkv_cache = None
+        if self._translation_executor:
+            self._translation_executor.close()
+            self._translation_executor = None
+        if self._translator_service:
+            self._translator_service.close()
+            self._translator_service = None
+        if self._translation_memory:
+            self._translation_memory.close()
+            self._translation_memory = None
+        if self._translation_queue:
+            self._translation_queue.close()
+            self._translation_queue = None
@@ -0,0 +1,134 @@
+import os
+import multiprocessing
+import multiprocessing.util
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+from src.errors import DirectoryNotFoundException, AbortException
+from src.handler import Handler
+from src.env_configs import EnvConfigs
+from src.arguments import Arguments
+from src.constants import Log
+from src.process_runner import ToolStatistics, take_statistics, merge_statistics
+from src.translator import translation_statistics
+from src.translator.translation_statistics import TranslationStatistics
+
+# set once per worker process by _initialize_worker
+_worker_handler: Optional[Handler] = None
+
+
+def _initialize_worker(arguments: Arguments, env_configs: EnvConfigs) -> None:
+    global _worker_handler
+
+    # imported here to keep handler_factory out of the import graph of the parent until used
+    from src.handler_factory import HandlerFactory
+
+    # forked workers inherit the sinks of the parent, spawned ones start with stderr only
+    if (
+        env_configs._EXPORT_DEBUG_LOG_FILE
+        and multiprocessing.get_start_method() != "fork"
+    ):
+        logger.add(Log.LOG_FILE_NAME, rotation=Log.LOG_FILE_ROTATION)
+
+    # queued translations run in the parent once every folder is moved
+    handler_factory = HandlerFactory(
+        env_configs=env_configs, run_translation_queue=False
+    )
+    _worker_handler = handler_factory.create(arguments=arguments)
+
+    # closes the caches and translators when the worker exits, recycled or at the end of the pool
+    multiprocessing.util.Finalize(None, handler_factory.close, exitpriority=10)
+
+
+def _process_child(
+    task: Tuple[str, str],
+) -> Tuple[str, bool, Dict[str, ToolStatistics], TranslationStatistics]:
+    """Returns (child_path, succeeded, external tool statistics, translation statistics of this child)."""
+    child_path, target_path = task
+
+    try:
+        succeeded = _worker_handler._process_media(
+            source_path=child_path, target_path=target_path
+        )
+    except Exception as e:
+        # _process_media logs its own errors, this only guards the pool against the rest
+        logger.opt(exception=e).error(f"Worker failed on {child_path} : {e}")
+        succeeded = False
+
+    return (
+        child_path,
+        succeeded,
+        take_statistics(),
+        translation_statistics.take_statistics(),
+    )
+
+
+class MediaWorkerPool:
+    """Run --multiple children in separate processes, each with its own Handler and LogExporter.
+    Workers are replaced after max_tasks_per_child children so memory held by a conversion can not pile up.
+    """
+
+    def __init__(
+        self, env_configs: EnvConfigs, jobs: int, max_tasks_per_child: int
+    ) -> None:
+        self._env_configs = env_configs
+        self._jobs = jobs
+        self._max_tasks_per_child = max_tasks_per_child or None
+
+    def process(self, arguments: Arguments) -> None:
+        source_path = arguments.source_path
+        target_path = arguments.target_path
+
+        try:
+            if not os.path.exists(source_path):
+                raise DirectoryNotFoundException(
+                    f"Source directory not found : {source_path}"
+                )
+            if not os.path.exists(target_path):
+                os.makedirs(target_path, exist_ok=True)
+
+            child_paths = self._list_child_directories(source_path=source_path)
+            logger.info(
+                f"Processing {len(child_paths)} media folders with {self._jobs} workers"
+            )
+
+            failed_paths = []
+            with multiprocessing.Pool(
+                processes=self._jobs,
+                initializer=_initialize_worker,
+                initargs=(arguments, self._env_configs),
+                maxtasksperchild=self._max_tasks_per_child,
+            ) as pool:
+                for (
+                    child_path,
+                    succeeded,
+                    statistics,
+                    child_translation_statistics,
+                ) in pool.imap_unordered(
+                    _process_child,
+                    [(child_path, target_path) for child_path in child_paths],
+                    chunksize=1,
+                ):
+                    merge_statistics(statistics=statistics)
+                    translation_statistics.merge_statistics(
+                        statistics=child_translation_statistics
+                    )
+                    if not succeeded:
+                        failed_paths.append(child_path)
+
+                # leaving the block terminates the workers, their finalizers only run when they exit on their own
+                pool.close()
+                pool.join()
+
+            if failed_paths:
+                logger.warning(
+                    f"{len(failed_paths)} media folders failed : {failed_paths}"
+                )
+        except AbortException as ae:
+            logger.opt(exception=ae).error(ae)
+        except Exception as e:
+            logger.opt(exception=e).error(e)
+
+    def _list_child_directories(self, source_path: str) -> List[str]:
+        with os.scandir(source_path) as it:
+            return sorted(entry.path for entry in it if entry.is_dir())
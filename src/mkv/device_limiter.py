@@ -0,0 +1,31 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class DeviceLimiter:
+    """Bound the number of concurrent I/O heavy jobs per underlying device (st_dev),
+    so parallel work helps on NVMe without thrashing a spinning disk. 0 means no limit.
+    """
+
+    def __init__(self, limit_per_device: int) -> None:
+        self._limit_per_device = limit_per_device
+        self._semaphores: Dict[int, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limit(self, absolute_path: str) -> Iterator[None]:
+        if self._limit_per_device <= 0:
+            yield
+            return
+
+        device = os.stat(absolute_path).st_dev
+        with self._lock:
+            semaphore = self._semaphores.get(device)
+            if not semaphore:
+                semaphore = threading.Semaphore(self._limit_per_device)
+                self._semaphores[device] = semaphore
+
+        with semaphore:
+            yield
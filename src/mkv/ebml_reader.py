@@ -0,0 +1,257 @@
+import mmap
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from src.mkv.errors import EbmlReadException
+
+# EBML / Matroska element ids (with their length marker bits, as written in the file)
+EBML = 0x1A45DFA3
+DOC_TYPE = 0x4282
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+TRACK_UID = 0x73C5
+TRACK_TYPE = 0x83
+FLAG_ENABLED = 0xB9
+FLAG_DEFAULT = 0x88
+NAME = 0x536E
+LANGUAGE = 0x22B59C
+CODEC_ID = 0x86
+CODEC_PRIVATE = 0x63A2
+CONTENT_ENCODINGS = 0x6D80
+CONTENT_ENCODING = 0x6240
+CONTENT_ENCODING_ORDER = 0x5031
+CONTENT_ENCODING_SCOPE = 0x5032
+CONTENT_ENCODING_TYPE = 0x5033
+CONTENT_COMPRESSION = 0x5034
+CONTENT_COMP_ALGO = 0x4254
+CONTENT_COMP_SETTINGS = 0x4255
+CLUSTER = 0x1F43B675
+CLUSTER_TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+BLOCK_DURATION = 0x9B
+CUES = 0x1C53BB6B
+CUE_POINT = 0xBB
+CUE_TRACK_POSITIONS = 0xB7
+CUE_TRACK = 0xF7
+CUE_CLUSTER_POSITION = 0xF1
+CUE_RELATIVE_POSITION = 0xF0
+TAGS = 0x1254C367
+TAG = 0x7373
+TARGETS = 0x63C0
+TAG_TRACK_UID = 0x63C5
+SIMPLE_TAG = 0x67C8
+TAG_NAME = 0x45A3
+TAG_STRING = 0x4487
+CRC_32 = 0xBF
+VOID = 0xEC
+
+MATROSKA_DOC_TYPES = (b"matroska", b"webm")
+UNKNOWN_SIZE = -1
+# without a SeekHead entry, Tracks is searched only among the first top level elements
+MAXIMUM_LINEAR_SCAN_SIZE = 16 * 1024 * 1024
+
+
+class Element(NamedTuple):
+    id: int
+    offset: int
+    """Offset of the element header."""
+    data_offset: int
+    size: int
+    """Size of the data, UNKNOWN_SIZE for live streams / unfinished files."""
+
+    @property
+    def end(self) -> int:
+        return self.data_offset + self.size
+
+
+def read_vint(buffer, offset: int, keep_marker: bool) -> Tuple[int, int]:
+    """Read an EBML variable size integer. Returns (value, length)."""
+    if offset >= len(buffer):
+        raise EbmlReadException(f"Unexpected end of file at {offset}")
+
+    first = buffer[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise EbmlReadException(f"Invalid variable size integer at {offset}")
+    if offset + length > len(buffer):
+        raise EbmlReadException(f"Unexpected end of file at {offset}")
+
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for byte in buffer[offset + 1 : offset + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+
+    if not keep_marker and all_ones:
+        return UNKNOWN_SIZE, length
+
+    return value, length
+
+
+def read_element(buffer, offset: int) -> Element:
+    element_id, id_length = read_vint(buffer, offset, keep_marker=True)
+    size, size_length = read_vint(buffer, offset + id_length, keep_marker=False)
+
+    return Element(
+        id=element_id,
+        offset=offset,
+        data_offset=offset + id_length + size_length,
+        size=size,
+    )
+
+
+def iter_children(buffer, parent: Element) -> Iterator[Element]:
+    offset = parent.data_offset
+    end = len(buffer) if parent.size == UNKNOWN_SIZE else min(parent.end, len(buffer))
+
+    while offset < end:
+        element = read_element(buffer, offset)
+        yield element
+
+        if element.size == UNKNOWN_SIZE:
+            return
+        offset = element.end
+
+
+def read_uint(buffer, element: Element) -> int:
+    return int.from_bytes(buffer[element.data_offset : element.end], "big")
+
+
+def read_string(buffer, element: Element) -> str:
+    return (
+        bytes(buffer[element.data_offset : element.end])
+        .rstrip(b"\x00")
+        .decode("utf-8", errors="replace")
+    )
+
+
+def read_bytes(buffer, element: Element) -> bytes:
+    return bytes(buffer[element.data_offset : element.end])
+
+
+class MatroskaFile:
+    """Memory map of a matroska file, with the segment level elements located lazily."""
+
+    def __init__(
+        self, absolute_path: str, writable: bool = False, random_access: bool = False
+    ) -> None:
+        self._file = open(absolute_path, "r+b" if writable else "rb")
+        try:
+            self.buffer = mmap.mmap(
+                self._file.fileno(),
+                0,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+            )
+        except ValueError:
+            self._file.close()
+            raise EbmlReadException(f"Empty file : {absolute_path}")
+
+        # kernel readahead would pull megabytes of video around each small element read
+        if random_access and hasattr(mmap, "MADV_RANDOM"):
+            self.buffer.madvise(mmap.MADV_RANDOM)
+
+        try:
+            self.segment = self._read_segment()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_segment(self) -> Element:
+        header = read_element(self.buffer, 0)
+        if header.id != EBML:
+            raise EbmlReadException("Not an EBML file")
+
+        doc_type = next(
+            (
+                read_bytes(self.buffer, child)
+                for child in iter_children(self.buffer, header)
+                if child.id == DOC_TYPE
+            ),
+            b"matroska",
+        )
+        if doc_type not in MATROSKA_DOC_TYPES:
+            raise EbmlReadException(f"Unsupported DocType {doc_type!r}")
+
+        segment = read_element(self.buffer, header.end)
+        if segment.id != SEGMENT:
+            raise EbmlReadException("Segment not found")
+
+        return segment
+
+    def find_top_level(self, element_id: int) -> Optional[Element]:
+        """Locate a segment child through the SeekHead, or by walking the first top level elements."""
+        for position in self._seek_positions(element_id=element_id):
+            offset = self.segment.data_offset + position
+            if offset < len(self.buffer):
+                element = read_element(self.buffer, offset)
+                if element.id == element_id:
+                    return element
+
+        for element in iter_children(self.buffer, self.segment):
+            if element.id == element_id:
+                return element
+            if (
+                element.id == CLUSTER
+                or element.offset > MAXIMUM_LINEAR_SCAN_SIZE
+                or element.size == UNKNOWN_SIZE
+            ):
+                break
+
+        return None
+
+    def find_all_top_level(self, element_id: int) -> List[Element]:
+        return [
+            element
+            for element in iter_children(self.buffer, self.segment)
+            if element.id == element_id
+        ]
+
+    def _seek_positions(self, element_id: int) -> List[int]:
+        positions = []
+
+        for element in iter_children(self.buffer, self.segment):
+            if element.id == SEEK_HEAD:
+                for seek in iter_children(self.buffer, element):
+                    if seek.id != SEEK:
+                        continue
+
+                    seek_id = None
+                    seek_position = None
+                    for child in iter_children(self.buffer, seek):
+                        if child.id == SEEK_ID:
+                            seek_id = read_uint(self.buffer, child)
+                        elif child.id == SEEK_POSITION:
+                            seek_position = read_uint(self.buffer, child)
+
+                    if seek_id == element_id and seek_position is not None:
+                        positions.append(seek_position)
+                # only the first SeekHead is read, it points to the others if any
+                break
+
+            if element.id == CLUSTER or element.size == UNKNOWN_SIZE:
+                break
+
+        return positions
+
+    def close(self) -> None:
+        self.buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> "MatroskaFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
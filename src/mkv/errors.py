@@ -0,0 +1,14 @@
+class MkvException(Exception):
+    pass
+
+
+class MkvProbeException(MkvException):
+    pass
+
+
+class EbmlReadException(MkvException):
+    pass
+
+
+class MkvExtractException(MkvException):
+    pass
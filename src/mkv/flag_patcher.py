@@ -0,0 +1,246 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from src.mkv.ebml_reader import (
+    Element,
+    MatroskaFile,
+    TRACKS,
+    TRACK_ENTRY,
+    FLAG_DEFAULT,
+    FLAG_ENABLED,
+    CRC_32,
+    VOID,
+    UNKNOWN_SIZE,
+    iter_children,
+    read_element,
+)
+from src.mkv.errors import EbmlReadException
+
+# Matroska default of FlagDefault / FlagEnabled when the element is missing or empty
+DEFAULT_FLAG_VALUE = 1
+FLAG_NAMES = {FLAG_DEFAULT: "FlagDefault", FLAG_ENABLED: "FlagEnabled"}
+
+
+def set_track_flags(absolute_path: str, flags: Dict[int, bool]) -> bool:
+    """Overwrite FlagDefault and FlagEnabled of the tracks {track_id: value} in place, without resizing the file.
+    A missing flag is added by rewriting Tracks over its own space and the EbmlVoid right after it.
+    Returns False, without writing, when there is not enough room; the reason is logged.
+    """
+    with MatroskaFile(absolute_path=absolute_path, writable=True) as matroska_file:
+        buffer = matroska_file.buffer
+
+        tracks_element = matroska_file.find_top_level(element_id=TRACKS)
+        if not tracks_element:
+            raise EbmlReadException(f"Tracks not found in {absolute_path}")
+
+        entries = [
+            entry
+            for entry in iter_children(buffer, tracks_element)
+            if entry.id == TRACK_ENTRY
+        ]
+
+        patches: List[Tuple[int, bytes]] = []
+        patched_entries: List[Element] = []
+        missing_flags: List[Tuple[int, int]] = []
+
+        for track_id, value in flags.items():
+            if track_id >= len(entries):
+                raise EbmlReadException(
+                    f"Track {track_id} not found in {absolute_path}"
+                )
+
+            entry = entries[track_id]
+            children = {child.id: child for child in iter_children(buffer, entry)}
+
+            for flag_id in (FLAG_DEFAULT, FLAG_ENABLED):
+                child = children.get(flag_id)
+
+                if not child or child.size <= 0:
+                    if int(value) != DEFAULT_FLAG_VALUE:
+                        # writing a 0 needs a new element
+                        missing_flags.append((track_id, flag_id))
+                    continue
+
+                new_bytes = int(value).to_bytes(child.size, "big")
+                if buffer[child.data_offset : child.end] != new_bytes:
+                    patches.append((child.data_offset, new_bytes))
+                    if entry not in patched_entries:
+                        patched_entries.append(entry)
+
+        if missing_flags:
+            return _rewrite_tracks(
+                matroska_file=matroska_file,
+                tracks_element=tracks_element,
+                flags=flags,
+                missing_flags=missing_flags,
+            )
+
+        if not patches:
+            return True
+
+        for offset, new_bytes in patches:
+            buffer[offset : offset + len(new_bytes)] = new_bytes
+
+        # innermost first, the Tracks checksum covers the TrackEntry checksums
+        for element in patched_entries + [tracks_element]:
+            _update_crc(buffer=buffer, parent=element)
+
+        buffer.flush()
+        return True
+
+
+def _rewrite_tracks(
+    matroska_file: MatroskaFile,
+    tracks_element: Element,
+    flags: Dict[int, bool],
+    missing_flags: List[Tuple[int, int]],
+) -> bool:
+    """Rebuild Tracks with every flag set, the EbmlVoid elements inside it dropped, and write it over
+    the old Tracks and the EbmlVoid following it. Nothing after that space moves."""
+    buffer = matroska_file.buffer
+    missing = ", ".join(
+        f"{FLAG_NAMES[flag_id]} of track {track_id}"
+        for track_id, flag_id in missing_flags
+    )
+
+    if tracks_element.size == UNKNOWN_SIZE:
+        logger.info(f"{missing} missing, Tracks of unknown size can not be rewritten")
+        return False
+
+    space_end = tracks_element.end
+    segment_end = len(buffer)
+    if matroska_file.segment.size != UNKNOWN_SIZE:
+        segment_end = min(matroska_file.segment.end, segment_end)
+    if space_end < segment_end:
+        next_element = read_element(buffer, space_end)
+        if next_element.id == VOID and next_element.size != UNKNOWN_SIZE:
+            space_end = next_element.end
+
+    children = []
+    track_id = 0
+    for child in iter_children(buffer, tracks_element):
+        if child.id in (CRC_32, VOID):
+            continue
+        if child.id != TRACK_ENTRY:
+            children.append(bytes(buffer[child.offset : child.end]))
+            continue
+
+        children.append(
+            _rebuild_entry(buffer=buffer, entry=child, value=flags.get(track_id))
+        )
+        track_id += 1
+
+    tracks_data = b"".join(children)
+    if _get_crc_element(buffer=buffer, parent=tracks_element):
+        tracks_data = _prepend_crc(data=tracks_data)
+
+    space = space_end - tracks_element.offset
+    size_length = _get_size_length(len(tracks_data))
+    if len(_encode_id(TRACKS)) + size_length + len(tracks_data) + 1 == space:
+        # an EbmlVoid takes 2 bytes at least, the size of Tracks is written one byte longer instead
+        size_length += 1
+    new_tracks = _encode_element(
+        element_id=TRACKS, data=tracks_data, size_length=size_length
+    )
+
+    if len(new_tracks) > space:
+        logger.info(
+            f"{missing} missing, Tracks needs {len(new_tracks)} bytes and only {space} are available "
+            f"with the EbmlVoid after it"
+        )
+        return False
+
+    buffer[tracks_element.offset : space_end] = new_tracks + _encode_void(
+        length=space - len(new_tracks)
+    )
+    buffer.flush()
+    return True
+
+
+def _rebuild_entry(buffer, entry: Element, value: Optional[bool]) -> bytes:
+    children = []
+    for child in iter_children(buffer, entry):
+        if child.id in (CRC_32, VOID):
+            continue
+        if value is not None and child.id in (FLAG_DEFAULT, FLAG_ENABLED):
+            continue
+        children.append(bytes(buffer[child.offset : child.end]))
+
+    if value is not None:
+        for flag_id in (FLAG_DEFAULT, FLAG_ENABLED):
+            children.append(
+                _encode_element(element_id=flag_id, data=bytes([int(value)]))
+            )
+
+    entry_data = b"".join(children)
+    if _get_crc_element(buffer=buffer, parent=entry):
+        entry_data = _prepend_crc(data=entry_data)
+
+    return _encode_element(element_id=TRACK_ENTRY, data=entry_data)
+
+
+def _prepend_crc(data: bytes) -> bytes:
+    return (
+        _encode_id(CRC_32)
+        + _encode_size(size=4)
+        + zlib.crc32(data).to_bytes(4, "little")
+        + data
+    )
+
+
+def _encode_element(element_id: int, data: bytes, size_length: int = 0) -> bytes:
+    return (
+        _encode_id(element_id) + _encode_size(size=len(data), length=size_length) + data
+    )
+
+
+def _encode_void(length: int) -> bytes:
+    """EbmlVoid taking exactly length bytes, header included."""
+    if length == 0:
+        return b""
+
+    for size_length in range(1, 9):
+        size = length - 1 - size_length
+        if 0 <= size < (1 << (7 * size_length)) - 1:
+            return (
+                _encode_id(VOID)
+                + _encode_size(size=size, length=size_length)
+                + bytes(size)
+            )
+
+    raise EbmlReadException(f"Can not write an EbmlVoid of {length} bytes")
+
+
+def _encode_id(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def _encode_size(size: int, length: int = 0) -> bytes:
+    length = max(length, _get_size_length(size))
+    return ((1 << (7 * length)) | size).to_bytes(length, "big")
+
+
+def _get_size_length(size: int) -> int:
+    # all ones is reserved for the unknown size
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return length
+
+
+def _update_crc(buffer, parent: Element) -> None:
+    crc_element = _get_crc_element(buffer=buffer, parent=parent)
+    if not crc_element:
+        return
+
+    checksum = zlib.crc32(buffer[crc_element.end : parent.end])
+    buffer[crc_element.data_offset : crc_element.end] = checksum.to_bytes(4, "little")
+
+
+def _get_crc_element(buffer, parent: Element) -> Optional[Element]:
+    """CRC-32 is always the first child and covers everything after it in the parent."""
+    first_child = next(iter_children(buffer, parent), None)
+    if first_child and first_child.id == CRC_32 and first_child.size == 4:
+        return first_child
+    return None
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from dataclasses import asdict
+from typing import List, Optional
+
+from src.mkv.mkv_track import MkvTrack
+from src.constants import Constants
+
+# bump when the stored track layout or the extraction output changes
+MKV_CACHE_VERSION = 1
+INDEX_FILE_NAME = "index.sqlite"
+BLOB_DIRECTORY_NAME = "blobs"
+
+
+class MkvCache:
+    """On-disk cache of mkv track listings and extracted subtitles, keyed by (device, inode, size, mtime).
+    Moving a file inside the same filesystem keeps its entries. Subtitles are stored once per content hash.
+    """
+
+    def __init__(self, cache_path: str) -> None:
+        os.makedirs(os.path.join(cache_path, BLOB_DIRECTORY_NAME), exist_ok=True)
+        self._blob_path = os.path.join(cache_path, BLOB_DIRECTORY_NAME)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(cache_path, INDEX_FILE_NAME),
+            timeout=30,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS probes (
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                tracks TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (device, inode)
+            )""")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS extractions (
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                track_id INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (device, inode, track_id)
+            )""")
+
+        self._invalidate_if_version_changed()
+        self._delete_stale_entries()
+        self._connection.commit()
+
+    def _invalidate_if_version_changed(self) -> None:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+
+        if row and row[0] == str(MKV_CACHE_VERSION):
+            return
+
+        self._connection.execute("DELETE FROM probes")
+        self._connection.execute("DELETE FROM extractions")
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+            (str(MKV_CACHE_VERSION),),
+        )
+
+    def _delete_stale_entries(self) -> None:
+        expired_before = time.time() - Constants.MKV_CACHE_RETENTION_SECONDS
+        self._connection.execute(
+            "DELETE FROM probes WHERE last_seen < ?", (expired_before,)
+        )
+        deleted = self._connection.execute(
+            "DELETE FROM extractions WHERE last_seen < ?", (expired_before,)
+        ).rowcount
+
+        if deleted > 0:
+            self._delete_orphan_blobs()
+
+    def _delete_orphan_blobs(self) -> None:
+        """Blobs touched within the grace period are kept : another process may not have inserted their row yet."""
+        digests = {
+            row[0]
+            for row in self._connection.execute(
+                "SELECT DISTINCT digest FROM extractions"
+            )
+        }
+        written_before = time.time() - Constants.MKV_CACHE_BLOB_GRACE_SECONDS
+
+        for directory_path, _, file_names in os.walk(self._blob_path):
+            for file_name in file_names:
+                if file_name in digests:
+                    continue
+
+                file_path = os.path.join(directory_path, file_name)
+                try:
+                    if os.stat(file_path).st_mtime < written_before:
+                        os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+
+    def get_tracks(
+        self, absolute_path: str, stat: os.stat_result
+    ) -> Optional[List[MkvTrack]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, tracks FROM probes WHERE device = ? AND inode = ?",
+                (stat.st_dev, stat.st_ino),
+            ).fetchone()
+
+            if not row or row[:2] != (stat.st_size, stat.st_mtime_ns):
+                return None
+
+            self._connection.execute(
+                "UPDATE probes SET last_seen = ? WHERE device = ? AND inode = ?",
+                (time.time(), stat.st_dev, stat.st_ino),
+            )
+            self._connection.commit()
+
+        # the file may have been moved since it was probed
+        return [
+            MkvTrack(**dict(track, file_path=absolute_path))
+            for track in json.loads(row[2])
+        ]
+
+    def store_tracks(self, stat: os.stat_result, tracks: List[MkvTrack]) -> None:
+        serialized_tracks = json.dumps(
+            [asdict(track) for track in tracks],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+        with self._lock:
+            self._connection.execute(
+                """INSERT OR REPLACE INTO probes
+                (device, inode, size, mtime_ns, tracks, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    stat.st_dev,
+                    stat.st_ino,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    serialized_tracks,
+                    time.time(),
+                ),
+            )
+            self._connection.commit()
+
+    def restore_extraction(
+        self, stat: os.stat_result, track: MkvTrack, output_path: str
+    ) -> bool:
+        """Copy a previously extracted track to output_path. Returns False on a cache miss."""
+        with self._lock:
+            row = self._connection.execute(
+                """SELECT size, mtime_ns, digest FROM extractions
+                WHERE device = ? AND inode = ? AND track_id = ?""",
+                (stat.st_dev, stat.st_ino, track.track_id),
+            ).fetchone()
+
+            if not row or row[:2] != (stat.st_size, stat.st_mtime_ns):
+                return False
+
+            self._connection.execute(
+                """UPDATE extractions SET last_seen = ?
+                WHERE device = ? AND inode = ? AND track_id = ?""",
+                (time.time(), stat.st_dev, stat.st_ino, track.track_id),
+            )
+            self._connection.commit()
+
+        blob_path = self._get_blob_path(digest=row[2])
+        if not os.path.exists(blob_path):
+            return False
+
+        shutil.copyfile(blob_path, output_path)
+        return True
+
+    def store_extraction(
+        self, stat: os.stat_result, track: MkvTrack, output_path: str
+    ) -> None:
+        digest = self._store_blob(file_path=output_path)
+
+        with self._lock:
+            self._connection.execute(
+                """INSERT OR REPLACE INTO extractions
+                (device, inode, size, mtime_ns, track_id, digest, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    stat.st_dev,
+                    stat.st_ino,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    track.track_id,
+                    digest,
+                    time.time(),
+                ),
+            )
+            self._connection.commit()
+
+    def rekey_extractions(
+        self, old_stat: os.stat_result, new_stat: os.stat_result
+    ) -> None:
+        """Keep the extracted subtitles of a file whose header was edited in place (e.g. default audio track changed)."""
+        with self._lock:
+            self._connection.execute(
+                """UPDATE extractions SET size = ?, mtime_ns = ?
+                WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?""",
+                (
+                    new_stat.st_size,
+                    new_stat.st_mtime_ns,
+                    old_stat.st_dev,
+                    old_stat.st_ino,
+                    old_stat.st_size,
+                    old_stat.st_mtime_ns,
+                ),
+            )
+            self._connection.commit()
+
+    def _store_blob(self, file_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        blob_path = self._get_blob_path(digest=digest)
+        if os.path.exists(blob_path):
+            try:
+                # restart the grace period of a blob about to be referenced again
+                os.utime(blob_path)
+                return digest
+            except FileNotFoundError:
+                pass
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+        os.close(file_descriptor)
+        shutil.copyfile(file_path, temp_path)
+        os.replace(temp_path, blob_path)
+
+        return digest
+
+    def _get_blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_path, digest[:2], digest)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
@@ -0,0 +1,130 @@
+import os
+from abc import ABCMeta
+from typing import List, Tuple
+from loguru import logger
+
+from src.mkv.mkv_track import MkvTrack
+from src.mkv.mkv_cache import MkvCache
+from src.mkv.subtitle_reader import can_read_subtitles, write_subtitle_tracks
+from src.mkv.errors import MkvExtractException, EbmlReadException
+from src.process_runner import run_process, get_error_message
+from src.errors import ProcessException
+
+
+class MkvExtractor(metaclass=ABCMeta):
+    def extract_tracks(
+        self, absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+    ) -> None:
+        """Write each (track, output_path) of the mkv file at absolute_path."""
+        raise NotImplementedError
+
+
+class MkvextractExtractor(MkvExtractor):
+    """Extract every wanted track with a single mkvextract invocation, the container is read once."""
+
+    def extract_tracks(
+        self, absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+    ) -> None:
+        if not outputs:
+            return
+
+        args = ["mkvextract", absolute_path, "tracks"]
+        for track, output_path in outputs:
+            args.append(f"{track.track_id}:{output_path}")
+
+        logger.info(f"mkvextract command: {' '.join(args)}")
+        try:
+            # mkvextract exits with 1 on warnings, the tracks are still written
+            result = run_process(
+                tool="mkvextract",
+                args=args,
+                input_size=os.path.getsize(absolute_path),
+                success_returncodes=(0, 1),
+            )
+        except ProcessException as e:
+            raise MkvExtractException(f"mkvextract failed for {absolute_path} : {e}")
+
+        if result.returncode > 1:
+            raise MkvExtractException(
+                f"mkvextract failed for {absolute_path} : {get_error_message(result)}"
+            )
+
+        for _, output_path in outputs:
+            if not os.path.exists(output_path):
+                raise MkvExtractException(
+                    f"mkvextract did not write {output_path} from {absolute_path}"
+                )
+
+
+class NativeMkvExtractor(MkvExtractor):
+    """Write text subtitles from the blocks the Cues point to, without reading the video and audio clusters.
+    Other tracks, and files whose subtitles are not indexed, are left to fallback_extractor.
+    """
+
+    def __init__(self, fallback_extractor: MkvExtractor) -> None:
+        self._fallback_extractor = fallback_extractor
+
+    def extract_tracks(
+        self, absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+    ) -> None:
+        native_outputs = [
+            (track, output_path)
+            for track, output_path in outputs
+            if can_read_subtitles(track=track)
+        ]
+        fallback_outputs = [
+            output for output in outputs if output not in native_outputs
+        ]
+
+        if native_outputs:
+            try:
+                write_subtitle_tracks(
+                    absolute_path=absolute_path, outputs=native_outputs
+                )
+            except EbmlReadException as e:
+                logger.warning(
+                    f"Failed to read subtitles of {absolute_path} natively ({e}), falling back to mkvextract"
+                )
+                fallback_outputs = outputs
+
+        if fallback_outputs:
+            self._fallback_extractor.extract_tracks(
+                absolute_path=absolute_path, outputs=fallback_outputs
+            )
+
+
+class CachingMkvExtractor(MkvExtractor):
+    """Restore tracks extracted by previous runs from the on-disk MkvCache, only the others are extracted."""
+
+    def __init__(self, mkv_extractor: MkvExtractor, mkv_cache: MkvCache) -> None:
+        self._mkv_extractor = mkv_extractor
+        self._mkv_cache = mkv_cache
+
+    def extract_tracks(
+        self, absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+    ) -> None:
+        stat = os.stat(absolute_path)
+
+        missing_outputs = [
+            (track, output_path)
+            for track, output_path in outputs
+            if not self._mkv_cache.restore_extraction(
+                stat=stat, track=track, output_path=output_path
+            )
+        ]
+
+        if len(missing_outputs) < len(outputs):
+            logger.info(
+                f"{len(outputs) - len(missing_outputs)} subtitle tracks of {absolute_path} restored from mkv cache"
+            )
+        if not missing_outputs:
+            return
+
+        self._mkv_extractor.extract_tracks(
+            absolute_path=absolute_path, outputs=missing_outputs
+        )
+
+        for track, output_path in missing_outputs:
+            self._mkv_cache.store_extraction(
+                stat=stat, track=track, output_path=output_path
+            )
@@ -0,0 +1,123 @@
+import os
+import json
+import threading
+from abc import ABCMeta
+from typing import Dict, List, Tuple
+from loguru import logger
+
+from src.mkv.mkv_track import MkvTrack, DEFAULT_LANGUAGE, read_tracks
+from src.mkv.mkv_cache import MkvCache
+from src.mkv.errors import MkvProbeException, EbmlReadException
+from src.process_runner import run_process, get_error_message
+from src.errors import ProcessException
+
+
+class MkvProbe(metaclass=ABCMeta):
+    def get_tracks(self, absolute_path: str) -> List[MkvTrack]:
+        raise NotImplementedError
+
+
+class MkvmergeProbe(MkvProbe):
+    """Identify tracks with mkvmerge's JSON identification."""
+
+    def get_tracks(self, absolute_path: str) -> List[MkvTrack]:
+        logger.debug(f"Probing mkv tracks of {absolute_path} with mkvmerge")
+
+        try:
+            result = run_process(
+                tool="mkvmerge",
+                args=["mkvmerge", "-J", absolute_path],
+                input_size=os.path.getsize(absolute_path),
+            )
+        except ProcessException as e:
+            raise MkvProbeException(f"mkvmerge failed for {absolute_path} : {e}")
+
+        if result.returncode != 0:
+            raise MkvProbeException(
+                f"mkvmerge failed for {absolute_path} : {get_error_message(result)}"
+            )
+
+        try:
+            tracks = json.loads(result.stdout)["tracks"]
+        except (ValueError, KeyError) as e:
+            raise MkvProbeException(f"Invalid mkvmerge identification : {e}")
+
+        return [
+            self._to_track(absolute_path=absolute_path, identification=track)
+            for track in tracks
+        ]
+
+    def _to_track(self, absolute_path: str, identification: dict) -> MkvTrack:
+        properties = identification.get("properties", {})
+
+        return MkvTrack(
+            file_path=absolute_path,
+            track_id=identification["id"],
+            track_number=properties.get("number", identification["id"] + 1),
+            track_type=identification.get("type", ""),
+            track_codec=identification.get("codec", ""),
+            codec_id=properties.get("codec_id", ""),
+            language=properties.get("language", DEFAULT_LANGUAGE),
+            default_track=bool(properties.get("default_track")),
+            enabled_track=bool(properties.get("enabled_track", True)),
+            track_name=properties.get("track_name"),
+        )
+
+
+class EbmlMkvProbe(MkvProbe):
+    """Read the Tracks element directly from the file, mkvmerge is only used for files the reader can not parse."""
+
+    def __init__(self, fallback_probe: MkvProbe) -> None:
+        self._fallback_probe = fallback_probe
+
+    def get_tracks(self, absolute_path: str) -> List[MkvTrack]:
+        try:
+            return read_tracks(absolute_path=absolute_path)
+        except EbmlReadException as e:
+            logger.warning(
+                f"Failed to read mkv tracks of {absolute_path} ({e}), falling back to mkvmerge"
+            )
+            return self._fallback_probe.get_tracks(absolute_path=absolute_path)
+
+
+class PersistentMkvProbe(MkvProbe):
+    """Reuse track listings of previous runs from the on-disk MkvCache."""
+
+    def __init__(self, mkv_probe: MkvProbe, mkv_cache: MkvCache) -> None:
+        self._mkv_probe = mkv_probe
+        self._mkv_cache = mkv_cache
+
+    def get_tracks(self, absolute_path: str) -> List[MkvTrack]:
+        stat = os.stat(absolute_path)
+
+        tracks = self._mkv_cache.get_tracks(absolute_path=absolute_path, stat=stat)
+        if tracks is not None:
+            return tracks
+
+        tracks = self._mkv_probe.get_tracks(absolute_path=absolute_path)
+        self._mkv_cache.store_tracks(stat=stat, tracks=tracks)
+        return tracks
+
+
+class CachedMkvProbe(MkvProbe):
+    """Identify each mkv once per run. Keyed by (path, size, mtime) so a file edited in between (e.g. by mkvpropedit) is probed again."""
+
+    def __init__(self, mkv_probe: MkvProbe) -> None:
+        self._mkv_probe = mkv_probe
+        self._tracks: Dict[Tuple[str, int, int], List[MkvTrack]] = {}
+        self._lock = threading.Lock()
+
+    def get_tracks(self, absolute_path: str) -> List[MkvTrack]:
+        stat = os.stat(absolute_path)
+        cache_key = (absolute_path, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            tracks = self._tracks.get(cache_key)
+        if tracks is not None:
+            return tracks
+
+        tracks = self._mkv_probe.get_tracks(absolute_path=absolute_path)
+
+        with self._lock:
+            self._tracks[cache_key] = tracks
+        return tracks
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.mkv.ebml_reader import (
+    MatroskaFile,
+    TRACKS,
+    TRACK_ENTRY,
+    TRACK_NUMBER,
+    TRACK_TYPE,
+    FLAG_ENABLED,
+    FLAG_DEFAULT,
+    NAME,
+    LANGUAGE,
+    CODEC_ID,
+    iter_children,
+    read_uint,
+    read_string,
+)
+from src.mkv.errors import EbmlReadException
+
+TRACK_TYPES = {1: "video", 2: "audio", 0x11: "subtitles", 0x12: "buttons"}
+
+# codec names as reported by mkvmerge identification, which the rest of the code matches against
+CODEC_NAMES = {
+    "S_TEXT/UTF8": "SubRip/SRT",
+    "S_TEXT/ASCII": "SubRip/SRT",
+    "S_TEXT/ASS": "SubStationAlpha",
+    "S_TEXT/SSA": "SubStationAlpha",
+    "S_ASS": "SubStationAlpha",
+    "S_SSA": "SubStationAlpha",
+    "S_TEXT/WEBVTT": "WebVTT",
+    "S_HDMV/PGS": "HDMV PGS",
+    "S_HDMV/TEXTST": "HDMV TextST",
+    "S_VOBSUB": "VobSub",
+    "S_DVBSUB": "DVBSUB",
+    "V_MPEG4/ISO/AVC": "AVC/H.264/MPEG-4p10",
+    "V_MPEGH/ISO/HEVC": "HEVC/H.265/MPEG-H",
+    "V_AV1": "AV1",
+    "V_VP8": "VP8",
+    "V_VP9": "VP9",
+    "V_MPEG2": "MPEG-1/2",
+    "A_AC3": "AC-3",
+    "A_EAC3": "E-AC-3",
+    "A_DTS": "DTS",
+    "A_TRUEHD": "TrueHD Atmos",
+    "A_FLAC": "FLAC",
+    "A_OPUS": "Opus",
+    "A_VORBIS": "Vorbis",
+    "A_MPEG/L3": "MP3",
+    "A_MPEG/L2": "MP2",
+}
+# Matroska default when the Language element is missing
+DEFAULT_LANGUAGE = "eng"
+
+
+def get_codec_name(codec_id: str) -> str:
+    if codec_id.startswith("A_AAC"):
+        return "AAC"
+    if codec_id.startswith("A_PCM"):
+        return "PCM"
+    return CODEC_NAMES.get(codec_id, codec_id)
+
+
+@dataclass(eq=False)
+class MkvTrack:
+    """Track attributes of mkvmerge identification, also read natively from the Tracks element."""
+
+    file_path: str
+    track_id: int
+    """mkvmerge track id, the index of the track in the Tracks element."""
+    track_number: int
+    track_type: str
+    track_codec: str
+    codec_id: str
+    language: str
+    default_track: bool
+    enabled_track: bool
+    track_name: Optional[str]
+
+
+def read_tracks(absolute_path: str) -> List[MkvTrack]:
+    with MatroskaFile(absolute_path=absolute_path) as matroska_file:
+        tracks_element = matroska_file.find_top_level(element_id=TRACKS)
+        if not tracks_element:
+            raise EbmlReadException(f"Tracks not found in {absolute_path}")
+
+        buffer = matroska_file.buffer
+        tracks = []
+
+        for entry in iter_children(buffer, tracks_element):
+            if entry.id != TRACK_ENTRY:
+                continue
+
+            values = {
+                TRACK_NUMBER: 0,
+                TRACK_TYPE: 0,
+                FLAG_ENABLED: 1,
+                FLAG_DEFAULT: 1,
+                NAME: None,
+                LANGUAGE: DEFAULT_LANGUAGE,
+                CODEC_ID: "",
+            }
+            for child in iter_children(buffer, entry):
+                if child.id in (TRACK_NUMBER, TRACK_TYPE, FLAG_ENABLED, FLAG_DEFAULT):
+                    values[child.id] = read_uint(buffer, child)
+                elif child.id in (NAME, LANGUAGE, CODEC_ID):
+                    values[child.id] = read_string(buffer, child)
+
+            tracks.append(
+                MkvTrack(
+                    file_path=absolute_path,
+                    track_id=len(tracks),
+                    track_number=values[TRACK_NUMBER],
+                    track_type=TRACK_TYPES.get(values[TRACK_TYPE], "unknown"),
+                    track_codec=get_codec_name(codec_id=values[CODEC_ID]),
+                    codec_id=values[CODEC_ID],
+                    language=values[LANGUAGE],
+                    default_track=bool(values[FLAG_DEFAULT]),
+                    enabled_track=bool(values[FLAG_ENABLED]),
+                    track_name=values[NAME],
+                )
+            )
+
+        return tracks
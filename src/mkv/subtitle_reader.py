@@ -0,0 +1,565 @@
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.mkv.ebml_reader import (
+    Element,
+    MatroskaFile,
+    INFO,
+    TIMESTAMP_SCALE,
+    TRACKS,
+    TRACK_ENTRY,
+    CODEC_PRIVATE,
+    CONTENT_ENCODINGS,
+    CONTENT_ENCODING,
+    CONTENT_ENCODING_ORDER,
+    CONTENT_ENCODING_SCOPE,
+    CONTENT_ENCODING_TYPE,
+    CONTENT_COMPRESSION,
+    CONTENT_COMP_ALGO,
+    CONTENT_COMP_SETTINGS,
+    CLUSTER,
+    CLUSTER_TIMESTAMP,
+    SIMPLE_BLOCK,
+    BLOCK_GROUP,
+    BLOCK,
+    BLOCK_DURATION,
+    CUES,
+    CUE_POINT,
+    CUE_TRACK_POSITIONS,
+    CUE_TRACK,
+    CUE_CLUSTER_POSITION,
+    CUE_RELATIVE_POSITION,
+    TRACK_UID,
+    TAGS,
+    TAG,
+    TARGETS,
+    TAG_TRACK_UID,
+    SIMPLE_TAG,
+    TAG_NAME,
+    TAG_STRING,
+    UNKNOWN_SIZE,
+    iter_children,
+    read_element,
+    read_vint,
+    read_uint,
+    read_string,
+    read_bytes,
+)
+from src.mkv.mkv_track import MkvTrack
+from src.mkv.errors import EbmlReadException
+
+SRT_CODEC_IDS = ("S_TEXT/UTF8", "S_TEXT/ASCII")
+ASS_CODEC_IDS = ("S_TEXT/ASS", "S_TEXT/SSA", "S_ASS", "S_SSA")
+DEFAULT_TIMESTAMP_SCALE = 1000000  # 1ms
+
+ZLIB_COMPRESSION = 0
+HEADER_STRIPPING = 3
+FRAME_SCOPE = 1
+CODEC_PRIVATE_SCOPE = 2
+
+ASS_EVENTS_HEADER = "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+
+
+class SubtitleBlock(NamedTuple):
+    start: int
+    """Nanoseconds."""
+    duration: Optional[int]
+    """Nanoseconds, None when the block has no BlockDuration."""
+    payload: bytes
+
+
+class CuedBlocks(NamedTuple):
+    blocks: List[SubtitleBlock]
+    offsets: Set[int]
+    """Offsets of the SimpleBlock / BlockGroup elements read."""
+    last_cluster: Element
+    """Last Cluster the Cues point to for the track."""
+
+
+class ContentEncoding(NamedTuple):
+    order: int
+    scope: int
+    algorithm: int
+    settings: bytes
+
+
+def can_read_subtitles(track: MkvTrack) -> bool:
+    return track.codec_id in SRT_CODEC_IDS + ASS_CODEC_IDS
+
+
+def write_subtitle_tracks(
+    absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+) -> None:
+    """Write each text subtitle (track, output_path) as SRT / ASS. Only the Cues, and the blocks they point to are read,
+    raises EbmlReadException when a track is not indexed, or only partly indexed by the Cues.
+    """
+    with MatroskaFile(absolute_path=absolute_path, random_access=True) as matroska_file:
+        timestamp_scale = _read_timestamp_scale(matroska_file=matroska_file)
+        entries = _read_track_entries(matroska_file=matroska_file)
+        for track, _ in outputs:
+            if track.track_id >= len(entries):
+                raise EbmlReadException(f"Track {track.track_id} not found")
+
+        cued_tracks = _read_subtitle_blocks(
+            matroska_file=matroska_file,
+            track_numbers={track.track_number for track, _ in outputs},
+            timestamp_scale=timestamp_scale,
+        )
+        _check_cue_coverage(
+            matroska_file=matroska_file,
+            cued_tracks=cued_tracks,
+            track_uids={
+                track.track_number: _read_track_uid(
+                    buffer=matroska_file.buffer, entry=entries[track.track_id]
+                )
+                for track, _ in outputs
+            },
+        )
+
+        for track, output_path in outputs:
+            encodings, codec_private = _read_track_codec(
+                buffer=matroska_file.buffer, entry=entries[track.track_id]
+            )
+            payloads = [
+                block._replace(
+                    payload=_decode(payload=block.payload, encodings=encodings)
+                )
+                for block in cued_tracks[track.track_number].blocks
+            ]
+
+            if track.codec_id in SRT_CODEC_IDS:
+                content = _format_srt(blocks=payloads)
+            else:
+                content = _format_ass(blocks=payloads, codec_private=codec_private)
+
+            with open(output_path, "w", encoding="utf-8", newline="\n") as file:
+                file.write(content)
+
+
+def _read_timestamp_scale(matroska_file: MatroskaFile) -> int:
+    info = matroska_file.find_top_level(element_id=INFO)
+    if info:
+        for child in iter_children(matroska_file.buffer, info):
+            if child.id == TIMESTAMP_SCALE:
+                return read_uint(matroska_file.buffer, child)
+    return DEFAULT_TIMESTAMP_SCALE
+
+
+def _read_track_entries(matroska_file: MatroskaFile) -> List[Element]:
+    tracks = matroska_file.find_top_level(element_id=TRACKS)
+    if not tracks:
+        raise EbmlReadException("Tracks not found")
+
+    return [
+        entry
+        for entry in iter_children(matroska_file.buffer, tracks)
+        if entry.id == TRACK_ENTRY
+    ]
+
+
+def _read_track_codec(buffer, entry: Element) -> Tuple[List[ContentEncoding], bytes]:
+    """Returns (frame encodings in decoding order, decoded CodecPrivate)."""
+    encodings = []
+    codec_private = b""
+
+    for child in iter_children(buffer, entry):
+        if child.id == CODEC_PRIVATE:
+            codec_private = read_bytes(buffer, child)
+        elif child.id == CONTENT_ENCODINGS:
+            encodings = [
+                _read_content_encoding(buffer=buffer, element=encoding)
+                for encoding in iter_children(buffer, child)
+                if encoding.id == CONTENT_ENCODING
+            ]
+
+    # the highest order was applied last when muxing
+    encodings.sort(key=lambda encoding: encoding.order, reverse=True)
+
+    codec_private = _decode(
+        payload=codec_private,
+        encodings=[e for e in encodings if e.scope & CODEC_PRIVATE_SCOPE],
+    )
+    return [e for e in encodings if e.scope & FRAME_SCOPE], codec_private
+
+
+def _read_content_encoding(buffer, element: Element) -> ContentEncoding:
+    order = 0
+    scope = FRAME_SCOPE
+    algorithm = ZLIB_COMPRESSION
+    settings = b""
+
+    for child in iter_children(buffer, element):
+        if child.id == CONTENT_ENCODING_ORDER:
+            order = read_uint(buffer, child)
+        elif child.id == CONTENT_ENCODING_SCOPE:
+            scope = read_uint(buffer, child)
+        elif child.id == CONTENT_ENCODING_TYPE and read_uint(buffer, child) != 0:
+            raise EbmlReadException("Encrypted tracks are not supported")
+        elif child.id == CONTENT_COMPRESSION:
+            for compression in iter_children(buffer, child):
+                if compression.id == CONTENT_COMP_ALGO:
+                    algorithm = read_uint(buffer, compression)
+                elif compression.id == CONTENT_COMP_SETTINGS:
+                    settings = read_bytes(buffer, compression)
+
+    if algorithm not in (ZLIB_COMPRESSION, HEADER_STRIPPING):
+        raise EbmlReadException(f"Unsupported compression algorithm {algorithm}")
+
+    return ContentEncoding(
+        order=order, scope=scope, algorithm=algorithm, settings=settings
+    )
+
+
+def _decode(payload: bytes, encodings: List[ContentEncoding]) -> bytes:
+    for encoding in encodings:
+        if encoding.algorithm == ZLIB_COMPRESSION:
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error as e:
+                raise EbmlReadException(f"Failed to decompress block : {e}")
+        else:
+            payload = encoding.settings + payload
+    return payload
+
+
+def _read_subtitle_blocks(
+    matroska_file: MatroskaFile, track_numbers: Set[int], timestamp_scale: int
+) -> Dict[int, CuedBlocks]:
+    buffer = matroska_file.buffer
+    cues = matroska_file.find_top_level(element_id=CUES)
+    if not cues:
+        raise EbmlReadException("Cues not found")
+
+    cue_positions: Dict[int, Set[Tuple[int, Optional[int]]]] = {
+        track_number: set() for track_number in track_numbers
+    }
+
+    for cue_point in iter_children(buffer, cues):
+        if cue_point.id != CUE_POINT:
+            continue
+
+        for positions in iter_children(buffer, cue_point):
+            if positions.id != CUE_TRACK_POSITIONS:
+                continue
+
+            values = {}
+            for child in iter_children(buffer, positions):
+                if child.id in (CUE_TRACK, CUE_CLUSTER_POSITION, CUE_RELATIVE_POSITION):
+                    values[child.id] = read_uint(buffer, child)
+
+            track_number = values.get(CUE_TRACK)
+            if track_number in cue_positions and CUE_CLUSTER_POSITION in values:
+                cue_positions[track_number].add(
+                    (values[CUE_CLUSTER_POSITION], values.get(CUE_RELATIVE_POSITION))
+                )
+
+    cued_tracks: Dict[int, CuedBlocks] = {}
+    cluster_timestamps: Dict[int, int] = {}
+    scanned_clusters: Set[Tuple[int, int]] = set()
+
+    for track_number, positions in cue_positions.items():
+        # mkvmerge indexes every subtitle block, other muxers may not index subtitles at all
+        if not positions:
+            raise EbmlReadException(f"Track {track_number} is not indexed by the Cues")
+
+        blocks = []
+        offsets = set()
+        cluster = None
+        for cluster_position, relative_position in sorted(
+            positions, key=lambda position: (position[0], position[1] or 0)
+        ):
+            cluster = _read_cluster(
+                matroska_file=matroska_file, cluster_position=cluster_position
+            )
+            if cluster.offset not in cluster_timestamps:
+                cluster_timestamps[cluster.offset] = _read_cluster_timestamp(
+                    buffer=buffer, cluster=cluster
+                )
+
+            block_element = None
+            if relative_position is not None:
+                element = _read_element_or_none(
+                    buffer=buffer, offset=cluster.data_offset + relative_position
+                )
+                if element and element.id in (SIMPLE_BLOCK, BLOCK_GROUP):
+                    block_element = element
+
+            if block_element:
+                block_elements = [block_element]
+            elif (track_number, cluster.offset) in scanned_clusters:
+                continue
+            else:
+                # no usable relative position, walk the element headers of this cluster only
+                scanned_clusters.add((track_number, cluster.offset))
+                block_elements = [
+                    element
+                    for element in iter_children(buffer, cluster)
+                    if element.id in (SIMPLE_BLOCK, BLOCK_GROUP)
+                ]
+
+            for element in block_elements:
+                if element.offset in offsets:
+                    continue
+
+                block = _read_block(
+                    buffer=buffer,
+                    element=element,
+                    cluster_timestamp=cluster_timestamps[cluster.offset],
+                    timestamp_scale=timestamp_scale,
+                )
+                if block and block[0] == track_number:
+                    offsets.add(element.offset)
+                    blocks.append(block[1])
+
+        blocks.sort(key=lambda block: block.start)
+        cued_tracks[track_number] = CuedBlocks(
+            blocks=blocks, offsets=offsets, last_cluster=cluster
+        )
+
+    return cued_tracks
+
+
+def _check_cue_coverage(
+    matroska_file: MatroskaFile,
+    cued_tracks: Dict[int, CuedBlocks],
+    track_uids: Dict[int, Optional[int]],
+) -> None:
+    """Muxers may index only part of the subtitle blocks. The cued blocks are counted against the
+    NUMBER_OF_FRAMES statistics tag mkvmerge writes; without it, the clusters from the last cued one
+    are searched for blocks the Cues miss."""
+    frame_counts = _read_frame_counts(matroska_file=matroska_file)
+
+    unverified_tracks = {}
+    for track_number, cued in cued_tracks.items():
+        frame_count = frame_counts.get(track_uids.get(track_number))
+        if frame_count is None:
+            unverified_tracks[track_number] = cued
+        elif len(cued.blocks) < frame_count:
+            raise EbmlReadException(
+                f"Track {track_number} is only partly indexed by the Cues ({len(cued.blocks)}/{frame_count} blocks)"
+            )
+
+    if unverified_tracks:
+        _check_uncued_blocks(matroska_file=matroska_file, cued_tracks=unverified_tracks)
+
+
+def _check_uncued_blocks(
+    matroska_file: MatroskaFile, cued_tracks: Dict[int, CuedBlocks]
+) -> None:
+    buffer = matroska_file.buffer
+    segment = matroska_file.segment
+    end = len(buffer) if segment.size == UNKNOWN_SIZE else min(segment.end, len(buffer))
+    offset = min(cued.last_cluster.offset for cued in cued_tracks.values())
+
+    while offset < end:
+        element = read_element(buffer, offset)
+        if element.size == UNKNOWN_SIZE:
+            raise EbmlReadException(
+                f"Element of unknown size at {element.offset}, Cues coverage can not be checked"
+            )
+
+        if element.id == CLUSTER:
+            for child in iter_children(buffer, element):
+                track_number = _read_block_track_number(buffer=buffer, element=child)
+                cued = cued_tracks.get(track_number)
+                if (
+                    cued
+                    and element.offset >= cued.last_cluster.offset
+                    and child.offset not in cued.offsets
+                ):
+                    raise EbmlReadException(
+                        f"Track {track_number} is only partly indexed by the Cues, block at {child.offset} not cued"
+                    )
+
+        offset = element.end
+
+
+def _read_block_track_number(buffer, element: Element) -> Optional[int]:
+    block = element
+    if element.id == BLOCK_GROUP:
+        block = next(
+            (child for child in iter_children(buffer, element) if child.id == BLOCK),
+            None,
+        )
+    elif element.id != SIMPLE_BLOCK:
+        return None
+
+    if not block:
+        return None
+    return read_vint(buffer, block.data_offset, keep_marker=False)[0]
+
+
+def _read_track_uid(buffer, entry: Element) -> Optional[int]:
+    for child in iter_children(buffer, entry):
+        if child.id == TRACK_UID:
+            return read_uint(buffer, child)
+    return None
+
+
+def _read_frame_counts(matroska_file: MatroskaFile) -> Dict[int, int]:
+    """NUMBER_OF_FRAMES of the statistics tags, by TrackUID."""
+    buffer = matroska_file.buffer
+    tags = matroska_file.find_top_level(element_id=TAGS)
+    if not tags:
+        return {}
+
+    frame_counts = {}
+    for tag in iter_children(buffer, tags):
+        if tag.id != TAG:
+            continue
+
+        track_uids = []
+        frame_count = None
+        for child in iter_children(buffer, tag):
+            if child.id == TARGETS:
+                track_uids = [
+                    read_uint(buffer, target)
+                    for target in iter_children(buffer, child)
+                    if target.id == TAG_TRACK_UID
+                ]
+            elif child.id == SIMPLE_TAG:
+                values = {
+                    simple_tag.id: read_string(buffer, simple_tag)
+                    for simple_tag in iter_children(buffer, child)
+                    if simple_tag.id in (TAG_NAME, TAG_STRING)
+                }
+                if (
+                    values.get(TAG_NAME) == "NUMBER_OF_FRAMES"
+                    and values.get(TAG_STRING, "").isdigit()
+                ):
+                    frame_count = int(values[TAG_STRING])
+
+        if frame_count is not None and len(track_uids) == 1:
+            frame_counts[track_uids[0]] = frame_count
+
+    return frame_counts
+
+
+def _read_element_or_none(buffer, offset: int) -> Optional[Element]:
+    try:
+        return read_element(buffer, offset)
+    except EbmlReadException:
+        return None
+
+
+def _read_cluster(matroska_file: MatroskaFile, cluster_position: int) -> Element:
+    cluster = read_element(
+        matroska_file.buffer, matroska_file.segment.data_offset + cluster_position
+    )
+    if cluster.id != CLUSTER:
+        raise EbmlReadException(
+            f"Cue points to a non Cluster element at {cluster.offset}"
+        )
+    return cluster
+
+
+def _read_cluster_timestamp(buffer, cluster: Element) -> int:
+    for child in iter_children(buffer, cluster):
+        if child.id == CLUSTER_TIMESTAMP:
+            return read_uint(buffer, child)
+        if child.id in (SIMPLE_BLOCK, BLOCK_GROUP):
+            break
+    raise EbmlReadException(f"Cluster timestamp not found at {cluster.offset}")
+
+
+def _read_block(
+    buffer, element: Element, cluster_timestamp: int, timestamp_scale: int
+) -> Optional[Tuple[int, SubtitleBlock]]:
+    """Returns (track number, block)."""
+    block = element
+    duration = None
+
+    if element.id == BLOCK_GROUP:
+        block = None
+        for child in iter_children(buffer, element):
+            if child.id == BLOCK:
+                block = child
+            elif child.id == BLOCK_DURATION:
+                duration = read_uint(buffer, child) * timestamp_scale
+        if not block:
+            return None
+
+    if block.size == UNKNOWN_SIZE:
+        raise EbmlReadException(f"Block of unknown size at {block.offset}")
+
+    track_number, length = read_vint(buffer, block.data_offset, keep_marker=False)
+    header_offset = block.data_offset + length
+    relative_timestamp = int.from_bytes(
+        buffer[header_offset : header_offset + 2], "big", signed=True
+    )
+    flags = buffer[header_offset + 2]
+    if flags & 0x06:
+        raise EbmlReadException(f"Laced subtitle block at {block.offset}")
+
+    return track_number, SubtitleBlock(
+        start=(cluster_timestamp + relative_timestamp) * timestamp_scale,
+        duration=duration,
+        payload=bytes(buffer[header_offset + 3 : block.end]),
+    )
+
+
+def _get_end(blocks: List[SubtitleBlock], index: int) -> int:
+    block = blocks[index]
+    if block.duration is not None:
+        return block.start + block.duration
+    if index + 1 < len(blocks):
+        return blocks[index + 1].start
+    return block.start
+
+
+def _decode_text(payload: bytes) -> str:
+    return (
+        payload.rstrip(b"\x00")
+        .decode("utf-8", errors="replace")
+        .replace("\r\n", "\n")
+        .strip("\n")
+    )
+
+
+def _format_srt_time(nanoseconds: int) -> str:
+    milliseconds = round(nanoseconds / 1000000)
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+
+
+def _format_ass_time(nanoseconds: int) -> str:
+    centiseconds = round(nanoseconds / 10000000)
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02}:{seconds:02}.{centiseconds:02}"
+
+
+def _format_srt(blocks: List[SubtitleBlock]) -> str:
+    entries = []
+    for index, block in enumerate(blocks):
+        entries.append(
+            f"{index + 1}\n{_format_srt_time(block.start)} --> {_format_srt_time(_get_end(blocks, index))}\n{_decode_text(block.payload)}\n"
+        )
+    return "\n".join(entries)
+
+
+def _format_ass(blocks: List[SubtitleBlock], codec_private: bytes) -> str:
+    header = _decode_text(codec_private) + "\n"
+    if "[events]" not in header.lower():
+        header += "\n" + ASS_EVENTS_HEADER
+
+    events = []
+    for index, block in enumerate(blocks):
+        # ReadOrder, Layer, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+        fields = _decode_text(block.payload).split(",", 8)
+        if len(fields) != 9:
+            raise EbmlReadException(f"Malformed ASS block at {block.start}ns")
+
+        read_order = int(fields[0]) if fields[0].strip().isdigit() else index
+        events.append(
+            (
+                read_order,
+                f"Dialogue: {fields[1]},{_format_ass_time(block.start)},{_format_ass_time(_get_end(blocks, index))},{','.join(fields[2:])}\n",
+            )
+        )
+
+    events.sort(key=lambda event: event[0])
+    return header + "".join(line for _, line in events)
@@ -1,4 +1,5 @@
 import os
+import sys
 
 from src.model.structable import Structable
 from src.constants import FileType
@@ -9,11 +10,17 @@ def extract_extension(absolute_path: str) -> str:
 
 
 class File(Structable):
-    def __init__(self, absolute_path: str, file_type: FileType) -> None:
+    __slots__ = ("_title", "_absolute_path", "_extension", "_file_type", "_size")
+
+    def __init__(self, absolute_path: str, file_type: FileType, size: int = 0) -> None:
         self._title = self._extract_title(absolute_path=absolute_path)
         self._absolute_path = absolute_path
-        self._extension = extract_extension(absolute_path=absolute_path)
+        # extensions repeat across the whole library, keep a single lowered copy of each
+        self._extension = sys.intern(
+            extract_extension(absolute_path=absolute_path).lower()
+        )
         self._file_type = file_type
+        self._size = size
 
     def _extract_title(self, absolute_path: str) -> str:
         file_full_name = absolute_path.split(sep=os.sep)[-1]
@@ -26,20 +33,28 @@ class File(Structable):
         return self._absolute_path
 
     def get_extension(self) -> str:
-        return self._extension.lower()
+        return self._extension
 
     def get_file_type(self) -> FileType:
         return self._file_type
 
+    def get_size(self) -> int:
+        """Size in bytes when the file was scanned, 0 if unknown."""
+        return self._size
+
     def explain(self) -> str:
         return f"[CREATED] {self.get_absolute_path()}"
 
 
 class RestructedFile(File):
+    __slots__ = ("_original_file", "_copied")
+
     def __init__(
         self, absolute_path: str, original_file: File, copied: bool = False
     ) -> None:
-        super().__init__(absolute_path, original_file.get_file_type())
+        super().__init__(
+            absolute_path, original_file.get_file_type(), original_file.get_size()
+        )
         self._original_file = original_file
         self._copied = copied
 
@@ -1,19 +1,39 @@
 import os
-from typing import List, Optional
+import sys
+from typing import List, Optional, Tuple
 
 from src.model.structable import Structable
 from src.model.file import File, FileType
 
 
 class Folder(Structable):
+    __slots__ = (
+        "_title",
+        "_absolute_path",
+        "_structs",
+        "_files",
+        "_folders",
+        "_number_of_files_by_type",
+        "_parent",
+        "_total_number_of_files_by_type",
+        "_total_size_by_type",
+    )
+
     def __init__(self, absolute_path: str) -> None:
         self._title = self._extract_title(absolute_path=absolute_path)
         self._absolute_path = absolute_path
-        self._structs = []
+        self._structs: List[Structable] = []
+        self._files: List[File] = []
+        self._folders: List[Folder] = []
         self._number_of_files_by_type = {}
+        self._parent: Optional[Folder] = None
+        # recursive totals of this folder and every descendant, kept up to date by append_struct
+        self._total_number_of_files_by_type = {}
+        self._total_size_by_type = {}
 
     def _extract_title(self, absolute_path: str) -> str:
-        return absolute_path.rsplit(sep=os.sep, maxsplit=1)[1]
+        # "Season 1", "Extras", "Subs"... repeat in every show, a single copy of each is kept
+        return sys.intern(absolute_path.rsplit(sep=os.sep, maxsplit=1)[1])
 
     def get_title(self) -> str:
         return self._title
@@ -26,30 +46,81 @@ class Folder(Structable):
             self._number_of_files_by_type[struct.get_file_type()] = (
                 self._number_of_files_by_type.get(struct.get_file_type(), 0) + 1
             )
+            self._files.append(struct)
+            self._add_totals(
+                number_of_files_by_type={struct.get_file_type(): 1},
+                size_by_type={struct.get_file_type(): struct.get_size()},
+            )
+        elif isinstance(struct, Folder):
+            struct._parent = self
+            self._folders.append(struct)
+            self._add_totals(
+                number_of_files_by_type=struct._total_number_of_files_by_type,
+                size_by_type=struct._total_size_by_type,
+            )
         self._structs.append(struct)
 
+    def _add_totals(
+        self,
+        number_of_files_by_type: dict[FileType, int],
+        size_by_type: dict[FileType, int],
+    ) -> None:
+        folder = self
+
+        while folder is not None:
+            for file_type, count in number_of_files_by_type.items():
+                folder._total_number_of_files_by_type[file_type] = (
+                    folder._total_number_of_files_by_type.get(file_type, 0) + count
+                )
+            for file_type, size in size_by_type.items():
+                folder._total_size_by_type[file_type] = (
+                    folder._total_size_by_type.get(file_type, 0) + size
+                )
+            folder = folder._parent
+
     def get_structs(self) -> List[Structable]:
         return self._structs
 
-    def get_files(self) -> List[File]:
-        return [x for x in self._structs if isinstance(x, File)]
+    def get_files(self) -> Tuple[File, ...]:
+        """Read-only, files are added with append_struct."""
+        return tuple(self._files)
 
-    def get_folders(self) -> List:
-        return [x for x in self._structs if isinstance(x, Folder)]
+    def get_folders(self) -> Tuple["Folder", ...]:
+        """Read-only, folders are added with append_struct."""
+        return tuple(self._folders)
 
     def get_number_of_files_by_type(self, file_type: FileType) -> int:
         return self._number_of_files_by_type.get(file_type, 0)
 
+    def get_total_number_of_files_by_type(self, file_type: FileType) -> int:
+        return self._total_number_of_files_by_type.get(file_type, 0)
+
+    def get_total_size_by_type(self, file_type: FileType) -> int:
+        return self._total_size_by_type.get(file_type, 0)
+
+    def get_total_size(self) -> int:
+        return sum(self._total_size_by_type.values())
+
     def contains_subtitle_file(self) -> bool:
         return (self.get_number_of_files_by_type(file_type=FileType.SUBTITLE) > 0) or (
             self.get_number_of_files_by_type(file_type=FileType.ARCHIVED_SUBTITLE) > 0
         )
 
+    def contains_subtitle_file_recursively(self) -> bool:
+        return (
+            self.get_total_number_of_files_by_type(file_type=FileType.SUBTITLE) > 0
+        ) or (
+            self.get_total_number_of_files_by_type(file_type=FileType.ARCHIVED_SUBTITLE)
+            > 0
+        )
+
     def explain(self) -> str:
         return f"[CREATED] {self.get_absolute_path()}"
 
 
 class RestructedFolder(Folder):
+    __slots__ = ("_original_folder",)
+
     def __init__(self, absolute_path: str, original_folder: Folder) -> None:
         super().__init__(absolute_path)
         self._original_folder = original_folder
@@ -0,0 +1,6 @@
+class Mp4Exception(Exception):
+    pass
+
+
+class Mp4ReadException(Mp4Exception):
+    pass
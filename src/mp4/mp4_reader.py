@@ -0,0 +1,353 @@
+import mmap
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.mkv.mkv_track import MkvTrack
+from src.mp4.errors import Mp4ReadException
+
+HANDLER_TRACK_TYPES = {
+    b"vide": "video",
+    b"soun": "audio",
+    b"text": "subtitles",
+    b"sbtl": "subtitles",
+    b"subt": "subtitles",
+}
+# 3GPP timed text, as written by ffmpeg's mov_text encoder
+TX3G = b"tx3g"
+TX3G_CODEC_NAME = "Timed Text"
+UNDEFINED_LANGUAGE = "und"
+TRACK_ENABLED = 0x1
+
+
+class Box(NamedTuple):
+    type: bytes
+    offset: int
+    data_offset: int
+    end: int
+
+
+class SampleTable(NamedTuple):
+    timescale: int
+    durations: List[int]
+    """Duration of each sample, in timescale units."""
+    sizes: List[int]
+    offsets: List[int]
+
+
+def _read_uint(buffer, offset: int, size: int) -> int:
+    if offset + size > len(buffer):
+        raise Mp4ReadException(f"Unexpected end of file at {offset}")
+    return int.from_bytes(buffer[offset : offset + size], "big")
+
+
+def iter_boxes(buffer, start: int, end: int) -> Iterator[Box]:
+    offset = start
+
+    while offset + 8 <= end:
+        size = _read_uint(buffer, offset, 4)
+        box_type = bytes(buffer[offset + 4 : offset + 8])
+        data_offset = offset + 8
+
+        if size == 1:
+            size = _read_uint(buffer, offset + 8, 8)
+            data_offset += 8
+        elif size == 0:
+            size = end - offset
+
+        if size < data_offset - offset or offset + size > end:
+            raise Mp4ReadException(f"Invalid {box_type!r} box size at {offset}")
+
+        yield Box(
+            type=box_type, offset=offset, data_offset=data_offset, end=offset + size
+        )
+        offset += size
+
+
+def find_box(buffer, parent: Box, path: List[bytes]) -> Optional[Box]:
+    box = parent
+    for box_type in path:
+        box = next(
+            (
+                child
+                for child in iter_boxes(buffer, box.data_offset, box.end)
+                if child.type == box_type
+            ),
+            None,
+        )
+        if not box:
+            return None
+    return box
+
+
+class Mp4File:
+    """Memory map of an mp4 file. Only box headers are walked, mdat is skipped by its size."""
+
+    def __init__(self, absolute_path: str) -> None:
+        self._file = open(absolute_path, "rb")
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise Mp4ReadException(f"Empty file : {absolute_path}")
+
+        # kernel readahead would pull the media payload around each small box read
+        if hasattr(mmap, "MADV_RANDOM"):
+            self.buffer.madvise(mmap.MADV_RANDOM)
+
+        try:
+            self.traks = self._read_traks()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_traks(self) -> List[Box]:
+        moov = next(
+            (
+                box
+                for box in iter_boxes(self.buffer, 0, len(self.buffer))
+                if box.type == b"moov"
+            ),
+            None,
+        )
+        if not moov:
+            raise Mp4ReadException("moov not found")
+
+        return [
+            box
+            for box in iter_boxes(self.buffer, moov.data_offset, moov.end)
+            if box.type == b"trak"
+        ]
+
+    def close(self) -> None:
+        self.buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> "Mp4File":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_tracks(absolute_path: str) -> List[MkvTrack]:
+    """Tracks of an mp4 file, in the track model shared with the mkv code. track_id is the index of the trak box."""
+    with Mp4File(absolute_path=absolute_path) as mp4_file:
+        return [
+            _read_track(
+                buffer=mp4_file.buffer,
+                trak=trak,
+                absolute_path=absolute_path,
+                track_id=track_id,
+            )
+            for track_id, trak in enumerate(mp4_file.traks)
+        ]
+
+
+def _read_track(buffer, trak: Box, absolute_path: str, track_id: int) -> MkvTrack:
+    tkhd = find_box(buffer, trak, [b"tkhd"])
+    hdlr = find_box(buffer, trak, [b"mdia", b"hdlr"])
+    mdhd = find_box(buffer, trak, [b"mdia", b"mdhd"])
+    stsd = find_box(buffer, trak, [b"mdia", b"minf", b"stbl", b"stsd"])
+    if not tkhd or not hdlr or not mdhd:
+        raise Mp4ReadException(f"Incomplete trak at {trak.offset}")
+
+    tkhd_version = buffer[tkhd.data_offset]
+    flags = _read_uint(buffer, tkhd.data_offset + 1, 3)
+    track_number = _read_uint(
+        buffer, tkhd.data_offset + (20 if tkhd_version == 1 else 12), 4
+    )
+
+    handler_type = bytes(buffer[hdlr.data_offset + 8 : hdlr.data_offset + 12])
+
+    codec_id = ""
+    if stsd:
+        # first sample entry : size, format
+        codec_id = bytes(buffer[stsd.data_offset + 12 : stsd.data_offset + 16]).decode(
+            "latin-1"
+        )
+
+    enabled = bool(flags & TRACK_ENABLED)
+    return MkvTrack(
+        file_path=absolute_path,
+        track_id=track_id,
+        track_number=track_number,
+        track_type=HANDLER_TRACK_TYPES.get(handler_type, "unknown"),
+        track_codec=TX3G_CODEC_NAME if codec_id == TX3G.decode() else codec_id,
+        codec_id=codec_id,
+        language=_read_language(buffer=buffer, mdhd=mdhd),
+        default_track=enabled,
+        enabled_track=enabled,
+        track_name=None,
+    )
+
+
+def _read_language(buffer, mdhd: Box) -> str:
+    version = buffer[mdhd.data_offset]
+    packed = _read_uint(buffer, mdhd.data_offset + (32 if version == 1 else 20), 2)
+
+    # below 0x400 it is a Macintosh language code, not ISO 639-2/T
+    if packed < 0x400:
+        return UNDEFINED_LANGUAGE
+
+    return "".join(chr(((packed >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+
+
+def write_srt_tracks(absolute_path: str, outputs: List[Tuple[MkvTrack, str]]) -> None:
+    """Write each tx3g (track, output_path) as SRT, reading only the samples of that track through stsz/stco."""
+    with Mp4File(absolute_path=absolute_path) as mp4_file:
+        for track, output_path in outputs:
+            if track.codec_id != TX3G.decode() or track.track_id >= len(mp4_file.traks):
+                raise Mp4ReadException(f"Track {track.track_id} is not a tx3g track")
+
+            sample_table = _read_sample_table(
+                buffer=mp4_file.buffer, trak=mp4_file.traks[track.track_id]
+            )
+
+            with open(output_path, "w", encoding="utf-8", newline="\n") as file:
+                file.write(
+                    _format_srt(buffer=mp4_file.buffer, sample_table=sample_table)
+                )
+
+
+def _read_sample_table(buffer, trak: Box) -> SampleTable:
+    mdhd = find_box(buffer, trak, [b"mdia", b"mdhd"])
+    stbl = find_box(buffer, trak, [b"mdia", b"minf", b"stbl"])
+    if not mdhd or not stbl:
+        raise Mp4ReadException(f"Sample table not found in trak at {trak.offset}")
+
+    version = buffer[mdhd.data_offset]
+    timescale = _read_uint(buffer, mdhd.data_offset + (20 if version == 1 else 12), 4)
+    if not timescale:
+        raise Mp4ReadException(f"Invalid timescale in trak at {trak.offset}")
+
+    boxes: Dict[bytes, Box] = {
+        box.type: box for box in iter_boxes(buffer, stbl.data_offset, stbl.end)
+    }
+    for box_type in (b"stts", b"stsc", b"stsz"):
+        if box_type not in boxes:
+            raise Mp4ReadException(f"{box_type!r} not found in trak at {trak.offset}")
+
+    durations = []
+    for count, delta in _read_entries(buffer, boxes[b"stts"], fields=2):
+        durations.extend([delta] * count)
+
+    stsz = boxes[b"stsz"]
+    sample_size = _read_uint(buffer, stsz.data_offset + 4, 4)
+    sample_count = _read_uint(buffer, stsz.data_offset + 8, 4)
+    if sample_size:
+        sizes = [sample_size] * sample_count
+    else:
+        sizes = [
+            _read_uint(buffer, stsz.data_offset + 12 + index * 4, 4)
+            for index in range(sample_count)
+        ]
+
+    if b"stco" in boxes:
+        chunk_offsets = [
+            entry[0] for entry in _read_entries(buffer, boxes[b"stco"], fields=1)
+        ]
+    elif b"co64" in boxes:
+        chunk_offsets = [
+            entry[0]
+            for entry in _read_entries(buffer, boxes[b"co64"], fields=1, size=8)
+        ]
+    else:
+        raise Mp4ReadException(f"Chunk offsets not found in trak at {trak.offset}")
+
+    offsets = _get_sample_offsets(
+        chunk_offsets=chunk_offsets,
+        sample_to_chunk=_read_entries(buffer, boxes[b"stsc"], fields=3),
+        sizes=sizes,
+    )
+    if len(durations) < len(sizes) or len(offsets) < len(sizes):
+        # fragmented files keep their samples in moof boxes
+        raise Mp4ReadException(f"Incomplete sample table in trak at {trak.offset}")
+
+    return SampleTable(
+        timescale=timescale, durations=durations, sizes=sizes, offsets=offsets
+    )
+
+
+def _read_entries(
+    buffer, box: Box, fields: int, size: int = 4
+) -> List[Tuple[int, ...]]:
+    """Entries of a full box with an entry count (stts, stsc, stco, co64)."""
+    count = _read_uint(buffer, box.data_offset + 4, 4)
+    start = box.data_offset + 8
+
+    if start + count * fields * size > box.end:
+        raise Mp4ReadException(f"Invalid {box.type!r} entry count at {box.offset}")
+
+    return [
+        tuple(
+            _read_uint(buffer, start + (index * fields + field) * size, size)
+            for field in range(fields)
+        )
+        for index in range(count)
+    ]
+
+
+def _get_sample_offsets(
+    chunk_offsets: List[int], sample_to_chunk: List[Tuple[int, ...]], sizes: List[int]
+) -> List[int]:
+    offsets = []
+    sample_index = 0
+
+    for entry_index, (first_chunk, samples_per_chunk, _) in enumerate(sample_to_chunk):
+        last_chunk = (
+            sample_to_chunk[entry_index + 1][0] - 1
+            if entry_index + 1 < len(sample_to_chunk)
+            else len(chunk_offsets)
+        )
+
+        for chunk_index in range(first_chunk - 1, min(last_chunk, len(chunk_offsets))):
+            offset = chunk_offsets[chunk_index]
+            for _ in range(samples_per_chunk):
+                if sample_index >= len(sizes):
+                    return offsets
+                offsets.append(offset)
+                offset += sizes[sample_index]
+                sample_index += 1
+
+    return offsets
+
+
+def _read_text(buffer, offset: int, size: int) -> str:
+    """tx3g sample : 16 bit text length, text, then optional style boxes."""
+    if size < 2:
+        return ""
+
+    length = min(_read_uint(buffer, offset, 2), size - 2)
+    text = bytes(buffer[offset + 2 : offset + 2 + length])
+
+    if text.startswith(b"\xfe\xff"):
+        return text[2:].decode("utf-16-be", errors="replace")
+    return text.decode("utf-8", errors="replace").replace("\r\n", "\n").strip("\n")
+
+
+def _format_srt_time(milliseconds: int) -> str:
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+
+
+def _format_srt(buffer, sample_table: SampleTable) -> str:
+    entries = []
+    time = 0
+
+    for duration, size, offset in zip(
+        sample_table.durations, sample_table.sizes, sample_table.offsets
+    ):
+        start = time
+        time += duration
+
+        # empty samples are the gaps between two subtitles
+        text = _read_text(buffer=buffer, offset=offset, size=size)
+        if not text:
+            continue
+
+        entries.append(
+            f"{len(entries) + 1}\n{_format_srt_time(start * 1000 // sample_table.timescale)} --> {_format_srt_time(time * 1000 // sample_table.timescale)}\n{text}\n"
+        )
+
+    return "\n".join(entries)
@@ -0,0 +1,10 @@
+class PlanException(Exception):
+    pass
+
+
+class InvalidPlanException(PlanException):
+    pass
+
+
+class PlanCollisionException(PlanException):
+    pass
@@ -0,0 +1,142 @@
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.model.file import File, RestructedFile
+from src.model.folder import Folder
+from src.model.metadata import Metadata
+from src.constants import FileType, MediaType
+from src.plan.errors import InvalidPlanException
+
+PLAN_VERSION = 2
+PLAN_FILE_SUFFIX = ".plan.json"
+# embedded subtitles extracted while planning, moved from here when the plan is applied
+PLAN_SUBTITLE_DIRECTORY_NAME = "extracted_subtitles"
+
+
+class Plan(NamedTuple):
+    """Result of restruct() which can be executed later without scanning the source again.
+    Only what the executor needs of the metadata is kept (titles, media type and the scanned source tree).
+    """
+
+    new_root_folder: Folder
+    metadata: Metadata
+    audio_track_flags: Optional[Dict[str, Dict[int, bool]]] = None
+    """Audio track flags {track_id: value} decided while planning, written into the source media files
+    right before they are moved."""
+
+
+def serialize_plan(
+    new_root_folder: Folder,
+    metadata: Metadata,
+    audio_track_flags: Optional[Dict[str, Dict[int, bool]]] = None,
+) -> str:
+    return json.dumps(
+        {
+            "version": PLAN_VERSION,
+            "audio_track_flags": {
+                absolute_path: sorted(flags.items())
+                for absolute_path, flags in (audio_track_flags or {}).items()
+            },
+            "metadata": {
+                "title": metadata.get_title(),
+                "original_title": metadata.get_original_title(),
+                "media_type": metadata.get_media_type().name,
+                "root": _serialize_folder(folder=metadata.get_root()),
+                "media_root": metadata.get_media_root().get_absolute_path(),
+            },
+            "new_root": _serialize_folder(folder=new_root_folder),
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def deserialize_plan(raw: str) -> Plan:
+    try:
+        body = json.loads(raw)
+
+        if body.get("version") != PLAN_VERSION:
+            raise InvalidPlanException(
+                f"Unsupported plan version : {body.get('version')}"
+            )
+
+        raw_metadata = body["metadata"]
+        root = _deserialize_folder(raw_folder=raw_metadata["root"])
+
+        return Plan(
+            new_root_folder=_deserialize_folder(raw_folder=body["new_root"]),
+            metadata=Metadata(
+                title=raw_metadata["title"],
+                original_title=raw_metadata["original_title"],
+                media_type=MediaType[raw_metadata["media_type"]],
+                root=root,
+                media_root=_find_folder(folder=root, path=raw_metadata["media_root"])
+                or root,
+            ),
+            audio_track_flags={
+                absolute_path: {track_id: value for track_id, value in flags}
+                for absolute_path, flags in body["audio_track_flags"].items()
+            },
+        )
+    except InvalidPlanException as e:
+        raise e
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidPlanException(f"Broken plan : {e}")
+
+
+def _serialize_folder(folder: Folder) -> Dict[str, Any]:
+    return {
+        "path": folder.get_absolute_path(),
+        "folders": [_serialize_folder(folder=child) for child in folder.get_folders()],
+        "files": [_serialize_file(file=file) for file in folder.get_files()],
+    }
+
+
+def _serialize_file(file: File) -> List[Any]:
+    if isinstance(file, RestructedFile):
+        return [
+            file.get_absolute_path(),
+            file.get_file_type().name,
+            file.get_size(),
+            _serialize_file(file=file.get_original_file()),
+            file.is_copied(),
+        ]
+
+    return [file.get_absolute_path(), file.get_file_type().name, file.get_size()]
+
+
+def _deserialize_folder(raw_folder: Dict[str, Any]) -> Folder:
+    folder = Folder(absolute_path=raw_folder["path"])
+
+    for raw_child in raw_folder["folders"]:
+        folder.append_struct(_deserialize_folder(raw_folder=raw_child))
+
+    for raw_file in raw_folder["files"]:
+        folder.append_struct(_deserialize_file(raw_file=raw_file))
+
+    return folder
+
+
+def _deserialize_file(raw_file: List[Any]) -> File:
+    if len(raw_file) > 3:
+        absolute_path, _, _, raw_original_file, copied = raw_file
+        return RestructedFile(
+            absolute_path=absolute_path,
+            original_file=_deserialize_file(raw_file=raw_original_file),
+            copied=copied,
+        )
+
+    absolute_path, file_type, size = raw_file
+    return File(absolute_path=absolute_path, file_type=FileType[file_type], size=size)
+
+
+def _find_folder(folder: Folder, path: str) -> Optional[Folder]:
+    if folder.get_absolute_path() == path:
+        return folder
+
+    for child in folder.get_folders():
+        found = _find_folder(folder=child, path=path)
+        if found:
+            return found
+
+    return None
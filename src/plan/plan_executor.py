@@ -0,0 +1,213 @@
+import os
+import hashlib
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+from src.model.file import RestructedFile
+from src.model.folder import Folder
+from src.model.metadata import Metadata
+from src.executor.executor import Executor, GeneralExecutor
+from src.errors import DirectoryNotFoundException
+from src.log_exporter import LogExporter
+from src.restructor.audio_track_changer import AudioTrackChanger
+from src.plan.plan import (
+    Plan,
+    PLAN_FILE_SUFFIX,
+    PLAN_SUBTITLE_DIRECTORY_NAME,
+    serialize_plan,
+    deserialize_plan,
+)
+from src.plan.errors import PlanCollisionException
+
+
+class PlanWriter(Executor):
+    """Executor which saves the restructed tree as a plan file instead of moving anything.
+    The audio track flags recorded into planned_track_flags for the files of the plan are saved with it.
+    """
+
+    def __init__(
+        self,
+        log_exporter: LogExporter,
+        plan_path: str,
+        planned_track_flags: Optional[Dict[str, Dict[int, bool]]] = None,
+    ) -> None:
+        self._log_exporter = log_exporter
+        self._plan_path = plan_path
+        self._planned_track_flags = planned_track_flags
+
+    def execute(self, new_root_folder: Folder, metadata: Metadata) -> None:
+        os.makedirs(self._plan_path, exist_ok=True)
+
+        source_root_path = metadata.get_root().get_absolute_path()
+        # planning the same source again replaces its previous plan
+        plan_file_path = os.path.join(
+            self._plan_path,
+            hashlib.sha1(source_root_path.encode("utf-8")).hexdigest()[:16]
+            + PLAN_FILE_SUFFIX,
+        )
+
+        temp_plan_file_path = plan_file_path + ".tmp"
+        with open(temp_plan_file_path, "w", encoding="utf-8") as file:
+            file.write(
+                serialize_plan(
+                    new_root_folder=new_root_folder,
+                    metadata=metadata,
+                    audio_track_flags=self._pop_track_flags(
+                        source_root_path=source_root_path
+                    ),
+                )
+            )
+        os.replace(temp_plan_file_path, plan_file_path)
+
+        self._log_exporter.append_log(
+            f"Plan saved : {source_root_path} -> {plan_file_path}",
+            silent=False,
+        )
+
+    def _pop_track_flags(self, source_root_path: str) -> Dict[str, Dict[int, bool]]:
+        if not self._planned_track_flags:
+            return {}
+
+        return {
+            absolute_path: self._planned_track_flags.pop(absolute_path)
+            for absolute_path in list(self._planned_track_flags)
+            if absolute_path.startswith(source_root_path + os.sep)
+        }
+
+
+class PlanApplier:
+    """Execute every saved plan of plan_path, after checking all of them for collisions first.
+    The audio track flags of a plan are written right before its files are moved, the mkv files are not probed again.
+    """
+
+    def __init__(self, log_exporter: LogExporter, executor: GeneralExecutor) -> None:
+        self._log_exporter = log_exporter
+        self._executor = executor
+
+    def apply(self, plan_path: str) -> None:
+        try:
+            if not os.path.isdir(plan_path):
+                raise DirectoryNotFoundException(
+                    f"Plan directory not found : {plan_path}"
+                )
+
+            plans = self._load_plans(plan_path=plan_path)
+            logger.info(f"{len(plans)} plans loaded from {plan_path}")
+
+            self._check_collisions(plans=plans)
+        except Exception as e:
+            logger.opt(exception=e).error(e)
+            return
+
+        applied = 0
+        for plan_file_path, plan in plans:
+            try:
+                self._change_audio_tracks(plan=plan)
+                self._executor.execute(
+                    new_root_folder=plan.new_root_folder, metadata=plan.metadata
+                )
+                os.remove(plan_file_path)
+                applied += 1
+            except Exception as e:
+                logger.opt(exception=e).error(f"Failed to apply {plan_file_path} : {e}")
+                self._log_exporter.export_traceback_as_file(
+                    source_path=plan.metadata.get_root().get_absolute_path(),
+                    target_path=plan.new_root_folder.get_absolute_path(),
+                )
+
+        logger.info(f"{applied}/{len(plans)} plans applied")
+        self._delete_empty_subtitle_directories(plan_path=plan_path)
+
+    def _change_audio_tracks(self, plan: Plan) -> None:
+        if not plan.audio_track_flags:
+            return
+
+        AudioTrackChanger(
+            log_exporter=self._log_exporter,
+            audio_track_langugage=None,
+            mkv_probe=None,
+        ).change_track_flags(track_flags=plan.audio_track_flags)
+
+    def _delete_empty_subtitle_directories(self, plan_path: str) -> None:
+        subtitle_path = os.path.join(plan_path, PLAN_SUBTITLE_DIRECTORY_NAME)
+        if not os.path.isdir(subtitle_path):
+            return
+
+        with os.scandir(subtitle_path) as it:
+            for entry in it:
+                if entry.is_dir() and not os.listdir(entry.path):
+                    os.rmdir(entry.path)
+
+    def _load_plans(self, plan_path: str) -> List[Tuple[str, Plan]]:
+        plans = []
+
+        for file_name in sorted(os.listdir(plan_path)):
+            if not file_name.endswith(PLAN_FILE_SUFFIX):
+                continue
+
+            plan_file_path = os.path.join(plan_path, file_name)
+            with open(plan_file_path, "r", encoding="utf-8") as file:
+                plans.append((plan_file_path, deserialize_plan(raw=file.read())))
+
+        return plans
+
+    def _check_collisions(self, plans: List[Tuple[str, Plan]]) -> None:
+        problems = []
+        claimed_paths: Dict[str, str] = {}
+
+        for plan_file_path, plan in plans:
+            source_root_path = plan.metadata.get_root().get_absolute_path()
+            if not os.path.isdir(source_root_path):
+                problems.append(f"Source directory not found : {source_root_path}")
+
+            target_paths, source_paths = self._collect_paths(
+                folder=plan.new_root_folder,
+                absolute_path=plan.new_root_folder.get_absolute_path(),
+            )
+
+            for source_path in source_paths:
+                if not os.path.exists(source_path):
+                    problems.append(f"Source file not found : {source_path}")
+
+            for target_path in target_paths:
+                if target_path in claimed_paths:
+                    problems.append(
+                        f"Target path planned twice : {target_path} ({claimed_paths[target_path]}, {plan_file_path})"
+                    )
+                    continue
+                claimed_paths[target_path] = plan_file_path
+
+                if os.path.lexists(target_path):
+                    problems.append(f"Target path already exists : {target_path}")
+
+        if problems:
+            for problem in problems:
+                self._log_exporter.append_log(f"[WARNING] {problem}", silent=False)
+            raise PlanCollisionException(
+                f"{len(problems)} problems found in plans, nothing applied"
+            )
+
+    def _collect_paths(
+        self, folder: Folder, absolute_path: str
+    ) -> Tuple[List[str], List[str]]:
+        """Target and source paths the executor will touch, resolved the same way as GeneralExecutor."""
+        new_directory_path = os.path.join(absolute_path, folder.get_title())
+        if absolute_path == folder.get_absolute_path():
+            new_directory_path = folder.get_absolute_path()
+
+        target_paths = [new_directory_path]
+        source_paths = []
+
+        for child_folder in folder.get_folders():
+            child_target_paths, child_source_paths = self._collect_paths(
+                folder=child_folder, absolute_path=new_directory_path
+            )
+            target_paths.extend(child_target_paths)
+            source_paths.extend(child_source_paths)
+
+        for file in folder.get_files():
+            if isinstance(file, RestructedFile):
+                target_paths.append(file.get_absolute_path())
+                source_paths.append(file.get_original_file().get_absolute_path())
+
+        return target_paths, source_paths
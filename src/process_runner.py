@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, NamedTuple, Optional, Sequence
+from loguru import logger
+
+from src.constants import ProcessTimeout
+from src.errors import ProcessException, ProcessTimeoutException
+
+# patool runs in a child interpreter so a hanging archiver is killed with the rest of its process group
+PATOOL_SCRIPT = (
+    "import sys, patoolib; "
+    "getattr(patoolib, sys.argv[1])(sys.argv[2], verbosity=-1, interactive=False, "
+    "**({'outdir': sys.argv[3]} if len(sys.argv) > 3 else {}))"
+)
+STDERR_LOG_LENGTH = 500
+
+if os.name == "nt":
+    _NEW_PROCESS_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _NEW_PROCESS_GROUP = {"start_new_session": True}
+
+
+class ProcessResult(NamedTuple):
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    elapsed: float
+
+
+@dataclass
+class ToolStatistics:
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def merge(self, other: "ToolStatistics") -> None:
+        self.calls += other.calls
+        self.failures += other.failures
+        self.timeouts += other.timeouts
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+
+_statistics: Dict[str, ToolStatistics] = {}
+_statistics_lock = threading.Lock()
+
+
+def get_timeout(tool: str, input_size: int) -> float:
+    base_seconds, bytes_per_second = ProcessTimeout.TOOLS.get(
+        tool, ProcessTimeout.DEFAULT
+    )
+    return base_seconds + input_size / bytes_per_second
+
+
+def run_process(
+    tool: str,
+    args: Sequence[str],
+    input_size: int = 0,
+    success_returncodes: Sequence[int] = (0,),
+) -> ProcessResult:
+    """Run args in a new process group with stdout / stderr captured.
+    Past the timeout of the tool (scaled to input_size), the whole group is killed and ProcessTimeoutException raised.
+    """
+    timeout = get_timeout(tool=tool, input_size=input_size)
+    started = time.perf_counter()
+
+    try:
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **_NEW_PROCESS_GROUP,
+        )
+    except OSError as e:
+        _record(tool=tool, elapsed=0.0, failed=True, timed_out=False)
+        raise ProcessException(f"Failed to run {tool} : {e}")
+
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_process_group(process=process)
+        elapsed = time.perf_counter() - started
+        _record(tool=tool, elapsed=elapsed, failed=True, timed_out=True)
+        raise ProcessTimeoutException(
+            f"{tool} killed after {elapsed:.0f}s (timeout={timeout:.0f}s) : {' '.join(args)}"
+        )
+    except BaseException:
+        # e.g. KeyboardInterrupt, the new session does not receive the terminal's signals
+        _kill_process_group(process=process)
+        raise
+
+    elapsed = time.perf_counter() - started
+    failed = process.returncode not in success_returncodes
+    _record(tool=tool, elapsed=elapsed, failed=failed, timed_out=False)
+
+    if failed:
+        logger.debug(
+            f"{tool} exited with {process.returncode} : {stderr.decode(errors='replace')[-STDERR_LOG_LENGTH:]}"
+        )
+
+    return ProcessResult(
+        returncode=process.returncode, stdout=stdout, stderr=stderr, elapsed=elapsed
+    )
+
+
+def run_patool(
+    command: str, archive_path: str, outdir: Optional[str] = None
+) -> ProcessResult:
+    """command is a patoolib function name, e.g. extract_archive or test_archive."""
+    args = [sys.executable, "-c", PATOOL_SCRIPT, command, archive_path]
+    if outdir:
+        args.append(outdir)
+
+    return run_process(
+        tool="patool", args=args, input_size=os.path.getsize(archive_path)
+    )
+
+
+def get_error_message(result: ProcessResult) -> str:
+    output = result.stderr.strip() or result.stdout.strip()
+    return output.decode(errors="replace")[-STDERR_LOG_LENGTH:]
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    try:
+        if os.name == "nt":
+            _kill_process_tree(process=process)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+    try:
+        process.communicate(timeout=ProcessTimeout.KILL_WAIT_SECONDS)
+    except subprocess.TimeoutExpired:
+        # a grandchild which left the group still holds the pipes
+        logger.warning(f"Process {process.pid} did not exit after being killed")
+
+
+def _kill_process_tree(process: subprocess.Popen) -> None:
+    """Windows has no process group to signal : process.kill() alone leaves 7z / unrar started by patool running."""
+    try:
+        result = subprocess.run(
+            ["taskkill", "/T", "/F", "/PID", str(process.pid)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=ProcessTimeout.KILL_WAIT_SECONDS,
+        )
+        if result.returncode == 0:
+            return
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"taskkill failed for process {process.pid} : {e}")
+
+    process.kill()
+
+
+def _record(tool: str, elapsed: float, failed: bool, timed_out: bool) -> None:
+    with _statistics_lock:
+        statistics = _statistics.setdefault(tool, ToolStatistics())
+        statistics.calls += 1
+        statistics.failures += int(failed)
+        statistics.timeouts += int(timed_out)
+        statistics.total_seconds += elapsed
+        statistics.max_seconds = max(statistics.max_seconds, elapsed)
+
+
+def take_statistics() -> Dict[str, ToolStatistics]:
+    """Returns the statistics recorded since the last call, e.g. to send them from a worker process to the parent."""
+    global _statistics
+
+    with _statistics_lock:
+        statistics = _statistics
+        _statistics = {}
+    return statistics
+
+
+def merge_statistics(statistics: Dict[str, ToolStatistics]) -> None:
+    with _statistics_lock:
+        for tool, tool_statistics in statistics.items():
+            _statistics.setdefault(tool, ToolStatistics()).merge(tool_statistics)
+
+
+def log_summary() -> None:
+    statistics = take_statistics()
+
+    for tool, tool_statistics in sorted(statistics.items()):
+        logger.info(
+            f"{tool} : {tool_statistics.calls} calls, {tool_statistics.failures} failed, "
+            f"{tool_statistics.timeouts} timed out, "
+            f"avg {tool_statistics.total_seconds / tool_statistics.calls:.2f}s, "
+            f"max {tool_statistics.max_seconds:.2f}s"
+        )
@@ -1,66 +1,120 @@
-import subprocess
+import os
 
-from typing import Optional, Iterable, List
-from pymkv import MKVFile, MKVTrack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple
 from loguru import logger
 
 from src.model.file import File
-from src.constants import Extensions
+from src.constants import Constants, Extensions
 from src.log_exporter import LogExporter
+from src.mkv.mkv_probe import MkvProbe
+from src.mkv.mkv_track import MkvTrack
+from src.mkv.mkv_cache import MkvCache
+from src.mkv.flag_patcher import set_track_flags
+from src.mkv.errors import EbmlReadException
+from src.process_runner import run_process, get_error_message
+from src.restructor.errors import AudioTrackChangeException
 
 
 class AudioTrackChanger:
-    def __init__(self, log_exporter: LogExporter, audio_track_langugage: Optional[str]):
+    def __init__(
+        self,
+        log_exporter: LogExporter,
+        audio_track_langugage: Optional[str],
+        mkv_probe: Optional[MkvProbe],
+        mkv_cache: Optional[MkvCache] = None,
+        planned_track_flags: Optional[Dict[str, Dict[int, bool]]] = None,
+    ):
+        """With planned_track_flags, the flags of the audio tracks {track_id: value} are only recorded there
+        by file path, e.g. while planning, and change_track_flags writes them later."""
         self._log_exporter = log_exporter
         self._audio_track_langugage = audio_track_langugage
+        self._mkv_probe = mkv_probe
+        self._mkv_cache = mkv_cache
+        self._planned_track_flags = planned_track_flags
 
     def change_audio_track(self, file: File) -> None:
+        self.change_audio_tracks(files=[file])
+
+    def change_audio_tracks(self, files: List[File]) -> None:
         if not self._audio_track_langugage:
             return
 
-        if file.get_extension() != Extensions.MKV:
+        mkv_files = [file for file in files if file.get_extension() == Extensions.MKV]
+        if len(mkv_files) == 0:
             return
 
-        logger.info(f"Try to change default audio track for {file.get_absolute_path()}")
+        # episodes are independent files, logs still follow the order of files
+        with ThreadPoolExecutor(
+            max_workers=min(Constants.AUDIO_TRACK_CHANGE_WORKERS, len(mkv_files))
+        ) as pool:
+            for message in pool.map(self._change_audio_track, mkv_files):
+                if message:
+                    self._log_exporter.append_log(message, silent=False)
+
+    def change_track_flags(self, track_flags: Dict[str, Dict[int, bool]]) -> None:
+        """Write audio track flags decided before, {file path: {track_id: value}}, without reading the tracks again."""
+        if len(track_flags) == 0:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(Constants.AUDIO_TRACK_CHANGE_WORKERS, len(track_flags))
+        ) as pool:
+            for message in pool.map(self._change_track_flags, track_flags.items()):
+                self._log_exporter.append_log(message, silent=False)
+
+    def _change_track_flags(self, file_flags: Tuple[str, Dict[int, bool]]) -> str:
+        file_path, flags = file_flags
+        try:
+            self._change_default_audio_track(file_path=file_path, flags=flags)
+        except Exception as e:
+            return f"Failed to change default audio track, aborting file{file_path}, error={e}"
 
-        mkv_file = MKVFile(file_path=file.get_absolute_path())
+        wanted_track_id = next(track_id for track_id, value in flags.items() if value)
+        return f"[CHANGED] Default audio track changed into track {wanted_track_id} (filepath={file_path})"
 
-        audio_tracks = self._find_audio_tracks(mkv_file=mkv_file)
+    def _change_audio_track(self, file: File) -> Optional[str]:
+        """Returns the message to log, None when nothing had to be changed."""
+
+        logger.info(f"Try to change default audio track for {file.get_absolute_path()}")
+
+        audio_tracks = self._find_audio_tracks(
+            tracks=self._mkv_probe.get_tracks(absolute_path=file.get_absolute_path())
+        )
         if len(audio_tracks) <= 1:
             logger.info(
                 f"Additional audio track not found. Skipping change audio track..."
             )
-            return
+            return None
 
         wanted_audio_track = self._find_wanted_language_audio_track(tracks=audio_tracks)
 
         if not wanted_audio_track:
-            return
+            return None
+
+        flags = {track.track_id: track == wanted_audio_track for track in audio_tracks}
+        if self._planned_track_flags is not None:
+            self._planned_track_flags[file.get_absolute_path()] = flags
+            return f"[PLANNED] Default audio track will be changed into {wanted_audio_track.language}, {wanted_audio_track.track_name} (filepath={file.get_absolute_path()})"
 
         try:
+            stat_before_change = os.stat(file.get_absolute_path())
             self._change_default_audio_track(
-                file_path=file.get_absolute_path(),
-                tracks=audio_tracks,
-                wanted_audio_track=wanted_audio_track,
+                file_path=file.get_absolute_path(), flags=flags
             )
+            # only track flags changed, subtitles extracted before stay valid
+            if self._mkv_cache:
+                self._mkv_cache.rekey_extractions(
+                    old_stat=stat_before_change,
+                    new_stat=os.stat(file.get_absolute_path()),
+                )
         except Exception as e:
-            self._log_exporter.append_log(
-                f"Failed to change default audio track, aborting file{file.get_absolute_path()}, error={e}",
-                silent=False,
-            )
             # rollback?
-            return
+            return f"Failed to change default audio track, aborting file{file.get_absolute_path()}, error={e}"
 
-        self._log_exporter.append_log(
-            f"[CHANGED] Default audio track changed into {wanted_audio_track.language}, {wanted_audio_track.track_name} (filepath={file.get_absolute_path()})",
-            silent=False,
-        )
-
-    def _find_audio_tracks(self, mkv_file: MKVFile) -> List[MKVTrack]:
-        tracks = mkv_file.get_track()
-        if not isinstance(tracks, Iterable):
-            raise Exception("MKV File's tracks are not iterable")
+        return f"[CHANGED] Default audio track changed into {wanted_audio_track.language}, {wanted_audio_track.track_name} (filepath={file.get_absolute_path()})"
 
+    def _find_audio_tracks(self, tracks: List[MkvTrack]) -> List[MkvTrack]:
         audio_tracks = []
 
         for track in tracks:
@@ -71,14 +125,14 @@ class AudioTrackChanger:
 
         return audio_tracks
 
-    def _is_audio_track(self, track: MKVTrack) -> bool:
+    def _is_audio_track(self, track: MkvTrack) -> bool:
         if not track.track_type:
             return False
         return track.track_type.lower().__contains__("audio")
 
     def _find_wanted_language_audio_track(
-        self, tracks: List[MKVTrack]
-    ) -> Optional[MKVTrack]:
+        self, tracks: List[MkvTrack]
+    ) -> Optional[MkvTrack]:
         for track in tracks:
             if track.language != self._audio_track_langugage:
                 continue
@@ -97,16 +151,29 @@ class AudioTrackChanger:
         return None
 
     def _change_default_audio_track(
-        self,
-        file_path: str,
-        tracks: List[MKVTrack],
-        wanted_audio_track: MKVTrack,
+        self, file_path: str, flags: Dict[int, bool]
     ) -> None:
+        """flags holds every audio track of the file, {track_id: value}."""
+        try:
+            if set_track_flags(absolute_path=file_path, flags=flags):
+                return
+            logger.info(
+                f"Track flags of {file_path} can not be patched in place, falling back to mkvpropedit"
+            )
+        except EbmlReadException as e:
+            logger.warning(
+                f"Failed to patch track flags of {file_path} ({e}), falling back to mkvpropedit"
+            )
+
+        self._run_mkvpropedit(file_path=file_path, flags=flags)
+
+    def _run_mkvpropedit(self, file_path: str, flags: Dict[int, bool]) -> None:
         args = ["mkvpropedit", "-v", file_path]
 
-        for idx, track in enumerate(tracks):
+        # track:aN counts the audio tracks only, in track order
+        for idx, track_id in enumerate(sorted(flags)):
             enabled = "0"
-            if track == wanted_audio_track:
+            if flags[track_id]:
                 enabled = "1"
 
             args.append("--edit")
@@ -119,4 +186,14 @@ class AudioTrackChanger:
         command = " ".join(args)
         logger.info(f"mkvpropedit command: {command}")
 
-        subprocess.call(args)
+        # 1 means warnings, the flags are still written
+        result = run_process(
+            tool="mkvpropedit",
+            args=args,
+            input_size=os.path.getsize(file_path),
+            success_returncodes=(0, 1),
+        )
+        if result.returncode > 1:
+            raise AudioTrackChangeException(
+                f"mkvpropedit exited with {result.returncode} : {get_error_message(result)}"
+            )
@@ -16,3 +16,11 @@ class SubtitleIndexDuplicatedException(RestructorException):
 
 class NoSubtitleFileException(RestructorException):
     pass
+
+
+class AudioTrackChangeException(RestructorException):
+    pass
+
+
+class ArchiveExtractException(RestructorException):
+    pass
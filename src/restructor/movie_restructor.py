@@ -115,8 +115,8 @@ class MovieRestructor(GeneralRestructor):
                 absolute_path=new_path, original_file=original_file
             )
 
-            self._audio_track_changer.change_audio_track(file=original_file)
-
             self._append_struct_to_folder(
                 folder=root_folder, struct=restructed_media_file
             )
+
+        self._audio_track_changer.change_audio_tracks(files=metadata.get_media_files())
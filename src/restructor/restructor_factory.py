@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from src.restructor.restructor import Restructor
 from src.restructor.movie_restructor import MovieRestructor
 from src.restructor.tv_restructor import TVRestructor
@@ -14,6 +16,8 @@ from src.errors import InvalidMediaTypeException, InvalidEnvConfig
 from src.env_configs import EnvConfigs
 from src.arguments import Arguments
 from src.log_exporter import LogExporter
+from src.mkv.mkv_probe import MkvProbe
+from src.mkv.mkv_cache import MkvCache
 
 
 class RestructorFactory:
@@ -23,11 +27,19 @@ class RestructorFactory:
         subtitle_extractor: SubtitleExtractor,
         arguments: Arguments,
         log_exporter: LogExporter,
+        mkv_subtitle_extractor: MkvSubtitleExtractor,
+        mkv_probe: MkvProbe,
+        mkv_cache: Optional[MkvCache] = None,
+        planned_track_flags: Optional[Dict[str, Dict[int, bool]]] = None,
     ) -> None:
         self._env_configs = env_configs
         self._subtitle_extractor = subtitle_extractor
         self._arguments = arguments
         self._log_exporter = log_exporter
+        self._mkv_subtitle_extractor = mkv_subtitle_extractor
+        self._mkv_probe = mkv_probe
+        self._mkv_cache = mkv_cache
+        self._planned_track_flags = planned_track_flags
 
     def create(self, media_type: MediaType) -> Restructor:
         subtitle_converter = self._get_subtitle_converter(
@@ -36,6 +48,9 @@ class RestructorFactory:
         audio_track_changer = AudioTrackChanger(
             log_exporter=self._log_exporter,
             audio_track_langugage=self._arguments.mkv_audio_language,
+            mkv_probe=self._mkv_probe,
+            mkv_cache=self._mkv_cache,
+            planned_track_flags=self._planned_track_flags,
         )
 
         if media_type == MediaType.MOVIE:
@@ -57,9 +72,7 @@ class RestructorFactory:
                 subtitle_converter=subtitle_converter,
                 subtitle_analyzer=TVAnalyzer(
                     env_configs=self._env_configs,
-                    mkv_subtitle_extractor=MkvSubtitleExtractor(
-                        log_exporter=self._log_exporter, env_configs=self._env_configs
-                    ),
+                    mkv_subtitle_extractor=self._mkv_subtitle_extractor,
                 ),
             )
 
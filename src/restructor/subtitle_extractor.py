@@ -1,6 +1,5 @@
 import tempfile
 from abc import ABCMeta
-from patoolib import extract_archive
 from typing import List
 
 from src.model.structable import Structable
@@ -10,10 +9,11 @@ from src.model.metadata import (
     Metadata,
     SubtitleContainingMetadata,
 )
-from src.restructor.errors import NoSubtitleFileException
+from src.restructor.errors import NoSubtitleFileException, ArchiveExtractException
 from src.constructor.constructor import Constructor
 from src.errors import InvalidMediaTypeException
 from src.constants import FileType
+from src.process_runner import run_patool, get_error_message
 
 
 class SubtitleExtractor(metaclass=ABCMeta):
@@ -37,11 +37,15 @@ class GeneralSubtitleExtractor(SubtitleExtractor):
 
         temp_extracted_subtitle_path = tempfile.mkdtemp()
 
-        extract_archive(
-            archive=subtitle.get_absolute_path(),
-            verbosity=-1,
+        result = run_patool(
+            command="extract_archive",
+            archive_path=subtitle.get_absolute_path(),
             outdir=temp_extracted_subtitle_path,
         )
+        if result.returncode != 0:
+            raise ArchiveExtractException(
+                f"Failed to extract {subtitle.get_absolute_path()} : {get_error_message(result)}"
+            )
 
         extracted_subtitle = self._constrcutor.struct(
             source_path=temp_extracted_subtitle_path
@@ -55,7 +59,8 @@ class GeneralSubtitleExtractor(SubtitleExtractor):
             return root
 
         for child in root.get_folders():
-            return self._find_subtitle_containing_folder(root=child)
+            if child.contains_subtitle_file_recursively():
+                return self._find_subtitle_containing_folder(root=child)
 
         raise NoSubtitleFileException(
             f"Subtitle archive extracted, but no subtitle found. (extracted_path={root.get_absolute_path()})"
@@ -0,0 +1,309 @@
+import os
+import json
+import math
+import time
+import threading
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, NamedTuple, Optional, Set
+from loguru import logger
+
+from src.constants import TranslationBatch
+from src.translator.translation_statistics import estimate_tokens
+
+BATCH_PROFILE_VERSION = 1
+
+
+class BatchSample(NamedTuple):
+    lines: int
+    seconds: float
+    tokens: int
+    """Prompt and reply tokens, as reported by the server or estimated from the text."""
+    failed: bool
+    """The batch failed or its reply was truncated."""
+
+
+@dataclass
+class BatchProfile:
+    """What was measured of one translation server and model."""
+
+    batch_size: int = TranslationBatch.INITIAL
+    ceiling: int = TranslationBatch.MAXIMUM
+    """Lowered when a batch fails, raised again by one line per translated batch."""
+    batches: int = 0
+    failures: int = 0
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    tokens_per_line: float = 0.0
+    error_rate: float = 0.0
+
+
+def create_profile_key(server_address: str, model: str) -> str:
+    return f"{server_address or 'OpenRouter'} {model or 'default'}"
+
+
+class AdaptiveBatchSizer:
+    """Batch size of each translation server and model, learned from the translated batches.
+    Grown while the tokens per second hold up, halved on an error or a truncated reply, kept under the context limit.
+    Saved to profile_path, the next run starts from the learned sizes."""
+
+    def __init__(self, profile_path: str, context_tokens: int) -> None:
+        self._profile_path = profile_path
+        self._context_tokens = context_tokens
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, BatchProfile] = self._load()
+        self._updated_keys: Set[str] = set()
+
+    def get_batch_size(self, key: str) -> int:
+        with self._lock:
+            profile = self._profiles.setdefault(key, BatchProfile())
+            return min(profile.batch_size, self._get_limit(profile=profile))
+
+    def record(self, key: str, sample: BatchSample) -> None:
+        with self._lock:
+            profile = self._profiles.setdefault(key, BatchProfile())
+            previous_batch_size = profile.batch_size
+            self._update(profile=profile, sample=sample)
+            self._updated_keys.add(key)
+            batch_size = profile.batch_size
+
+        if batch_size != previous_batch_size:
+            logger.debug(
+                f"Translation batch size of {key} : {previous_batch_size} -> {batch_size} lines "
+                f"({profile.tokens_per_second:.0f} tokens/s, {profile.latency:.1f} s per batch, "
+                f"{profile.error_rate:.0%} failed)"
+            )
+
+    def save(self) -> None:
+        if not self._profile_path:
+            return
+
+        with self._lock:
+            if not self._updated_keys:
+                return
+
+            # other processes of the run may have saved their own servers meanwhile
+            profiles = self._load()
+            profiles.update({key: self._profiles[key] for key in self._updated_keys})
+            self._updated_keys.clear()
+
+            temporary_path = f"{self._profile_path}.{os.getpid()}.tmp"
+            try:
+                directory = os.path.dirname(os.path.abspath(self._profile_path))
+                os.makedirs(directory, exist_ok=True)
+                with open(temporary_path, "w", encoding="utf-8") as file:
+                    json.dump(
+                        {
+                            "version": BATCH_PROFILE_VERSION,
+                            "profiles": {
+                                key: asdict(profile)
+                                for key, profile in profiles.items()
+                            },
+                        },
+                        file,
+                        indent=2,
+                    )
+                os.replace(temporary_path, self._profile_path)
+            except OSError as e:
+                logger.warning(
+                    f"Failed to save translation batch profile {self._profile_path} : {e}"
+                )
+
+    def _update(self, profile: BatchProfile, sample: BatchSample) -> None:
+        profile.batches += 1
+        profile.error_rate += TranslationBatch.SMOOTHING * (
+            float(sample.failed) - profile.error_rate
+        )
+
+        # batches of a file are all sent at the size it started with, one resize per size is enough
+        stale = sample.lines > profile.batch_size
+
+        if sample.failed:
+            profile.failures += 1
+            if stale:
+                return
+            # back to the size before the last growth, probed again one line at a time
+            profile.ceiling = max(
+                TranslationBatch.MINIMUM,
+                min(profile.ceiling, int(profile.batch_size / TranslationBatch.GROWTH)),
+            )
+            profile.batch_size = max(
+                TranslationBatch.MINIMUM,
+                int(profile.batch_size * TranslationBatch.SHRINK),
+            )
+            return
+
+        tokens_per_second = (
+            sample.tokens / sample.seconds if sample.seconds > 0 else 0.0
+        )
+        previous_tokens_per_second = profile.tokens_per_second
+        profile.latency = _average(profile.latency, sample.seconds)
+        profile.tokens_per_second = _average(
+            profile.tokens_per_second, tokens_per_second
+        )
+        if sample.lines:
+            profile.tokens_per_line = _average(
+                profile.tokens_per_line, sample.tokens / sample.lines
+            )
+        profile.ceiling = min(TranslationBatch.MAXIMUM, profile.ceiling + 1)
+
+        # a short batch (end of a file, a scene) tells little about a larger one
+        if stale or sample.lines * 2 < profile.batch_size:
+            return
+
+        if (
+            tokens_per_second
+            >= previous_tokens_per_second * TranslationBatch.THROUGHPUT_TOLERANCE
+        ):
+            batch_size = math.ceil(profile.batch_size * TranslationBatch.GROWTH)
+        else:
+            # larger batches got slower, the server is past its best batch size
+            batch_size = int(profile.batch_size / TranslationBatch.GROWTH)
+
+        profile.batch_size = max(
+            TranslationBatch.MINIMUM, min(batch_size, self._get_limit(profile=profile))
+        )
+
+    def _get_limit(self, profile: BatchProfile) -> int:
+        limit = min(profile.ceiling, TranslationBatch.MAXIMUM)
+        if self._context_tokens and profile.tokens_per_line:
+            limit = min(
+                limit,
+                int(
+                    self._context_tokens
+                    * TranslationBatch.CONTEXT_SHARE
+                    / profile.tokens_per_line
+                ),
+            )
+        return max(TranslationBatch.MINIMUM, limit)
+
+    def _load(self) -> Dict[str, BatchProfile]:
+        if not self._profile_path or not os.path.exists(self._profile_path):
+            return {}
+
+        names = {field.name for field in fields(BatchProfile)}
+        try:
+            with open(self._profile_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != BATCH_PROFILE_VERSION:
+                return {}
+            return {
+                key: BatchProfile(
+                    **{name: value for name, value in profile.items() if name in names}
+                )
+                for key, profile in data["profiles"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning(
+                f"Translation batch profile {self._profile_path} ignored : {e}"
+            )
+            return {}
+
+
+class BatchMeter:
+    """Measures the batches of one llm-subtrans translator, through its batch_translated event when it has one.
+    Otherwise a translated file is recorded as batches of equal size and duration."""
+
+    def __init__(self, batch_sizer: AdaptiveBatchSizer) -> None:
+        self._batch_sizer = batch_sizer
+        self._key: Optional[str] = None
+        self._started = 0.0
+        self._measured_batches = 0
+
+    @property
+    def measured_batches(self) -> int:
+        return self._measured_batches
+
+    def attach(self, translator: Any) -> None:
+        events = getattr(translator, "events", None)
+        connect = getattr(getattr(events, "batch_translated", None), "connect", None)
+        if not connect:
+            return
+
+        try:
+            # blinker keeps weak references by default, the meter is only referenced by its slot
+            connect(self._on_batch_translated, weak=False)
+        except TypeError:
+            connect(self._on_batch_translated)
+
+    def start(self, key: str) -> None:
+        self._key = key
+        self._started = time.perf_counter()
+        self._measured_batches = 0
+
+    def finish(
+        self, batch_size: int, failed: bool, lines: int = 0, tokens: int = 0
+    ) -> None:
+        """lines and tokens of the file are only used when no batch was measured."""
+        elapsed = time.perf_counter() - self._started
+        key, self._key = self._key, None
+
+        if failed:
+            self._batch_sizer.record(
+                key=key,
+                sample=BatchSample(
+                    lines=batch_size, seconds=elapsed, tokens=0, failed=True
+                ),
+            )
+        elif not self._measured_batches and lines:
+            batches = math.ceil(lines / batch_size)
+            self._batch_sizer.record(
+                key=key,
+                sample=BatchSample(
+                    lines=math.ceil(lines / batches),
+                    seconds=elapsed / batches,
+                    tokens=math.ceil(tokens / batches),
+                    failed=False,
+                ),
+            )
+
+    def _on_batch_translated(self, sender: Any, **kwargs: Any) -> None:
+        now = time.perf_counter()
+        seconds, self._started = now - self._started, now
+
+        batch = kwargs.get("batch")
+        if batch is None or self._key is None:
+            return
+
+        try:
+            sample = _measure_batch(batch=batch, seconds=seconds)
+        except Exception as e:
+            logger.debug(f"Translated batch not measured : {e}")
+            return
+
+        self._measured_batches += 1
+        self._batch_sizer.record(key=self._key, sample=sample)
+
+
+def _measure_batch(batch: Any, seconds: float) -> BatchSample:
+    originals = list(getattr(batch, "originals", None) or [])
+    translated = list(getattr(batch, "translated", None) or [])
+    translation = getattr(batch, "translation", None)
+
+    tokens = (getattr(translation, "prompt_tokens", None) or 0) + (
+        getattr(translation, "output_tokens", None) or 0
+    )
+    if not tokens:
+        tokens = sum(
+            estimate_tokens(getattr(line, "text", None) or "")
+            for line in originals + translated
+        )
+
+    truncated = bool(getattr(translation, "reached_token_limit", False)) or (
+        getattr(translation, "finish_reason", None) == "length"
+    )
+    failed = (
+        truncated
+        or bool(getattr(batch, "errors", None))
+        or len(translated) < len(originals)
+    )
+
+    return BatchSample(
+        lines=len(originals), seconds=seconds, tokens=tokens, failed=failed
+    )
+
+
+def _average(average: float, value: float) -> float:
+    # the first measure replaces the initial 0
+    if not average:
+        return value
+    return average + TranslationBatch.SMOOTHING * (value - average)
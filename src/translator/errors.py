@@ -0,0 +1,10 @@
+class TranslatorException(Exception):
+    pass
+
+
+class SubtitleDocumentException(TranslatorException):
+    pass
+
+
+class TranslationException(TranslatorException):
+    pass
@@ -0,0 +1,235 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.translator.errors import SubtitleDocumentException
+
+SRT_EXTENSION = "srt"
+ASS_EXTENSIONS = ("ass", "ssa")
+SRT_TIMING = re.compile(
+    r"(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+ASS_TIME = re.compile(r"(\d+):(\d{1,2}):(\d{1,2})\.(\d{1,2})")
+ASS_LEADING_TAGS = re.compile(r"^(?:\{[^}]*\})*")
+ASS_TAG = re.compile(r"\{[^}]*\}")
+# \p1 and above switch the rest of the line to vector drawing commands
+ASS_DRAWING_TAG = re.compile(r"\\p[1-9]")
+ASS_TEXT_FIELD = 9
+WHITESPACE = re.compile(r"[^\S\n]+")
+
+
+@dataclass
+class SubtitleCue:
+    start_ms: int
+    end_ms: int
+    text: str
+    """Plain text, rows separated by "\\n". Empty for cues which are not translated (e.g. ASS drawings)."""
+
+
+def normalize_line(text: str) -> str:
+    """Form under which identical lines are matched, whatever their whitespace or unicode composition."""
+    rows = (
+        WHITESPACE.sub(" ", row).strip()
+        for row in unicodedata.normalize("NFC", text).splitlines()
+    )
+    return "\n".join(row for row in rows if row)
+
+
+def collect_unique_cues(cues: List[SubtitleCue]) -> Dict[str, SubtitleCue]:
+    """First cue of each distinct normalized line, in order."""
+    unique_cues: Dict[str, SubtitleCue] = {}
+    for cue in cues:
+        if cue.text:
+            unique_cues.setdefault(normalize_line(cue.text), cue)
+    return unique_cues
+
+
+class SubtitleDocument:
+    """Cues of an SRT or ASS file. Only the cue texts can be replaced, everything else is written back as read."""
+
+    def __init__(
+        self,
+        extension: str,
+        parts: List[str],
+        cues: List[SubtitleCue],
+        originals: List[str],
+        templates: List[str],
+    ) -> None:
+        self.extension = extension
+        self.cues = cues
+        self._parts = parts
+        """Verbatim text of the file, the cue texts excluded. parts[index + 1] follows cues[index]."""
+        self._originals = originals
+        self._templates = templates
+        """Per cue, the format string the translated text is placed into, e.g. the leading override tags of an ASS line."""
+
+    def render(self, texts: List[str]) -> str:
+        if len(texts) != len(self.cues):
+            raise SubtitleDocumentException(
+                f"Expected {len(self.cues)} cue texts, got {len(texts)}"
+            )
+
+        rendered = [self._parts[0]]
+        for index, (cue, text) in enumerate(zip(self.cues, texts)):
+            if cue.text:
+                rendered.append(self._templates[index].format(self._encode(text)))
+            else:
+                rendered.append(self._originals[index])
+            rendered.append(self._parts[index + 1])
+        return "".join(rendered)
+
+    def _encode(self, text: str) -> str:
+        if self.extension in ASS_EXTENSIONS:
+            return text.strip("\n").replace("\n", "\\N")
+        return text.strip("\n")
+
+
+def read_subtitle_document(absolute_path: str) -> SubtitleDocument:
+    extension = absolute_path.rsplit(".", 1)[-1].lower()
+
+    try:
+        with open(absolute_path, encoding="utf-8-sig", newline="") as file:
+            content = file.read().replace("\r\n", "\n")
+    except (OSError, UnicodeDecodeError) as e:
+        raise SubtitleDocumentException(f"Failed to read {absolute_path} : {e}")
+
+    if extension == SRT_EXTENSION:
+        return parse_srt(content=content)
+    if extension in ASS_EXTENSIONS:
+        return parse_ass(content=content, extension=extension)
+
+    raise SubtitleDocumentException(f"Unsupported subtitle format : {absolute_path}")
+
+
+def parse_srt(content: str) -> SubtitleDocument:
+    parts = []
+    cues = []
+    originals = []
+    verbatim = ""
+
+    for block in re.split(r"(\n\s*\n)", content):
+        lines = block.split("\n")
+        timing_index = next(
+            (index for index, line in enumerate(lines[:2]) if SRT_TIMING.search(line)),
+            None,
+        )
+        if timing_index is None:
+            # separators and anything which is not a cue are kept as they are
+            verbatim += block
+            continue
+
+        timing = SRT_TIMING.search(lines[timing_index]).groups()
+        header = "\n".join(lines[: timing_index + 1])
+        if len(lines) > timing_index + 1:
+            header += "\n"
+        text = block[len(header) :].rstrip("\n")
+
+        parts.append(verbatim + header)
+        verbatim = block[len(header) + len(text) :]
+        cues.append(
+            SubtitleCue(
+                start_ms=_to_milliseconds(*timing[:4]),
+                end_ms=_to_milliseconds(*timing[4:]),
+                text=text if normalize_line(text) else "",
+            )
+        )
+        originals.append(text)
+
+    if not cues:
+        raise SubtitleDocumentException("No SRT cue found")
+
+    parts.append(verbatim)
+    return SubtitleDocument(
+        extension=SRT_EXTENSION,
+        parts=parts,
+        cues=cues,
+        originals=originals,
+        templates=["{}"] * len(cues),
+    )
+
+
+def parse_ass(content: str, extension: str) -> SubtitleDocument:
+    parts = []
+    cues = []
+    originals = []
+    templates = []
+    verbatim = ""
+
+    for line in content.split("\n"):
+        if not line.startswith("Dialogue:"):
+            verbatim += line + "\n"
+            continue
+
+        fields = line.split(",", ASS_TEXT_FIELD)
+        start = (
+            ASS_TIME.fullmatch(fields[1].strip())
+            if len(fields) > ASS_TEXT_FIELD
+            else None
+        )
+        end = ASS_TIME.fullmatch(fields[2].strip()) if start else None
+        if not end:
+            verbatim += line + "\n"
+            continue
+
+        raw_text = fields[ASS_TEXT_FIELD]
+        leading_tags = ASS_LEADING_TAGS.match(raw_text).group(0)
+
+        text = ""
+        if not ASS_DRAWING_TAG.search(raw_text):
+            text = ASS_TAG.sub("", raw_text[len(leading_tags) :])
+            text = text.replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+
+        parts.append(verbatim + ",".join(fields[:ASS_TEXT_FIELD]) + ",")
+        verbatim = "\n"
+        cues.append(
+            SubtitleCue(
+                start_ms=_to_ass_milliseconds(*start.groups()),
+                end_ms=_to_ass_milliseconds(*end.groups()),
+                text=text.strip("\n") if normalize_line(text) else "",
+            )
+        )
+        originals.append(raw_text)
+        # inline tags after the first word can not be placed in a translation, only the leading ones are kept
+        templates.append(leading_tags.replace("{", "{{").replace("}", "}}") + "{}")
+
+    if not cues:
+        raise SubtitleDocumentException("No ASS dialogue found")
+
+    # split() leaves an empty last item, its newline is not part of the file
+    parts.append(verbatim[:-1])
+    return SubtitleDocument(
+        extension=extension,
+        parts=parts,
+        cues=cues,
+        originals=originals,
+        templates=templates,
+    )
+
+
+def format_srt(cues: List[SubtitleCue]) -> str:
+    return "\n".join(
+        f"{index + 1}\n{_format_srt_time(cue.start_ms)} --> {_format_srt_time(cue.end_ms)}\n{cue.text}\n"
+        for index, cue in enumerate(cues)
+    )
+
+
+def _to_milliseconds(hours: str, minutes: str, seconds: str, fraction: str) -> int:
+    return (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(
+        fraction.ljust(3, "0")
+    )
+
+
+def _to_ass_milliseconds(
+    hours: str, minutes: str, seconds: str, centiseconds: str
+) -> int:
+    return (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(
+        centiseconds.ljust(2, "0")
+    ) * 10
+
+
+def _format_srt_time(milliseconds: int) -> str:
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
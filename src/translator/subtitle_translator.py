@@ -1,126 +1,201 @@
 import os
-import sys
-import subprocess
+import tempfile
 from loguru import logger
+from typing import Dict, List, Optional
 
 from src.env_configs import EnvConfigs
 from src.model.file import File
+from src.translator import translation_statistics
+from src.translator.errors import SubtitleDocumentException, TranslationException
+from src.translator.subtitle_document import (
+    SubtitleCue,
+    SubtitleDocument,
+    read_subtitle_document,
+    normalize_line,
+    collect_unique_cues,
+    format_srt,
+)
+from src.translator.translator_service import TranslatorService, INSTRUCTION_FILE_PATH
+from src.translator.translation_memory import (
+    TranslationMemory,
+    create_context_digest,
+    create_line_key,
+)
 
 
 class SubtitleTranslator:
-    def __init__(self, env_configs: EnvConfigs) -> None:
+    def __init__(
+        self,
+        env_configs: EnvConfigs,
+        translator_service: TranslatorService,
+        translation_memory: Optional[TranslationMemory] = None,
+    ) -> None:
         self._env_configs = env_configs
+        self._translator_service = translator_service
+        self._translation_memory = translation_memory
+        self._context_digest = create_context_digest(
+            target_language=env_configs.TRANSLATION_TARGET_LANGUAGE,
+            model=env_configs.TRANSLATION_MODEL,
+            instruction_file_path=INSTRUCTION_FILE_PATH,
+        )
 
-    def translate_subtitle(self, subtitle_file: File) -> str:
-        """
-        Translates a subtitle file using llm-subtrans and saves it as <filename>.kor.<ext>
-        Returns the path to the translated subtitle file.
-        """
+    def is_enabled(self) -> bool:
         if not self._env_configs.ENABLE_SUBTITLE_TRANSLATION:
             logger.info("Subtitle translation is disabled.")
-            return subtitle_file.get_absolute_path()
+            return False
 
         if not self._env_configs.TRANSLATION_SERVER_ADDRESS:
-            logger.warning("TRANSLATION_SERVER_ADDRESS is not set. Skipping translation.")
-            return subtitle_file.get_absolute_path()
+            logger.warning(
+                "TRANSLATION_SERVER_ADDRESS is not set. Skipping translation."
+            )
+            return False
+
+        return True
 
+    def get_output_path(self, subtitle_file: File) -> str:
         original_path = subtitle_file.get_absolute_path()
         file_ext = subtitle_file.get_extension()
         base_name = original_path[: -(len(file_ext) + 1)]
-        output_path = f"{base_name}.ko.{file_ext}"
+        return f"{base_name}.ko.{file_ext}"
+
+    def translate_subtitle(self, subtitle_file: File) -> str:
+        """
+        Translates a subtitle file using llm-subtrans and saves it as <filename>.kor.<ext>
+        Returns the path to the translated subtitle file.
+        """
+        if not self.is_enabled():
+            return subtitle_file.get_absolute_path()
+
+        original_path = subtitle_file.get_absolute_path()
+        output_path = self.get_output_path(subtitle_file=subtitle_file)
+
+        if self._translation_memory:
+            try:
+                return self._translate_lines(
+                    original_path=original_path, output_path=output_path
+                )
+            except (SubtitleDocumentException, TranslationException) as e:
+                logger.warning(
+                    f"Line translation failed for {original_path}, translating the whole file : {e}"
+                )
 
         logger.info(f"Starting translation for {original_path} using llm-subtrans as a python module...")
         
         try:
-            from scripts.subtrans_common import CreateOptions, CreateProject, LogTranslationStatus, InitLogger
-            from PySubtrans import init_translator
-            from argparse import Namespace
-            
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            instruction_file_path = os.path.join(
-                project_root, "resources", "translator", "instructions.txt"
+            return (
+                self._translator_service.translate_file(
+                    input_path=original_path, output_path=output_path
+                )
+                or original_path
             )
-            
-            args = Namespace(
-                input=original_path,
-                output=output_path,
-                target_language=self._env_configs.TRANSLATION_TARGET_LANGUAGE,
-                apikey=self._env_configs.TRANSLATION_API_KEY,
-                server=self._env_configs.TRANSLATION_SERVER_ADDRESS,
-                endpoint=self._env_configs.TRANSLATION_ENDPOINT,
-                model=self._env_configs.TRANSLATION_MODEL,
-                description=None,
-                includeoriginal=False,
-                addrtlmarkers=False,
-                instruction=None,
-                instructionfile=instruction_file_path,
-                matchpartialwords=False,
-                maxbatchsize=40,
-                maxsummaries=None,
-                maxlines=None,
-                minbatchsize=5,
-                moviename=None,
-                name=None,
-                names=None,
-                postprocess=False,
-                preprocess=False,
-                project=False,
-                preview=False,
-                reparse=False,
-                retranslate=False,
-                reload=False,
-                ratelimit=None,
-                proxy=None,
-                proxycert=None,
-                scenethreshold=None,
-                substitution=None,
-                temperature=0.0,
-                writebackup=False,
-                chat=True,             # Enable chat format for general APIs
-                systemmessages=False,  
-                auto=False,
-                debug=False,
-                list_formats=False
+        except Exception as ex:
+            logger.error(f"Failed to translate subtitle: {ex}")
+            return original_path
+
+    def _translate_lines(self, original_path: str, output_path: str) -> str:
+        """Write output_path from the translation of each distinct cue line, looked up in the translation memory first."""
+        document = read_subtitle_document(absolute_path=original_path)
+        unique_cues = collect_unique_cues(cues=document.cues)
+        translation_statistics.record_duplicates(
+            cues=document.cues, unique_cues=unique_cues.values()
+        )
+
+        translations = self.lookup_translations(lines=list(unique_cues))
+        missing_cues = [
+            cue for line, cue in unique_cues.items() if line not in translations
+        ]
+        if missing_cues:
+            translations.update(self.translate_cues(cues=missing_cues))
+
+        translation_statistics.record(files_without_request=int(not missing_cues))
+        return self.write_translation(
+            document=document, output_path=output_path, translations=translations
+        )
+
+    def lookup_translations(self, lines: List[str]) -> Dict[str, str]:
+        """Translations of the normalized lines found in the translation memory, by line."""
+        if not self._translation_memory:
+            return {}
+
+        keys = {line: self._get_line_key(line=line) for line in lines}
+        stored = self._translation_memory.get_translations(keys=list(keys.values()))
+        translations = {
+            line: stored[key] for line, key in keys.items() if key in stored
+        }
+        translation_statistics.record(
+            memory_lookups=len(keys), memory_hits=len(translations)
+        )
+        return translations
+
+    def translate_cues(self, cues: List[SubtitleCue]) -> Dict[str, str]:
+        """Translate distinct cues with llm-subtrans and store them in the translation memory.
+        Returns the translations by normalized line, raises TranslationException."""
+        translated_texts = self._translate_missing_cues(cues=cues)
+        translations = {
+            normalize_line(cue.text): text
+            for cue, text in zip(cues, translated_texts)
+            if normalize_line(text)
+        }
+
+        if self._translation_memory:
+            self._translation_memory.put_translations(
+                {
+                    self._get_line_key(line=line): text
+                    for line, text in translations.items()
+                }
             )
+        return translations
 
-            # InitLogger("llm-subtrans", args.debug)
-
-            provider = "Custom Server" if args.server else "OpenRouter"
-            
-            if provider == "OpenRouter":
-                options = CreateOptions(args, provider, api_key=args.apikey, model=args.model, use_default_model=args.auto)
-            else:
-                options = CreateOptions(
-                    args,
-                    provider,
-                    api_key=args.apikey,
-                    endpoint=args.endpoint,
-                    model=args.model,
-                    server_address=args.server,
-                    supports_conversation=args.chat,
-                    supports_system_messages=args.systemmessages,
+    def write_translation(
+        self, document: SubtitleDocument, output_path: str, translations: Dict[str, str]
+    ) -> str:
+        """Cues without a translation keep their original text."""
+        with open(output_path, "w", encoding="utf-8", newline="\n") as file:
+            file.write(
+                document.render(
+                    [
+                        translations.get(normalize_line(cue.text), cue.text)
+                        for cue in document.cues
+                    ]
                 )
-            
-            project = CreateProject(options, args)
-            translator = init_translator(options)
-            
-            project.TranslateSubtitles(translator)
-            
-            if project.use_project_file:
-                project.UpdateProjectFile()
-
-            LogTranslationStatus(project, preview=args.preview)
-            
-            logger.info(f"Translation completed for {output_path}")
-            
-            gen_path = getattr(project.subtitles, 'outputpath', output_path)
-            if gen_path and os.path.exists(gen_path):
-                return gen_path
-            elif os.path.exists(output_path):
-                return output_path
-                
-            return original_path
+            )
 
-        except Exception as ex:
-            logger.error(f"Failed to translate subtitle: {ex}")
-            return original_path
+        translation_statistics.record(
+            files=1, lines=sum(1 for cue in document.cues if cue.text)
+        )
+        logger.info(f"Translation completed for {output_path}")
+        return output_path
+
+    def _get_line_key(self, line: str) -> str:
+        return create_line_key(
+            context_digest=self._context_digest, normalized_line=line
+        )
+
+    def _translate_missing_cues(self, cues: List[SubtitleCue]) -> List[str]:
+        """Cues keep their timing so llm-subtrans still splits scenes and batches on the gaps between them."""
+        with tempfile.TemporaryDirectory(prefix="translation_") as work_path:
+            input_path = os.path.join(work_path, "lines.srt")
+            with open(input_path, "w", encoding="utf-8", newline="\n") as file:
+                file.write(format_srt(cues=cues))
+
+            logger.info(
+                f"Translating {len(cues)} lines using llm-subtrans as a python module..."
+            )
+            try:
+                generated_path = self._translator_service.translate_file(
+                    input_path=input_path,
+                    output_path=os.path.join(work_path, "lines.translated.srt"),
+                )
+            except Exception as e:
+                raise TranslationException(f"llm-subtrans failed : {e}")
+            if not generated_path:
+                raise TranslationException("llm-subtrans wrote no output")
+
+            translated_cues = read_subtitle_document(absolute_path=generated_path).cues
+
+        # translations are matched back to the lines by position
+        if len(translated_cues) != len(cues):
+            raise TranslationException(
+                f"llm-subtrans returned {len(translated_cues)} lines for {len(cues)}"
+            )
+        return [cue.text for cue in translated_cues]
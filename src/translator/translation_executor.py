@@ -0,0 +1,205 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from loguru import logger
+
+from src.env_configs import EnvConfigs
+from src.model.file import File
+from src.translator import translation_statistics
+from src.translator.errors import SubtitleDocumentException
+from src.translator.subtitle_document import (
+    SubtitleCue,
+    SubtitleDocument,
+    read_subtitle_document,
+    normalize_line,
+    collect_unique_cues,
+)
+from src.translator.subtitle_translator import SubtitleTranslator
+
+
+class TranslationExecutor:
+    """Run up to TRANSLATION_MAX_IN_FLIGHT subtitle translations at once against the translation server.
+    llm-subtrans blocks while waiting for the server, so each translation in flight holds one thread.
+    """
+
+    def __init__(
+        self, env_configs: EnvConfigs, subtitle_translator: SubtitleTranslator
+    ) -> None:
+        self._subtitle_translator = subtitle_translator
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, env_configs._TRANSLATION_MAX_IN_FLIGHT),
+            thread_name_prefix="translation",
+        )
+
+    def submit(self, subtitle_file: File) -> "Future[str]":
+        """The future resolves to the translated subtitle path."""
+        return self._pool.submit(
+            self._subtitle_translator.translate_subtitle, subtitle_file
+        )
+
+    def submit_season(self, subtitle_files: List[File]) -> List["Future[str]"]:
+        """Translate the subtitles of one season together. A line found in several episodes (OP / ED lyrics, eyecatches)
+        is sent once, with the first episode it appears in, and written back into every episode.
+        """
+        if len(subtitle_files) < 2 or not self._subtitle_translator.is_enabled():
+            return [self.submit(subtitle_file=file) for file in subtitle_files]
+
+        documents = [self._read_document(subtitle_file=file) for file in subtitle_files]
+        if sum(1 for document in documents if document) < 2:
+            return [self.submit(subtitle_file=file) for file in subtitle_files]
+
+        season_cues = [
+            cue for document in documents if document for cue in document.cues
+        ]
+        unique_cues = collect_unique_cues(cues=season_cues)
+        translation_statistics.record_duplicates(
+            cues=season_cues, unique_cues=unique_cues.values()
+        )
+
+        translations = self._subtitle_translator.lookup_translations(
+            lines=list(unique_cues)
+        )
+        # each episode sends the lines which neither the memory nor an earlier episode has
+        episode_cues = self._split_by_first_episode(
+            documents=documents,
+            unique_cues=unique_cues,
+            known_lines=set(translations),
+        )
+
+        results: List["Future[str]"] = [Future() for _ in subtitle_files]
+        season = _SeasonTranslation(
+            executor=self,
+            subtitle_files=subtitle_files,
+            documents=documents,
+            episode_cues=episode_cues,
+            translations=translations,
+            results=results,
+        )
+        season.start()
+        return results
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _read_document(self, subtitle_file: File) -> Optional[SubtitleDocument]:
+        try:
+            return read_subtitle_document(
+                absolute_path=subtitle_file.get_absolute_path()
+            )
+        except SubtitleDocumentException as e:
+            # translated on its own, as a whole file
+            logger.debug(e)
+            return None
+
+    def _split_by_first_episode(
+        self,
+        documents: List[Optional[SubtitleDocument]],
+        unique_cues: Dict[str, SubtitleCue],
+        known_lines: set,
+    ) -> List[List[SubtitleCue]]:
+        episode_cues = []
+
+        for document in documents:
+            cues = []
+            for line in collect_unique_cues(cues=document.cues if document else []):
+                if line not in known_lines:
+                    known_lines.add(line)
+                    cues.append(unique_cues[line])
+            episode_cues.append(cues)
+
+        return episode_cues
+
+
+class _SeasonTranslation:
+    """Pending translation of a season. The episode files are written once every line request is answered."""
+
+    def __init__(
+        self,
+        executor: TranslationExecutor,
+        subtitle_files: List[File],
+        documents: List[Optional[SubtitleDocument]],
+        episode_cues: List[List[SubtitleCue]],
+        translations: Dict[str, str],
+        results: List["Future[str]"],
+    ) -> None:
+        self._executor = executor
+        self._subtitle_translator = executor._subtitle_translator
+        self._subtitle_files = subtitle_files
+        self._documents = documents
+        self._episode_cues = episode_cues
+        self._translations = translations
+        self._results = results
+        self._lock = threading.Lock()
+        self._pending = sum(1 for cues in episode_cues if cues)
+
+    def start(self) -> None:
+        if not self._pending:
+            self._finish()
+            return
+
+        for cues in self._episode_cues:
+            if cues:
+                try:
+                    translation = self._executor._pool.submit(
+                        self._subtitle_translator.translate_cues, cues
+                    )
+                except RuntimeError as e:
+                    # the pool is shut down, the lines count as failed
+                    translation = Future()
+                    translation.set_exception(e)
+                translation.add_done_callback(self._on_translated)
+
+    def _on_translated(self, future: "Future[Dict[str, str]]") -> None:
+        with self._lock:
+            if future.exception():
+                logger.warning(f"Season line translation failed : {future.exception()}")
+            else:
+                self._translations.update(future.result())
+
+            self._pending -= 1
+            if self._pending:
+                return
+
+        self._finish()
+
+    def _finish(self) -> None:
+        for subtitle_file, document, cues, result in zip(
+            self._subtitle_files, self._documents, self._episode_cues, self._results
+        ):
+            if document and all(
+                normalize_line(cue.text) in self._translations
+                for cue in document.cues
+                if cue.text
+            ):
+                try:
+                    result.set_result(
+                        self._subtitle_translator.write_translation(
+                            document=document,
+                            output_path=self._subtitle_translator.get_output_path(
+                                subtitle_file=subtitle_file
+                            ),
+                            translations=self._translations,
+                        )
+                    )
+                    translation_statistics.record(files_without_request=int(not cues))
+                except Exception as e:
+                    result.set_exception(e)
+                continue
+
+            # unreadable, or some of its lines failed : the whole file is translated on its own
+            try:
+                translation = self._executor.submit(subtitle_file=subtitle_file)
+            except RuntimeError as e:
+                # called back after the pool was shut down, nothing would resolve result
+                result.set_exception(e)
+                continue
+            translation.add_done_callback(
+                lambda future, result=result: _copy_future(source=future, target=result)
+            )
+
+
+def _copy_future(source: "Future[str]", target: "Future[str]") -> None:
+    if source.exception():
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,93 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List
+
+# bump when the normalization of lines or the key layout changes
+TRANSLATION_MEMORY_VERSION = 1
+
+
+def create_context_digest(
+    target_language: str, model: str, instruction_file_path: str
+) -> str:
+    """Everything besides the line itself which changes its translation. Editing the instruction file starts a new context."""
+    digest = hashlib.sha256()
+    for value in (str(TRANSLATION_MEMORY_VERSION), target_language, model):
+        digest.update(value.encode("utf-8") + b"\0")
+
+    try:
+        with open(instruction_file_path, "rb") as file:
+            digest.update(file.read())
+    except OSError:
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def create_line_key(context_digest: str, normalized_line: str) -> str:
+    return hashlib.sha256(
+        f"{context_digest}\0{normalized_line}".encode("utf-8")
+    ).hexdigest()
+
+
+class TranslationMemory:
+    """SQLite store of translated subtitle lines, keyed by create_line_key.
+    Shared by the translation threads of a process, and by worker processes through the file.
+    """
+
+    def __init__(self, memory_path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(memory_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            memory_path, timeout=30, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._connection.commit()
+
+    def get_translations(self, keys: List[str]) -> Dict[str, str]:
+        """Returns the stored translations among keys, by key."""
+        translations = {}
+        now = time.time()
+
+        with self._lock:
+            # below the default SQLITE_MAX_VARIABLE_NUMBER of old sqlite builds
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                translations.update(
+                    self._connection.execute(
+                        f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+                self._connection.execute(
+                    f"UPDATE translations SET last_used = ? WHERE key IN ({placeholders})",
+                    [now, *chunk],
+                )
+            self._connection.commit()
+
+        return translations
+
+    def put_translations(self, translations: Dict[str, str]) -> None:
+        now = time.time()
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                [(key, translation, now) for key, translation in translations.items()],
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,271 @@
+import os
+import time
+import uuid
+import shutil
+import sqlite3
+import threading
+from typing import List, NamedTuple, Set
+from loguru import logger
+
+from src.model.file import RestructedFile
+from src.model.folder import Folder
+from src.constants import Constants
+
+JOURNAL_FILE_NAME = "queue.sqlite"
+INPUT_DIRECTORY_NAME = "jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class TranslationJob(NamedTuple):
+    job_id: int
+    input_path: str
+    """Copy of the untranslated subtitle, kept in the queue directory until the job is done."""
+    target_path: str
+    """Formatted subtitle in the season folder, replaced by its translation."""
+
+
+class TranslationQueue:
+    """Journal of deferred subtitle translations, shared by every process of a run and resumed by the next run.
+    Fallback subtitles are moved untranslated with the media, their translation replaces them once done.
+    """
+
+    def __init__(self, queue_path: str) -> None:
+        self._input_path = os.path.join(queue_path, INPUT_DIRECTORY_NAME)
+        os.makedirs(self._input_path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._deferred_paths: Set[str] = set()
+        self._queued = threading.Event()
+        self._connection = sqlite3.connect(
+            os.path.join(queue_path, JOURNAL_FILE_NAME),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                input_path TEXT NOT NULL,
+                target_path TEXT NOT NULL,
+                group_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL,
+                error TEXT,
+                updated REAL NOT NULL
+            )""")
+        self._add_lease_column()
+        self._requeue_orphaned_jobs()
+
+    def defer(self, subtitle_path: str) -> None:
+        """Translate subtitle_path once it is moved, see enqueue_moved_files."""
+        with self._lock:
+            self._deferred_paths.add(subtitle_path)
+
+    def enqueue_moved_files(self, folder: Folder) -> int:
+        """Queue the deferred subtitles among the files moved into folder. Returns the number of queued jobs."""
+        moved_files = []
+        self._collect_moved_files(folder=folder, moved_files=moved_files)
+
+        with self._lock:
+            deferred_files = [
+                file
+                for file in moved_files
+                if file.get_original_file().get_absolute_path() in self._deferred_paths
+            ]
+            for file in deferred_files:
+                self._deferred_paths.discard(
+                    file.get_original_file().get_absolute_path()
+                )
+
+            queued_jobs = 0
+            for file in deferred_files:
+                target_path = file.get_absolute_path()
+                input_path = os.path.join(
+                    self._input_path, f"{uuid.uuid4().hex}.{file.get_extension()}"
+                )
+                try:
+                    shutil.copyfile(target_path, input_path)
+                except OSError as e:
+                    logger.warning(
+                        f"Failed to queue the translation of {target_path} : {e}"
+                    )
+                    continue
+
+                self._connection.execute(
+                    "INSERT INTO jobs (input_path, target_path, group_path, status, updated) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        input_path,
+                        target_path,
+                        os.path.dirname(target_path),
+                        QUEUED,
+                        time.time(),
+                    ),
+                )
+                queued_jobs += 1
+                logger.info(f"Translation of {target_path} queued")
+
+        if queued_jobs:
+            self._queued.set()
+        return queued_jobs
+
+    def claim_group(self) -> List[TranslationJob]:
+        """Queued jobs of the oldest season folder, leased to this process, see renew_lease."""
+        self._requeue_orphaned_jobs()
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT group_path FROM jobs WHERE status = ? ORDER BY job_id LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                jobs = []
+                if row:
+                    jobs = [
+                        TranslationJob(*job)
+                        for job in self._connection.execute(
+                            "SELECT job_id, input_path, target_path FROM jobs WHERE status = ? AND group_path = ? ORDER BY job_id",
+                            (QUEUED, row[0]),
+                        ).fetchall()
+                    ]
+                    self._connection.executemany(
+                        "UPDATE jobs SET status = ?, lease_expires = ?, attempts = attempts + 1, updated = ? WHERE job_id = ?",
+                        [
+                            (
+                                RUNNING,
+                                time.time() + Constants.TRANSLATION_QUEUE_LEASE_SECONDS,
+                                time.time(),
+                                job.job_id,
+                            )
+                            for job in jobs
+                        ],
+                    )
+            except BaseException:
+                # no job is marked running unless the whole group is
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+            if not jobs:
+                self._queued.clear()
+
+        return jobs
+
+    def renew_lease(self, jobs: List[TranslationJob]) -> None:
+        """Called while the jobs run, once their lease expires any run takes them over."""
+        with self._lock:
+            self._connection.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND status = ?",
+                [
+                    (
+                        time.time() + Constants.TRANSLATION_QUEUE_LEASE_SECONDS,
+                        job.job_id,
+                        RUNNING,
+                    )
+                    for job in jobs
+                ],
+            )
+
+    def complete(self, job: TranslationJob) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated = ? WHERE job_id = ?",
+                (DONE, time.time(), job.job_id),
+            )
+        self._remove_input(job=job)
+
+    def fail(self, job: TranslationJob, error: str) -> None:
+        """Queued again until Constants.TRANSLATION_QUEUE_MAX_ATTEMPTS, then kept as failed."""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, error = ?, updated = ? WHERE job_id = ?",
+                (
+                    Constants.TRANSLATION_QUEUE_MAX_ATTEMPTS,
+                    QUEUED,
+                    FAILED,
+                    error,
+                    time.time(),
+                    job.job_id,
+                ),
+            )
+            status = self._connection.execute(
+                "SELECT status FROM jobs WHERE job_id = ?", (job.job_id,)
+            ).fetchone()[0]
+
+        if status == FAILED:
+            logger.warning(f"Translation of {job.target_path} given up : {error}")
+            self._remove_input(job=job)
+
+    def drop(self, job: TranslationJob, reason: str) -> None:
+        """The job can not succeed any more, e.g. its target was deleted."""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE job_id = ?",
+                (FAILED, reason, time.time(), job.job_id),
+            )
+        self._remove_input(job=job)
+
+    def count_pending(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+
+    def wait_for_jobs(self, timeout: float) -> None:
+        """Returns when this process queued a job, or after timeout for the jobs queued by other processes."""
+        self._queued.wait(timeout=timeout)
+
+    def notify(self) -> None:
+        self._queued.set()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _add_lease_column(self) -> None:
+        """Journals written before leases tracked the owner pid, their running jobs count as expired."""
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")
+        ]
+        if "lease_expires" not in columns:
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+
+    def _requeue_orphaned_jobs(self) -> None:
+        """Jobs whose lease was not renewed (interrupted run, killed worker) are resumed."""
+        with self._lock:
+            orphaned_jobs = self._connection.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)",
+                (QUEUED, time.time(), RUNNING, time.time()),
+            ).rowcount
+            self._connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+                (
+                    DONE,
+                    FAILED,
+                    time.time() - Constants.TRANSLATION_QUEUE_RETENTION_SECONDS,
+                ),
+            )
+
+        if orphaned_jobs > 0:
+            logger.info(f"Resuming {orphaned_jobs} interrupted translations")
+
+    def _collect_moved_files(
+        self, folder: Folder, moved_files: List[RestructedFile]
+    ) -> None:
+        for child_folder in folder.get_folders():
+            self._collect_moved_files(folder=child_folder, moved_files=moved_files)
+
+        for file in folder.get_files():
+            if isinstance(file, RestructedFile):
+                moved_files.append(file)
+
+    def _remove_input(self, job: TranslationJob) -> None:
+        try:
+            os.remove(job.input_path)
+        except FileNotFoundError:
+            pass
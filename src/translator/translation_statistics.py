@@ -0,0 +1,103 @@
+import threading
+from dataclasses import dataclass, fields
+from typing import Iterable, Tuple
+from loguru import logger
+
+from src.translator.subtitle_document import SubtitleCue
+
+# about 4 bytes of UTF-8 per token for BPE tokenizers, latin text a little more, CJK text a little less
+BYTES_PER_TOKEN = 4
+
+
+@dataclass
+class TranslationStatistics:
+    files: int = 0
+    lines: int = 0
+    """Translatable cue lines of the translated files."""
+    memory_lookups: int = 0
+    memory_hits: int = 0
+    files_without_request: int = 0
+    """Files translated without any of their lines sent to the server, from the translation memory or other episodes."""
+    duplicate_lines: int = 0
+    """Lines not sent to the server since the same line was already in the file or the season."""
+    saved_tokens: int = 0
+
+    def merge(self, other: "TranslationStatistics") -> None:
+        for field in fields(self):
+            setattr(
+                self,
+                field.name,
+                getattr(self, field.name) + getattr(other, field.name),
+            )
+
+
+_statistics = TranslationStatistics()
+_statistics_lock = threading.Lock()
+
+
+def record(**counts: int) -> None:
+    """e.g. record(memory_lookups=10, memory_hits=4)"""
+    with _statistics_lock:
+        for name, count in counts.items():
+            setattr(_statistics, name, getattr(_statistics, name) + count)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text.encode("utf-8")) // BYTES_PER_TOKEN)
+
+
+def record_duplicates(
+    cues: Iterable[SubtitleCue], unique_cues: Iterable[SubtitleCue]
+) -> None:
+    """cues are every cue of the translated files, unique_cues the first cue of each distinct line among them."""
+    cue_count, cue_tokens = _count(cues=cues)
+    unique_count, unique_tokens = _count(cues=unique_cues)
+    record(
+        duplicate_lines=cue_count - unique_count,
+        saved_tokens=cue_tokens - unique_tokens,
+    )
+
+
+def _count(cues: Iterable[SubtitleCue]) -> Tuple[int, int]:
+    count = tokens = 0
+    for cue in cues:
+        if cue.text:
+            count += 1
+            tokens += estimate_tokens(cue.text)
+    return count, tokens
+
+
+def take_statistics() -> TranslationStatistics:
+    """Returns the statistics recorded since the last call, e.g. to send them from a worker process to the parent."""
+    global _statistics
+
+    with _statistics_lock:
+        statistics = _statistics
+        _statistics = TranslationStatistics()
+    return statistics
+
+
+def merge_statistics(statistics: TranslationStatistics) -> None:
+    with _statistics_lock:
+        _statistics.merge(statistics)
+
+
+def log_summary() -> None:
+    statistics = take_statistics()
+    if not statistics.files:
+        return
+
+    logger.info(
+        f"Translation : {statistics.files} files, {statistics.lines} lines, "
+        f"{statistics.files_without_request} files without a request to the server"
+    )
+    if statistics.duplicate_lines:
+        logger.info(
+            f"Translation deduplication : {statistics.duplicate_lines} repeated lines not sent, "
+            f"about {statistics.saved_tokens} source tokens saved"
+        )
+    if statistics.memory_lookups:
+        logger.info(
+            f"Translation memory : {statistics.memory_hits}/{statistics.memory_lookups} unique lines hit "
+            f"({statistics.memory_hits / statistics.memory_lookups:.1%})"
+        )
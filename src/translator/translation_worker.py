@@ -0,0 +1,128 @@
+import os
+import shutil
+import threading
+from concurrent.futures import wait
+from typing import List
+from loguru import logger
+
+from src.model.file import File
+from src.constants import Constants, FileType
+from src.translator.translation_executor import TranslationExecutor
+from src.translator.translation_queue import TranslationQueue, TranslationJob
+
+TEMPORARY_SUFFIX = ".translating"
+
+
+class TranslationWorker:
+    """Background thread running the jobs of a TranslationQueue, one season folder at a time."""
+
+    def __init__(
+        self,
+        translation_queue: TranslationQueue,
+        translation_executor: TranslationExecutor,
+    ) -> None:
+        self._translation_queue = translation_queue
+        self._translation_executor = translation_executor
+        self._draining = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="translation-queue", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        """Finish the queued translations first. Interrupting leaves them in the journal for the next run."""
+        pending_jobs = self._translation_queue.count_pending()
+        if pending_jobs:
+            logger.info(
+                f"Waiting for {pending_jobs} queued translations, interrupt to resume them on the next run"
+            )
+
+        self._draining.set()
+        self._translation_queue.notify()
+
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            logger.info(
+                "Queued translations interrupted, they are resumed on the next run"
+            )
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._translation_queue.claim_group()
+
+            if not jobs:
+                if self._draining.is_set():
+                    return
+                self._translation_queue.wait_for_jobs(
+                    timeout=Constants.TRANSLATION_QUEUE_POLL_SECONDS
+                )
+                continue
+
+            try:
+                failed = self._run_jobs(jobs=jobs)
+            except Exception as e:
+                logger.opt(exception=e).error(f"Queued translations failed : {e}")
+                for job in jobs:
+                    self._translation_queue.fail(job=job, error=str(e))
+                failed = True
+
+            # e.g. the server is down, do not spend every attempt right away
+            if failed and not self._draining.is_set():
+                self._draining.wait(timeout=Constants.TRANSLATION_QUEUE_POLL_SECONDS)
+
+    def _run_jobs(self, jobs: List[TranslationJob]) -> bool:
+        """Returns True if a job of the group failed."""
+        logger.info(
+            f"Translating {len(jobs)} queued subtitles of {os.path.dirname(jobs[0].target_path)}"
+        )
+        translations = self._translation_executor.submit_season(
+            subtitle_files=[
+                File(absolute_path=job.input_path, file_type=FileType.SUBTITLE)
+                for job in jobs
+            ]
+        )
+
+        # the lease of the group is renewed while it is translated, an expired one is taken over by the next run
+        pending_translations = set(translations)
+        while pending_translations:
+            _, pending_translations = wait(
+                pending_translations, timeout=Constants.TRANSLATION_QUEUE_POLL_SECONDS
+            )
+            self._translation_queue.renew_lease(jobs=jobs)
+
+        failed = False
+        for job, translation in zip(jobs, translations):
+            try:
+                translated_path = translation.result()
+                if translated_path == job.input_path:
+                    raise RuntimeError("translation failed")
+
+                self._replace_target(job=job, translated_path=translated_path)
+            except Exception as e:
+                self._translation_queue.fail(job=job, error=str(e))
+                failed = True
+
+        return failed
+
+    def _replace_target(self, job: TranslationJob, translated_path: str) -> None:
+        if not os.path.exists(job.target_path):
+            os.remove(translated_path)
+            self._translation_queue.drop(job=job, reason="target removed")
+            logger.warning(
+                f"Translated subtitle discarded, {job.target_path} no longer exists"
+            )
+            return
+
+        # copied next to the target first, players never see a partly written subtitle
+        temporary_path = job.target_path + TEMPORARY_SUFFIX
+        shutil.copyfile(translated_path, temporary_path)
+        os.replace(temporary_path, job.target_path)
+        os.remove(translated_path)
+
+        self._translation_queue.complete(job=job)
+        logger.info(
+            f"[TRANSLATED] Queued subtitle translated, {job.target_path} replaced"
+        )
@@ -0,0 +1,222 @@
+import os
+import threading
+from argparse import Namespace
+from typing import Any, List, NamedTuple, Optional, Tuple
+from loguru import logger
+
+from src.constants import TranslationBatch
+from src.env_configs import EnvConfigs
+from src.translator.errors import SubtitleDocumentException
+from src.translator.subtitle_document import read_subtitle_document
+from src.translator.translation_statistics import estimate_tokens
+from src.translator.batch_sizer import (
+    AdaptiveBatchSizer,
+    BatchMeter,
+    create_profile_key,
+)
+
+PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+INSTRUCTION_FILE_PATH = os.path.join(
+    PROJECT_ROOT, "resources", "translator", "instructions.txt"
+)
+
+
+class TranslatorSlot(NamedTuple):
+    options: Any
+    translator: Any
+    meter: BatchMeter
+
+
+class TranslatorService:
+    """llm-subtrans set up once per run. Each translation in flight takes an initialized (options, translator) slot
+    and gives it back when done, so a provider client, with its keep-alive HTTP connections to the server,
+    serves every file of the run instead of one."""
+
+    def __init__(self, env_configs: EnvConfigs) -> None:
+        self._env_configs = env_configs
+        self._lock = threading.Lock()
+        self._idle_slots: List[TranslatorSlot] = []
+        self._created_slots = 0
+        self._batch_sizer = AdaptiveBatchSizer(
+            profile_path=env_configs._TRANSLATION_BATCH_PROFILE_PATH,
+            context_tokens=env_configs._TRANSLATION_CONTEXT_TOKENS,
+        )
+        self._profile_key = create_profile_key(
+            server_address=env_configs.TRANSLATION_SERVER_ADDRESS,
+            model=env_configs.TRANSLATION_MODEL,
+        )
+
+    def translate_file(self, input_path: str, output_path: str) -> Optional[str]:
+        """Returns the path of the translated file, None if llm-subtrans did not write it."""
+        from scripts.subtrans_common import CreateProject, LogTranslationStatus
+
+        batch_size = self._batch_sizer.get_batch_size(key=self._profile_key)
+        args = self._create_arguments(
+            input_path=input_path, output_path=output_path, batch_size=batch_size
+        )
+        slot = self._acquire_slot(args=args)
+        _apply_batch_size(options=slot.options, args=args)
+        slot.meter.start(key=self._profile_key)
+
+        try:
+            project = CreateProject(slot.options, args)
+            project.TranslateSubtitles(slot.translator)
+
+            if project.use_project_file:
+                project.UpdateProjectFile()
+
+            LogTranslationStatus(project, preview=args.preview)
+        except BaseException:
+            # the translator may be left mid-request or aborted, the next file gets a new one
+            self._discard_slot()
+            slot.meter.finish(batch_size=batch_size, failed=True)
+            self._batch_sizer.save()
+            raise
+
+        self._release_slot(slot=slot)
+        logger.info(f"Translation completed for {output_path}")
+
+        translated_path = None
+        gen_path = getattr(project.subtitles, "outputpath", output_path)
+        if gen_path and os.path.exists(gen_path):
+            translated_path = gen_path
+        elif os.path.exists(output_path):
+            translated_path = output_path
+
+        lines, tokens = (
+            (0, 0) if slot.meter.measured_batches else _measure_input(input_path)
+        )
+        slot.meter.finish(
+            batch_size=batch_size,
+            failed=translated_path is None,
+            lines=lines,
+            tokens=tokens,
+        )
+        self._batch_sizer.save()
+
+        return translated_path
+
+    def close(self) -> None:
+        with self._lock:
+            self._idle_slots.clear()
+        self._batch_sizer.save()
+
+    def _acquire_slot(self, args: Namespace) -> TranslatorSlot:
+        with self._lock:
+            if self._idle_slots:
+                return self._idle_slots.pop()
+            self._created_slots += 1
+            created_slots = self._created_slots
+
+        # created outside the lock, the other threads keep translating meanwhile
+        logger.debug(f"Initializing translator {created_slots} for {args.server}")
+        return self._create_slot(args=args)
+
+    def _release_slot(self, slot: TranslatorSlot) -> None:
+        with self._lock:
+            self._idle_slots.append(slot)
+
+    def _discard_slot(self) -> None:
+        with self._lock:
+            self._created_slots -= 1
+
+    def _create_slot(self, args: Namespace) -> TranslatorSlot:
+        from scripts.subtrans_common import CreateOptions
+        from PySubtrans import init_translator
+
+        # InitLogger("llm-subtrans", args.debug)
+
+        provider = "Custom Server" if args.server else "OpenRouter"
+
+        if provider == "OpenRouter":
+            options = CreateOptions(
+                args,
+                provider,
+                api_key=args.apikey,
+                model=args.model,
+                use_default_model=args.auto,
+            )
+        else:
+            options = CreateOptions(
+                args,
+                provider,
+                api_key=args.apikey,
+                endpoint=args.endpoint,
+                model=args.model,
+                server_address=args.server,
+                supports_conversation=args.chat,
+                supports_system_messages=args.systemmessages,
+            )
+
+        translator = init_translator(options)
+        meter = BatchMeter(batch_sizer=self._batch_sizer)
+        meter.attach(translator=translator)
+
+        return TranslatorSlot(options=options, translator=translator, meter=meter)
+
+    def _create_arguments(
+        self, input_path: str, output_path: str, batch_size: int
+    ) -> Namespace:
+        return Namespace(
+            input=input_path,
+            output=output_path,
+            target_language=self._env_configs.TRANSLATION_TARGET_LANGUAGE,
+            apikey=self._env_configs.TRANSLATION_API_KEY,
+            server=self._env_configs.TRANSLATION_SERVER_ADDRESS,
+            endpoint=self._env_configs.TRANSLATION_ENDPOINT,
+            model=self._env_configs.TRANSLATION_MODEL,
+            description=None,
+            includeoriginal=False,
+            addrtlmarkers=False,
+            instruction=None,
+            instructionfile=INSTRUCTION_FILE_PATH,
+            matchpartialwords=False,
+            maxbatchsize=batch_size,
+            maxsummaries=None,
+            maxlines=None,
+            minbatchsize=min(TranslationBatch.MINIMUM, batch_size),
+            moviename=None,
+            name=None,
+            names=None,
+            postprocess=False,
+            preprocess=False,
+            project=False,
+            preview=False,
+            reparse=False,
+            retranslate=False,
+            reload=False,
+            ratelimit=None,
+            proxy=None,
+            proxycert=None,
+            scenethreshold=None,
+            substitution=None,
+            temperature=0.0,
+            writebackup=False,
+            chat=True,  # Enable chat format for general APIs
+            systemmessages=False,
+            auto=False,
+            debug=False,
+            list_formats=False,
+        )
+
+
+def _apply_batch_size(options: Any, args: Namespace) -> None:
+    # a reused slot still holds the batch size of the file it was created for
+    update = getattr(options, "update", None)
+    if update:
+        update(
+            {"max_batch_size": args.maxbatchsize, "min_batch_size": args.minbatchsize}
+        )
+
+
+def _measure_input(input_path: str) -> Tuple[int, int]:
+    """(lines, estimated prompt and reply tokens) of a subtitle, for a translator which does not report its batches."""
+    try:
+        cues = read_subtitle_document(absolute_path=input_path).cues
+    except SubtitleDocumentException:
+        return 0, 0
+
+    # the reply is about as long as the prompt
+    return len(cues), 2 * sum(estimate_tokens(cue.text) for cue in cues)
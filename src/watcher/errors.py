@@ -0,0 +1,6 @@
+class WatcherException(Exception):
+    pass
+
+
+class WatcherNotAvailableException(WatcherException):
+    pass
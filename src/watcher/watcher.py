@@ -0,0 +1,311 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from abc import ABCMeta
+from loguru import logger
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from src.constants import Constants, Extensions
+from src.watcher.errors import WatcherNotAvailableException
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_BUFFER_SIZE = 64 * 1024
+# written into the source tree by the tool itself, a change to them is not a new arrival
+OWN_OUTPUT_NAMES = (
+    f"{Constants.ERROR_LOG_FILENAME}.{Extensions.LOG}",
+    Constants.SUBTITLE_BACKUP_DIRECTORY_NAME,
+)
+EXTRACTED_SUBTITLE_MARKER = ".extractedsub."
+
+
+def get_child_path(source_path: str, changed_path: str) -> Optional[str]:
+    """Map a changed path to the direct child of source_path it belongs to."""
+    relative_path = os.path.relpath(changed_path, source_path)
+    if relative_path == os.curdir or relative_path.startswith(os.pardir):
+        return None
+
+    return os.path.join(source_path, relative_path.split(os.sep, maxsplit=1)[0])
+
+
+def is_own_output(path: str) -> bool:
+    """Error logs, subtitle backups and extracted subtitles, or anything below them. path is relative to the source."""
+    for name in path.split(os.sep):
+        if name in OWN_OUTPUT_NAMES or EXTRACTED_SUBTITLE_MARKER in name:
+            return True
+    return False
+
+
+class Watcher(metaclass=ABCMeta):
+    def read_changes(self, timeout: float) -> Set[str]:
+        """Wait up to `timeout` seconds and return the child directories of the source path which changed."""
+        raise NotImplementedError
+
+    def discard_changes(self, child_path: str) -> None:
+        """Forget the changes of child_path made until now, e.g. the writes of the job which just processed it."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(Watcher):
+    def __init__(self, source_path: str) -> None:
+        if not sys.platform.startswith("linux"):
+            raise WatcherNotAvailableException("inotify is only available on linux")
+
+        self._source_path = source_path
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise WatcherNotAvailableException(
+                f"inotify_init1 failed : {os.strerror(ctypes.get_errno())}"
+            )
+
+        self._watch_paths: Dict[int, str] = {}
+        # read by discard_changes, returned by the next read_changes
+        self._pending_children: Set[str] = set()
+        try:
+            self._add_watch_recursively(path=source_path)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), ctypes.c_uint32(WATCH_MASK)
+        )
+
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                logger.warning(
+                    f"inotify watch limit reached, changes below {path} are not watched (check fs.inotify.max_user_watches)"
+                )
+                return
+            raise WatcherNotAvailableException(
+                f"inotify_add_watch failed for {path} : {os.strerror(error)}"
+            )
+
+        self._watch_paths[wd] = path
+
+    def _add_watch_recursively(self, path: str) -> None:
+        for directory_path, _, _ in os.walk(path):
+            self._add_watch(path=directory_path)
+
+    def read_changes(self, timeout: float) -> Set[str]:
+        if self._pending_children:
+            timeout = 0
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        changed_children, self._pending_children = self._pending_children, set()
+        if readable:
+            changed_children.update(self._read_events())
+
+        return changed_children
+
+    def discard_changes(self, child_path: str) -> None:
+        # events are queued by the syscall which made the change, every change so far can be read now
+        while True:
+            readable, _, _ = select.select([self._fd], [], [], 0)
+            if not readable:
+                break
+            self._pending_children.update(self._read_events())
+
+        self._pending_children.discard(child_path)
+
+    def _read_events(self) -> Set[str]:
+        try:
+            buffer = os.read(self._fd, READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changed_children = set()
+
+        for changed_path, mask in self._parse_events(buffer=buffer):
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify event queue overflowed, rechecking every child")
+                changed_children.update(self._list_children())
+                continue
+
+            # removing an error log is how a failed folder is retried, only the writes are ignored
+            if not mask & (IN_DELETE | IN_MOVED_FROM) and is_own_output(
+                path=os.path.relpath(changed_path, self._source_path)
+            ):
+                continue
+
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_watch_recursively(path=changed_path)
+
+            child_path = get_child_path(
+                source_path=self._source_path, changed_path=changed_path
+            )
+            if child_path:
+                changed_children.add(child_path)
+
+        return changed_children
+
+    def _parse_events(self, buffer: bytes) -> List[Tuple[str, int]]:
+        events = []
+        offset = 0
+
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_IGNORED:
+                self._watch_paths.pop(wd, None)
+                continue
+
+            watch_path = self._watch_paths.get(wd, self._source_path)
+            changed_path = (
+                os.path.join(watch_path, os.fsdecode(name)) if name else watch_path
+            )
+            events.append((changed_path, mask))
+
+        return events
+
+    def _list_children(self) -> Set[str]:
+        with os.scandir(self._source_path) as it:
+            return {entry.path for entry in it if entry.is_dir()}
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class TreeSignature(NamedTuple):
+    entries: int
+    total_size: int
+    latest_mtime: int
+    own_outputs: FrozenSet[str]
+    """Error logs, subtitle backups and extracted subtitles found in the tree, only their removal is a change."""
+
+    def differs_from(self, previous: Optional["TreeSignature"]) -> bool:
+        if previous is None:
+            return True
+        return self[:3] != previous[:3] or bool(previous.own_outputs - self.own_outputs)
+
+
+class PollingWatcher(Watcher):
+    """Fallback for platforms and filesystems without inotify (Windows, SMB/NFS mounts)."""
+
+    def __init__(self, source_path: str, poll_interval: float) -> None:
+        self._source_path = source_path
+        self._poll_interval = poll_interval
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + poll_interval
+
+    def read_changes(self, timeout: float) -> Set[str]:
+        wait_seconds = self._next_poll - time.monotonic()
+        if wait_seconds > timeout:
+            time.sleep(timeout)
+            return set()
+
+        time.sleep(max(wait_seconds, 0))
+        self._next_poll = time.monotonic() + self._poll_interval
+
+        snapshot = self._take_snapshot()
+        changed_children = {
+            child_path
+            for child_path, signature in snapshot.items()
+            if signature.differs_from(previous=self._snapshot.get(child_path))
+        }
+        changed_children.update(set(self._snapshot.keys()) - set(snapshot.keys()))
+        self._snapshot = snapshot
+
+        return changed_children
+
+    def discard_changes(self, child_path: str) -> None:
+        if os.path.isdir(child_path):
+            self._snapshot[child_path] = self._get_signature(path=child_path)
+        else:
+            self._snapshot.pop(child_path, None)
+
+    def _take_snapshot(self) -> Dict[str, TreeSignature]:
+        snapshot = {}
+
+        with os.scandir(self._source_path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    snapshot[entry.path] = self._get_signature(path=entry.path)
+
+        return snapshot
+
+    def _get_signature(self, path: str) -> TreeSignature:
+        entries = 0
+        total_size = 0
+        latest_mtime = 0
+        own_outputs = set()
+
+        for directory_path, directory_names, file_names in os.walk(path):
+            for name in [name for name in directory_names if is_own_output(path=name)]:
+                own_outputs.add(os.path.join(directory_path, name))
+                directory_names.remove(name)
+
+            for name in directory_names:
+                # a directory's mtime also moves with the tool's own outputs created in it, only files are timed
+                entries += 1
+
+            for name in file_names:
+                file_path = os.path.join(directory_path, name)
+                if is_own_output(path=name):
+                    own_outputs.add(file_path)
+                    continue
+
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+
+                entries += 1
+                total_size += stat.st_size
+                latest_mtime = max(latest_mtime, stat.st_mtime_ns)
+
+        return TreeSignature(
+            entries=entries,
+            total_size=total_size,
+            latest_mtime=latest_mtime,
+            own_outputs=frozenset(own_outputs),
+        )
+
+
+def create_watcher(
+    source_path: str, poll_interval: float, use_inotify: bool
+) -> Watcher:
+    if use_inotify:
+        try:
+            return InotifyWatcher(source_path=source_path)
+        except WatcherNotAvailableException as e:
+            logger.info(f"{e}, falling back to polling every {poll_interval} seconds")
+
+    return PollingWatcher(source_path=source_path, poll_interval=poll_interval)
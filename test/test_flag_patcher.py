@@ -0,0 +1,182 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from typing import List, Optional
+
+from src.mkv.flag_patcher import set_track_flags
+from src.mkv.mkv_track import read_tracks
+
+
+def _size(size: int) -> bytes:
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, "big")
+
+
+def _element(element_id: int, data: bytes) -> bytes:
+    return (
+        element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+        + _size(len(data))
+        + data
+    )
+
+
+def _void(length: int) -> bytes:
+    return _element(0xEC, bytes(length - 2))
+
+
+def _track_entry(
+    number: int,
+    track_type: int,
+    codec_id: str,
+    language: str,
+    crc: bool = False,
+    extra: bytes = b"",
+) -> bytes:
+    data = (
+        _element(0xD7, bytes([number]))
+        + _element(0x73C5, bytes([number]))
+        + _element(0x83, bytes([track_type]))
+        + _element(0x86, codec_id.encode())
+        + _element(0x22B59C, language.encode())
+        + extra
+    )
+    if crc:
+        data = _element(0xBF, zlib.crc32(data).to_bytes(4, "little")) + data
+    return _element(0xAE, data)
+
+
+def create_mkv(
+    path: str,
+    jpn_flags: bool = False,
+    void_after_tracks: int = 0,
+    void_in_entry: int = 0,
+    crc: bool = False,
+) -> None:
+    """Video, a jpn audio track which is default, by omission unless jpn_flags is set,
+    and a kor audio track which is not default."""
+    tracks = _element(
+        0x1654AE6B,
+        _track_entry(1, 1, "V_MPEG4/ISO/AVC", "und", crc=crc)
+        + _track_entry(
+            2,
+            2,
+            "A_AAC",
+            "jpn",
+            crc=crc,
+            extra=(
+                _element(0x88, b"\x01") + _element(0xB9, b"\x01") if jpn_flags else b""
+            )
+            + (_void(void_in_entry) if void_in_entry else b""),
+        )
+        + _track_entry(
+            3,
+            2,
+            "A_AC3",
+            "kor",
+            crc=crc,
+            extra=_element(0x88, b"\x00") + _element(0xB9, b"\x01"),
+        ),
+    )
+    cluster = _element(
+        0x1F43B675,
+        _element(0xE7, b"\x00") + _element(0xA3, b"\x81\x00\x00\x80" + b"frame"),
+    )
+    segment = (
+        _element(0x1549A966, _element(0x2AD7B1, (1000000).to_bytes(3, "big")))
+        + tracks
+        + (_void(void_after_tracks) if void_after_tracks else b"")
+        + cluster
+    )
+    with open(path, "wb") as file:
+        file.write(
+            _element(0x1A45DFA3, _element(0x4282, b"matroska"))
+            + _element(0x18538067, segment)
+        )
+
+
+class FlagPatcherTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.work_path = tempfile.mkdtemp()
+        self.mkv_path = os.path.join(self.work_path, "Show A - 01.mkv")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def read(self) -> bytes:
+        with open(self.mkv_path, "rb") as file:
+            return file.read()
+
+    def set_korean_default(self) -> Optional[List[tuple]]:
+        """Returns (language, default, enabled) of the audio tracks, None when the flags were not written."""
+        before = self.read()
+        if not set_track_flags(absolute_path=self.mkv_path, flags={1: False, 2: True}):
+            self.assertEqual(self.read(), before)
+            return None
+
+        after = self.read()
+        self.assertEqual(len(after), len(before))
+        # the cluster after Tracks and its EbmlVoid did not move
+        cluster_offset = before.index(b"\x1f\x43\xb6\x75")
+        self.assertEqual(after[cluster_offset:], before[cluster_offset:])
+        return [
+            (track.language, track.default_track, track.enabled_track)
+            for track in read_tracks(absolute_path=self.mkv_path)
+            if track.track_type == "audio"
+        ]
+
+    def test_existing_flags_overwritten_in_place(self) -> None:
+        create_mkv(path=self.mkv_path, jpn_flags=True)
+
+        self.assertEqual(
+            self.set_korean_default(), [("jpn", False, False), ("kor", True, True)]
+        )
+
+    def test_missing_flags_written_into_void_after_tracks(self) -> None:
+        create_mkv(path=self.mkv_path, void_after_tracks=32)
+
+        self.assertEqual(
+            self.set_korean_default(), [("jpn", False, False), ("kor", True, True)]
+        )
+
+    def test_missing_flags_written_into_void_in_entry(self) -> None:
+        create_mkv(path=self.mkv_path, void_in_entry=8)
+
+        self.assertEqual(
+            self.set_korean_default(), [("jpn", False, False), ("kor", True, True)]
+        )
+
+    def test_void_left_with_one_byte(self) -> None:
+        # the two flags of jpn take 6 bytes, 1 byte of the void is left over
+        create_mkv(path=self.mkv_path, void_after_tracks=7)
+
+        self.assertEqual(
+            self.set_korean_default(), [("jpn", False, False), ("kor", True, True)]
+        )
+
+    def test_checksums_updated(self) -> None:
+        for jpn_flags in (True, False):
+            with self.subTest(jpn_flags=jpn_flags):
+                create_mkv(
+                    path=self.mkv_path,
+                    jpn_flags=jpn_flags,
+                    void_after_tracks=32,
+                    crc=True,
+                )
+
+                self.assertEqual(
+                    self.set_korean_default(),
+                    [("jpn", False, False), ("kor", True, True)],
+                )
+
+    def test_without_room_nothing_written(self) -> None:
+        create_mkv(path=self.mkv_path)
+
+        self.assertIsNone(self.set_korean_default())
+
+
+if __name__ == "__main__":
+    unittest.main()
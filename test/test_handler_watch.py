@@ -0,0 +1,180 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from typing import Callable, List, Set, Union
+
+from src.arguments import Arguments
+from src.handler import Handler
+from src.watcher.watcher import Watcher
+
+SETTLE_SECONDS = 0.05
+READ_SECONDS = 0.01
+
+
+class FakeWatcher(Watcher):
+    """Replays one step per read_changes call : a set of changed children, or a callable making changes.
+    Stops the watch loop with a KeyboardInterrupt once every step is replayed."""
+
+    def __init__(self, steps: List[Union[Set[str], Callable[[], None]]]) -> None:
+        self._steps = list(steps)
+        self._pending_children: Set[str] = set()
+        self.closed = False
+
+    def change(self, child_path: str) -> None:
+        self._pending_children.add(child_path)
+
+    def read_changes(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, READ_SECONDS))
+        if not self._steps:
+            raise KeyboardInterrupt
+
+        step = self._steps.pop(0)
+        if callable(step):
+            step()
+        else:
+            self._pending_children.update(step)
+
+        changed_children, self._pending_children = self._pending_children, set()
+        return changed_children
+
+    def discard_changes(self, child_path: str) -> None:
+        self._pending_children.discard(child_path)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class RecordingHandler(Handler):
+    """Handler whose media processing only records the calls, and fails while `failing` is set."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            constructor=None,
+            media_type_analyzer=None,
+            media_analyzer_factory=None,
+            restructor_factory=None,
+            executor=None,
+            log_exporter=None,
+        )
+        self.processed: List[str] = []
+        self.processed_at: List[float] = []
+        self.failing = False
+        self.watcher: FakeWatcher = None
+
+    def _process_media(
+        self, source_path: str, target_path: str, constructed_root=None
+    ) -> bool:
+        self.processed.append(source_path)
+        self.processed_at.append(time.monotonic())
+        # like a real job : extracted subtitles, patched flags or an error log written into the child
+        self.watcher.change(source_path)
+        return not self.failing
+
+
+def _idle(count: int) -> List[Set[str]]:
+    return [set() for _ in range(count)]
+
+
+class HandlerWatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.source_path = tempfile.mkdtemp()
+        self.target_path = tempfile.mkdtemp()
+        self.handler = RecordingHandler()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.source_path, ignore_errors=True)
+        shutil.rmtree(self.target_path, ignore_errors=True)
+
+    def make_child(self, name: str) -> str:
+        child_path = os.path.join(self.source_path, name)
+        os.makedirs(child_path, exist_ok=True)
+        return child_path
+
+    def watch(self, steps: list) -> FakeWatcher:
+        watcher = FakeWatcher(steps=steps)
+        self.handler.watcher = watcher
+        self.handler.watch(
+            arguments=Arguments(
+                source_path=self.source_path,
+                target_path=self.target_path,
+                multiple=True,
+                mkv_audio_language=None,
+                watch=True,
+                jobs=1,
+                plan_path="",
+                apply=False,
+            ),
+            watcher=watcher,
+            settle_seconds=SETTLE_SECONDS,
+        )
+        return watcher
+
+    def test_existing_child_processed_once(self) -> None:
+        child_path = self.make_child("Show A")
+
+        watcher = self.watch(steps=_idle(20))
+
+        self.assertEqual(self.handler.processed, [child_path])
+        self.assertTrue(watcher.closed)
+
+    def test_child_processed_after_settling(self) -> None:
+        child_path = os.path.join(self.source_path, "Show A")
+        last_change = []
+
+        def change() -> None:
+            self.make_child("Show A")
+            last_change.append(time.monotonic())
+
+        self.watch(steps=[change, {child_path}, {child_path}, {child_path}] + _idle(20))
+
+        self.assertEqual(self.handler.processed, [child_path])
+        self.assertGreaterEqual(
+            self.handler.processed_at[0], last_change[0] + SETTLE_SECONDS
+        )
+
+    def test_child_changed_while_settling_waits_again(self) -> None:
+        child_path = self.make_child("Show A")
+        changes = []
+
+        def change() -> None:
+            changes.append(time.monotonic())
+            self.handler.watcher.change(child_path)
+
+        self.watch(steps=[change, change, change] + _idle(20))
+
+        self.assertEqual(self.handler.processed, [child_path])
+        self.assertGreaterEqual(
+            self.handler.processed_at[0], changes[-1] + SETTLE_SECONDS
+        )
+
+    def test_deleted_child_skipped(self) -> None:
+        child_path = self.make_child("Show A")
+
+        self.watch(steps=[lambda: shutil.rmtree(child_path), {child_path}] + _idle(20))
+
+        self.assertEqual(self.handler.processed, [])
+
+    def test_own_writes_do_not_requeue(self) -> None:
+        child_path = self.make_child("Show A")
+
+        self.watch(steps=_idle(40))
+
+        self.assertEqual(self.handler.processed, [child_path])
+
+    def test_failed_child_retried_on_outside_change_only(self) -> None:
+        child_path = self.make_child("Show A")
+        self.handler.failing = True
+
+        def outside_change() -> None:
+            self.handler.failing = False
+            self.handler.watcher.change(child_path)
+
+        self.watch(steps=_idle(30) + [outside_change] + _idle(30))
+
+        self.assertEqual(self.handler.processed, [child_path, child_path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmark.mkv_extraction_benchmark import create_synthetic_mkv
+from src.analyzer.mkv_subtitle_extractor import MkvSubtitleExtractor
+from src.constants import FileType, MediaType
+from src.env_configs import EnvConfigs
+from src.executor.executor import GeneralExecutor
+from src.log_exporter import LogExporter
+from src.mkv.mkv_extractor import NativeMkvExtractor
+from src.mkv.mkv_probe import EbmlMkvProbe
+from src.model.file import File, RestructedFile
+from src.model.folder import Folder
+from src.model.metadata import Metadata
+from src.plan.plan import (
+    PLAN_SUBTITLE_DIRECTORY_NAME,
+    deserialize_plan,
+    serialize_plan,
+)
+from src.plan.plan_executor import PlanApplier, PlanWriter
+from src.restructor.audio_track_changer import AudioTrackChanger
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.work_path = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.work_path, "src", "Show A")
+        self.target_path = os.path.join(self.work_path, "dst")
+        self.plan_path = os.path.join(self.work_path, "plan")
+        os.makedirs(self.source_path)
+        os.makedirs(self.target_path)
+
+        self.media_path = os.path.join(self.source_path, "Show A - 01.mkv")
+        self.planned_media_path = os.path.join(
+            self.target_path, "Show A", "Show A - S01E01.mkv"
+        )
+        with open(self.media_path, "wb") as file:
+            file.write(b"not really a mkv")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def create_metadata(self, root: Folder) -> Metadata:
+        return Metadata(
+            title="Show A",
+            original_title="Show A",
+            media_type=MediaType.TV,
+            root=root,
+            media_root=root,
+        )
+
+    def create_new_root_folder(self) -> Folder:
+        root = Folder(absolute_path=self.source_path)
+        root.append_struct(
+            File(absolute_path=self.media_path, file_type=FileType.MEDIA)
+        )
+
+        new_root_folder = Folder(absolute_path=os.path.join(self.target_path, "Show A"))
+        new_root_folder.append_struct(
+            RestructedFile(
+                absolute_path=self.planned_media_path,
+                original_file=root.get_files()[0],
+            )
+        )
+        return new_root_folder
+
+    def create_plan(self, planned_track_flags=None) -> None:
+        PlanWriter(
+            log_exporter=LogExporter(),
+            plan_path=self.plan_path,
+            planned_track_flags=planned_track_flags,
+        ).execute(
+            new_root_folder=self.create_new_root_folder(),
+            metadata=self.create_metadata(root=Folder(absolute_path=self.source_path)),
+        )
+
+    def apply(self) -> list:
+        """Returns the track flags written, with whether each file was still in the source."""
+        changed = []
+
+        def change_default_audio_track(changer, file_path, flags) -> None:
+            changed.append((file_path, flags, os.path.exists(file_path)))
+
+        log_exporter = LogExporter()
+        with mock.patch.object(
+            AudioTrackChanger, "_change_default_audio_track", change_default_audio_track
+        ):
+            PlanApplier(
+                log_exporter=log_exporter,
+                executor=GeneralExecutor(log_exporter=log_exporter),
+            ).apply(plan_path=self.plan_path)
+        return changed
+
+    def test_round_trip(self) -> None:
+        plan = deserialize_plan(
+            raw=serialize_plan(
+                new_root_folder=self.create_new_root_folder(),
+                metadata=self.create_metadata(
+                    root=Folder(absolute_path=self.source_path)
+                ),
+            )
+        )
+
+        file = plan.new_root_folder.get_files()[0]
+        self.assertEqual(plan.metadata.get_title(), "Show A")
+        self.assertEqual(plan.metadata.get_media_type(), MediaType.TV)
+        self.assertEqual(file.get_absolute_path(), self.planned_media_path)
+        self.assertEqual(file.get_original_file().get_absolute_path(), self.media_path)
+
+    def test_plan_applied_later(self) -> None:
+        self.create_plan()
+
+        self.assertTrue(os.path.exists(self.media_path))
+        self.assertFalse(os.path.exists(self.planned_media_path))
+
+        self.apply()
+
+        self.assertFalse(os.path.exists(self.media_path))
+        self.assertTrue(os.path.exists(self.planned_media_path))
+        self.assertEqual(os.listdir(self.plan_path), [])
+
+    def test_existing_target_nothing_applied(self) -> None:
+        self.create_plan()
+        os.makedirs(os.path.dirname(self.planned_media_path))
+        with open(self.planned_media_path, "wb") as file:
+            file.write(b"already there")
+
+        self.apply()
+
+        self.assertTrue(os.path.exists(self.media_path))
+        self.assertEqual(len(os.listdir(self.plan_path)), 1)
+
+    def test_audio_track_flags_round_trip(self) -> None:
+        root = Folder(absolute_path=self.source_path)
+        metadata = self.create_metadata(root=root)
+
+        planned = deserialize_plan(
+            raw=serialize_plan(
+                new_root_folder=root,
+                metadata=metadata,
+                audio_track_flags={self.media_path: {1: False, 2: True}},
+            )
+        )
+        unplanned = deserialize_plan(
+            raw=serialize_plan(new_root_folder=root, metadata=metadata)
+        )
+
+        self.assertEqual(
+            planned.audio_track_flags, {self.media_path: {1: False, 2: True}}
+        )
+        self.assertEqual(unplanned.audio_track_flags, {})
+
+    def test_audio_track_flags_written_before_move(self) -> None:
+        other_media_path = os.path.join(self.work_path, "src", "Show B", "B - 01.mkv")
+        planned_track_flags = {
+            self.media_path: {1: False, 2: True},
+            other_media_path: {1: True, 2: False},
+        }
+        self.create_plan(planned_track_flags=planned_track_flags)
+
+        # the flags of other folders are left for their own plans
+        self.assertEqual(planned_track_flags, {other_media_path: {1: True, 2: False}})
+        self.assertEqual(self.apply(), [(self.media_path, {1: False, 2: True}, True)])
+        self.assertTrue(os.path.exists(self.planned_media_path))
+
+    def test_audio_track_untouched_without_flags(self) -> None:
+        self.create_plan()
+
+        self.assertEqual(self.apply(), [])
+
+
+class PlanExtractionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.work_path = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.work_path, "Show A")
+        self.output_path = os.path.join(
+            self.work_path, "plan", PLAN_SUBTITLE_DIRECTORY_NAME
+        )
+        os.makedirs(self.source_path)
+        self.media_path = os.path.join(self.source_path, "Show A - 01.mkv")
+        create_synthetic_mkv(path=self.media_path, minutes=1, video_kbps=100)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def test_subtitles_extracted_into_plan_directory(self) -> None:
+        env_configs = EnvConfigs()
+        env_configs.ENABLE_SUBTITLE_TRANSLATION = False
+
+        subtitles = MkvSubtitleExtractor(
+            env_configs=env_configs,
+            log_exporter=LogExporter(),
+            mkv_probe=EbmlMkvProbe(fallback_probe=None),
+            mkv_extractor=NativeMkvExtractor(fallback_extractor=None),
+            translation_executor=None,
+            output_path=self.output_path,
+        ).extract_subtitle_file_from_mkv(
+            media_files=[File(absolute_path=self.media_path, file_type=FileType.MEDIA)],
+            subtitles=[],
+        )
+
+        self.assertEqual(os.listdir(self.source_path), ["Show A - 01.mkv"])
+        self.assertEqual(len(subtitles), 1)
+        extracted_path = subtitles[0].get_absolute_path()
+        self.assertTrue(extracted_path.startswith(self.output_path + os.sep))
+        self.assertEqual(
+            os.path.basename(extracted_path), "Show A - 01.mkv.extractedsub.srt"
+        )
+        self.assertTrue(os.path.exists(extracted_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
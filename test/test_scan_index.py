@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.constants import FileType
+from src.constructor.constructor import GeneralConstructor
+from src.constructor.parallel_constructor import ParallelConstructor
+from src.constructor.scan_index import ScanIndex, create_scan_index_fingerprint
+from src.env_configs import EnvConfigs
+
+
+class ScanIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.work_path = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.work_path, "Show A")
+        self.season_path = os.path.join(self.source_path, "Season 1")
+        os.makedirs(self.season_path)
+        self.write(os.path.join(self.season_path, "Show A - 01.mkv"))
+        self.env_configs = EnvConfigs()
+        self.scan_index = ScanIndex(
+            index_path=os.path.join(self.work_path, "scan_index.sqlite"),
+            fingerprint=create_scan_index_fingerprint(env_configs=self.env_configs),
+        )
+
+    def tearDown(self) -> None:
+        self.scan_index.close()
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(b"x")
+
+    def struct(self, constructor) -> tuple:
+        """Returns the names of every file found, and the directories listed instead of reused."""
+        list_directory = type(constructor)._list_directory
+        with mock.patch.object(
+            type(constructor),
+            "_list_directory",
+            autospec=True,
+            side_effect=list_directory,
+        ) as listed:
+            root = constructor.struct(source_path=self.source_path)
+
+        names = []
+        folders = [root]
+        while folders:
+            folder = folders.pop()
+            folders.extend(folder.get_folders())
+            names.extend(
+                os.path.basename(file.get_absolute_path())
+                for file in folder.get_files()
+            )
+        return (
+            sorted(names),
+            sorted(call.kwargs["path"] for call in listed.call_args_list),
+        )
+
+    def assert_directories_reused(self, constructor) -> None:
+        self.assertEqual(
+            self.struct(constructor),
+            (["Show A - 01.mkv"], [self.source_path, self.season_path]),
+        )
+        self.assertEqual(self.struct(constructor), (["Show A - 01.mkv"], []))
+
+        self.write(os.path.join(self.season_path, "Show A - 02.mkv"))
+
+        self.assertEqual(
+            self.struct(constructor),
+            (["Show A - 01.mkv", "Show A - 02.mkv"], [self.season_path]),
+        )
+
+    def test_directories_reused(self) -> None:
+        self.assert_directories_reused(
+            GeneralConstructor(env_configs=self.env_configs, scan_index=self.scan_index)
+        )
+
+    def test_directories_reused_in_parallel(self) -> None:
+        self.assert_directories_reused(
+            ParallelConstructor(
+                env_configs=self.env_configs,
+                max_workers=2,
+                scan_index=self.scan_index,
+            )
+        )
+
+    def write_in_place(self, name: str, content: bytes) -> None:
+        """Rewrite a file without changing its directory's mtime, as an in-place download or replace does."""
+        directory_stat = os.stat(self.source_path)
+        with open(os.path.join(self.source_path, name), "wb") as file:
+            file.write(content)
+        os.utime(
+            self.source_path,
+            ns=(directory_stat.st_atime_ns, directory_stat.st_mtime_ns),
+        )
+
+    def get_file(self, constructor, name: str):
+        files = constructor.struct(source_path=self.source_path).get_files()
+        return next(
+            file for file in files if os.path.basename(file.get_absolute_path()) == name
+        )
+
+    def assert_rewritten_archive_revalidated(
+        self, constructor, media_size: int
+    ) -> None:
+        self.write_in_place("Show A - 01.mkv", b"x" * 10)
+        self.write_in_place("subtitles.zip", b"not an archive")
+        self.assertEqual(
+            self.get_file(constructor, "Show A - 01.mkv").get_size(), media_size
+        )
+        self.assertEqual(
+            self.get_file(constructor, "subtitles.zip").get_file_type(), FileType.EXTRA
+        )
+
+        self.write_in_place("Show A - 01.mkv", b"x" * 2000)
+        self.write_in_place("subtitles.zip", _create_subtitle_zip())
+
+        # only archive candidates are stat'ed again, the media keeps its indexed size
+        self.assertEqual(
+            self.get_file(constructor, "Show A - 01.mkv").get_size(), media_size
+        )
+        self.assertEqual(
+            self.get_file(constructor, "subtitles.zip").get_file_type(),
+            FileType.ARCHIVED_SUBTITLE,
+        )
+
+    def test_rewritten_archive_revalidated(self) -> None:
+        self.assert_rewritten_archive_revalidated(
+            GeneralConstructor(
+                env_configs=self.env_configs, scan_index=self.scan_index
+            ),
+            media_size=10,
+        )
+
+    def test_rewritten_archive_revalidated_in_parallel(self) -> None:
+        # scandir does not stat files whose extension decides their type
+        self.assert_rewritten_archive_revalidated(
+            ParallelConstructor(
+                env_configs=self.env_configs,
+                max_workers=2,
+                scan_index=self.scan_index,
+            ),
+            media_size=0,
+        )
+
+
+def _create_subtitle_zip() -> bytes:
+    import io
+    import zipfile
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("Show A - 01.srt", "1\n00:00:01,000 --> 00:00:02,000\nhi\n")
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from typing import List, Tuple
+
+from benchmark.mkv_extraction_benchmark import create_synthetic_mkv
+from src.mkv.mkv_extractor import MkvExtractor, NativeMkvExtractor
+from src.mkv.mkv_track import MkvTrack, read_tracks
+
+# 2 minutes, a subtitle line every 4 seconds
+SUBTITLE_LINES = 30
+
+
+class RecordingExtractor(MkvExtractor):
+    def __init__(self) -> None:
+        self.outputs: List[Tuple[MkvTrack, str]] = []
+
+    def extract_tracks(
+        self, absolute_path: str, outputs: List[Tuple[MkvTrack, str]]
+    ) -> None:
+        self.outputs.extend(outputs)
+
+
+class NativeExtractionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.work_path = tempfile.mkdtemp()
+        self.mkv_path = os.path.join(self.work_path, "Show A - 01.mkv")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def extract(
+        self, statistics_tags: bool, cued_subtitle_ms: int
+    ) -> RecordingExtractor:
+        create_synthetic_mkv(
+            path=self.mkv_path,
+            minutes=2,
+            video_kbps=100,
+            statistics_tags=statistics_tags,
+            cued_subtitle_ms=cued_subtitle_ms,
+        )
+        self.outputs = [
+            (track, os.path.join(self.work_path, f"{track.track_id}.txt"))
+            for track in read_tracks(self.mkv_path)
+            if track.track_type == "subtitles"
+        ]
+
+        fallback_extractor = RecordingExtractor()
+        NativeMkvExtractor(fallback_extractor=fallback_extractor).extract_tracks(
+            absolute_path=self.mkv_path, outputs=self.outputs
+        )
+        return fallback_extractor
+
+    def read_srt_lines(self) -> int:
+        srt_path = next(
+            path for track, path in self.outputs if track.codec_id == "S_TEXT/UTF8"
+        )
+        with open(srt_path, encoding="utf-8") as file:
+            return file.read().count(" --> ")
+
+    def test_fully_indexed(self) -> None:
+        for statistics_tags in (True, False):
+            with self.subTest(statistics_tags=statistics_tags):
+                fallback_extractor = self.extract(
+                    statistics_tags=statistics_tags, cued_subtitle_ms=0
+                )
+
+                self.assertEqual(fallback_extractor.outputs, [])
+                self.assertEqual(self.read_srt_lines(), SUBTITLE_LINES)
+
+    def test_partly_indexed_falls_back(self) -> None:
+        for statistics_tags in (True, False):
+            with self.subTest(statistics_tags=statistics_tags):
+                fallback_extractor = self.extract(
+                    statistics_tags=statistics_tags, cued_subtitle_ms=60000
+                )
+
+                self.assertEqual(fallback_extractor.outputs, self.outputs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.watcher.errors import WatcherNotAvailableException
+from src.watcher.watcher import InotifyWatcher, PollingWatcher, Watcher
+
+
+def _write(path: str, content: str = "x") -> None:
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(content)
+
+
+class WatcherTestMixin:
+    """Replays filesystem changes against a temporary source directory. Subclasses create the watcher."""
+
+    def create_watcher(self, source_path: str) -> Watcher:
+        raise NotImplementedError
+
+    def setUp(self) -> None:
+        self.source_path = tempfile.mkdtemp()
+        self.child_a = os.path.join(self.source_path, "Show A")
+        self.child_b = os.path.join(self.source_path, "Show B")
+        os.makedirs(self.child_a)
+        os.makedirs(self.child_b)
+        self.watcher = self.create_watcher(source_path=self.source_path)
+
+    def tearDown(self) -> None:
+        self.watcher.close()
+        shutil.rmtree(self.source_path, ignore_errors=True)
+
+    def read_changes(self) -> set:
+        return self.watcher.read_changes(timeout=1)
+
+    def test_file_written_in_child(self) -> None:
+        _write(os.path.join(self.child_a, "Show A - 01.mkv"))
+
+        self.assertEqual(self.read_changes(), {self.child_a})
+
+    def test_new_child_and_nested_directory(self) -> None:
+        child_c = os.path.join(self.source_path, "Show C")
+        os.makedirs(os.path.join(child_c, "Season 1"))
+        self.read_changes()
+
+        _write(os.path.join(child_c, "Season 1", "Show C - 01.mkv"))
+
+        self.assertEqual(self.read_changes(), {child_c})
+
+    def test_deleted_child(self) -> None:
+        shutil.rmtree(self.child_b)
+
+        self.assertEqual(self.read_changes(), {self.child_b})
+
+    def test_own_output_writes_ignored(self) -> None:
+        error_log_path = os.path.join(self.child_a, "MAF_Error.log")
+        _write(error_log_path)
+        self.watcher.discard_changes(child_path=self.child_a)
+
+        _write(error_log_path, content="another traceback")
+        _write(os.path.join(self.child_a, "Show A - 01.mkv.extractedsub.ass"))
+
+        self.assertEqual(self.read_changes(), set())
+
+    def test_removed_error_log_reported(self) -> None:
+        error_log_path = os.path.join(self.child_a, "MAF_Error.log")
+        _write(error_log_path)
+        self.watcher.discard_changes(child_path=self.child_a)
+
+        os.remove(error_log_path)
+
+        self.assertEqual(self.read_changes(), {self.child_a})
+
+    def test_discard_changes_keeps_other_children(self) -> None:
+        _write(os.path.join(self.child_a, "Show A - 01.mkv"))
+        _write(os.path.join(self.child_b, "Show B - 01.mkv"))
+
+        self.watcher.discard_changes(child_path=self.child_a)
+
+        self.assertEqual(self.read_changes(), {self.child_b})
+
+
+class PollingWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, source_path: str) -> Watcher:
+        return PollingWatcher(source_path=source_path, poll_interval=0.01)
+
+
+class InotifyWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, source_path: str) -> Watcher:
+        try:
+            return InotifyWatcher(source_path=source_path)
+        except WatcherNotAvailableException as e:
+            self.skipTest(str(e))
+
+
+if __name__ == "__main__":
+    unittest.main()